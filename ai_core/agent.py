@@ -1,28 +1,41 @@
 from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
+from typing import List
 from langchain_core.prompts import PromptTemplate
-from langchain_google_genai import ChatGoogleGenerativeAI
 import os
+import json
+import asyncio
 import traceback
 from dotenv import load_dotenv
+from response_cache import cache_from_env, make_cache_key
+from model_router import ModelRouter, router_from_env
+from token_budget import (
+    CHAT_HISTORY_TOKEN_BUDGET, CHAT_SUMMARY_TOKEN_BUDGET, REVIEW_TOKEN_BUDGET,
+    estimate_tokens, fit_inputs, truncate_to_tokens,
+)
+from flow_control import Overloaded, flow_control_from_env
+from metrics import REGISTRY, LLMCall, MetricsMiddleware, record_outcome, record_usage
 
 # .env 파일 로드
 load_dotenv()
 
 app = FastAPI(title="S1-6 AI Orchestrator", version="4.0-Persona-Enhanced")
+app.add_middleware(MetricsMiddleware)
+
+# 모델 공급자 선택: AI_LLM_PROVIDER=gemini(기본) | fake(네트워크 없는 부하 테스트용)
+LLM_PROVIDER = os.getenv("AI_LLM_PROVIDER", "gemini").lower()
 
 # 환경 변수 체크
 MY_GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
-if not MY_GOOGLE_API_KEY:
+if LLM_PROVIDER == "gemini" and not MY_GOOGLE_API_KEY:
     print("❌ [경고] GOOGLE_API_KEY가 없습니다!")
 
 try:
-    llm = ChatGoogleGenerativeAI(
-        model="models/gemini-flash-latest",
-        google_api_key=MY_GOOGLE_API_KEY,
-        temperature=0.8  # 창의성을 위해 0.7 -> 0.8로 약간 상향
-    )
-    print("✅ [AI] Gemini 모델 로드 완료 (Persona Mode: ON)")
+    # llm: 페르소나별로 모델 등급/출력 길이/예비 모델을 고르는 라우터 (model_router 참고)
+    # gemini는 창의성을 위해 temperature 0.7 -> 0.8로 약간 상향
+    llm = router_from_env(LLM_PROVIDER)
+    print(f"✅ [AI] {LLM_PROVIDER} 모델 라우터 로드 완료 (Persona Mode: ON)")
 except Exception as e:
     print(f"🔥 모델 초기화 실패: {e}")
     llm = None
@@ -75,7 +88,177 @@ PERSONA_DOCENT = """
 어조: 따뜻하고, 친절하며, 대화하듯 자연스러운 어조. (존댓말 사용)
 """
 
+PERSONA_CURATOR = """
+당신은 **S1-6 온라인 갤러리의 상주 큐레이터**입니다.
+관람객과 이어지는 대화를 나누며 작품, 작가, 미술사, 전시에 대한 질문에 답합니다.
+앞선 대화에서 알게 된 관람객의 취향과 이미 설명한 내용을 기억하고, 같은 설명을 반복하지 마세요.
+어조: 박식하지만 친근한 대화체. 짧은 질문에는 짧게 답합니다. (존댓말 사용)
+"""
+
+# 3. 엔드포인트별 프롬프트 템플릿 (일반 응답/스트리밍 응답이 공유)
+PROPOSE_TEMPLATE = (
+    f"{PERSONA_PLANNER}\n{FORMAT_INSTRUCTION}\n"
+    "클라이언트 요청: '{intent}'. \n"
+    "위 요청을 바탕으로 차별화된 전시 기획안을 작성하시오."
+)
+
+GENERATE_TEMPLATE = (
+    f"{PERSONA_PAINTER}\n"
+    "주제: '{topic}', 스타일: '{style}'. \n"
+    "Generate a creative and detailed English prompt."
+)
+
+REVIEW_TEMPLATE = (
+    f"{PERSONA_CRITIC}\n{FORMAT_INSTRUCTION}\n"
+    "대상 작품: '{art_info}'. \n"
+    "전문가의 시선으로 이 작품을 냉철하게 분석하고 평가하시오."
+)
+
+PROMOTE_TEMPLATE = (
+    f"{PERSONA_MARKETER}\n{FORMAT_INSTRUCTION}\n"
+    "전시 제목: '{title}'. 타겟: '{target}'. \n"
+    "이 전시가 SNS에서 바이럴 될 수 있도록 매력적인 홍보 문구를 작성해줘."
+)
+
+AUCTION_TEMPLATE = (
+    f"{PERSONA_AUCTIONEER}\n{FORMAT_INSTRUCTION}\n"
+    "작품 정보: {art_info}, 비평 내용: {critic_review}. \n"
+    "이 정보를 바탕으로 경매 리포트(시작가, 가치 평가, 오프닝 멘트)를 작성하시오."
+)
+
+DOCENT_TEMPLATE = (
+    f"{PERSONA_DOCENT}\n{FORMAT_INSTRUCTION}\n"
+    "작품 정보: {art_info}. \n"
+    "관람객({aud})이 흥미를 느낄 수 있도록 재미있는 해설 대본을 작성해줘."
+)
+
+# 4. 풀코스 전용 템플릿 (주제/스타일 기반, 비평을 이어받음)
+COURSE_PAINTER_TEMPLATE = (
+    f"{PERSONA_PAINTER}\n"
+    "주제: '{topic}', 스타일: '{style}'. \n"
+    "Generate a highly detailed English prompt for image generation."
+)
+
+COURSE_CRITIC_TEMPLATE = (
+    f"{PERSONA_CRITIC}\n{FORMAT_INSTRUCTION}\n"
+    "작품 주제: '{topic}', 스타일: '{style}'. \n"
+    "이 작품이 완성되었다고 가정하고, 미술사적 맥락을 포함한 심도 있는 비평문을 작성하시오."
+)
+
+COURSE_DOCENT_TEMPLATE = (
+    f"{PERSONA_DOCENT}\n{FORMAT_INSTRUCTION}\n"
+    "작품 주제: '{topic}', 비평 요약: '{review}'. \n"
+    "관람객들에게 말을 걸듯이 재미있게 작품을 해설해주세요."
+)
+
+COURSE_AUCTION_TEMPLATE = (
+    f"{PERSONA_AUCTIONEER}\n{FORMAT_INSTRUCTION}\n"
+    "작품: '{topic}', 비평: '{review}'. \n"
+    "이 작품의 소장 가치를 강력하게 어필하고, 경매 시작가(ETH)와 오프닝 멘트를 작성하시오."
+)
+
+# 5. 비평 요약 (긴 비평문을 도슨트/경매사에게 넘기기 전에 한 번만 요약)
+SUMMARY_TEMPLATE = (
+    "다음은 미술 비평문입니다. 도슨트와 경매사가 참고할 수 있도록 "
+    "핵심 평가(색채, 구도, 미술사적 맥락, 총평)만 {limit}자 이내의 불릿 포인트로 요약하시오.\n"
+    "비평문: '{review}'"
+)
+
+# 6. 큐레이터 채팅 (지난 대화 요약 + 최근 대화를 맥락으로)
+CHAT_TEMPLATE = (
+    f"{PERSONA_CURATOR}\n"
+    "[관람 중인 작품]\n{art_info}\n\n"
+    "[지난 대화 요약]\n{summary}\n\n"
+    "[최근 대화]\n{history}\n\n"
+    "관람객: {message}\n"
+    "큐레이터:"
+)
+
+CHAT_SUMMARY_TEMPLATE = (
+    "다음은 갤러리 큐레이터와 관람객의 대화 기록입니다. 이어지는 대화에 필요한 맥락"
+    "(관람객의 관심사와 취향, 이미 답한 내용, 남은 질문)만 {limit}자 이내로 요약하시오.\n"
+    "기존 요약: '{summary}'\n"
+    "이어진 대화:\n{history}"
+)
+
+# ==================================================================
+# 🗂️ [체인 레지스트리] 페르소나 체인은 시작할 때 한 번만 컴파일
+# ==================================================================
+# 체인 이름 → (페르소나, 템플릿)
+# 새 페르소나는 여기에 한 줄 추가하거나 register_chain()으로 등록한다.
+# 페르소나 값은 캐시 opt-out(AI_CACHE_DISABLED_PERSONAS)의 기준이 된다.
+CHAIN_SPECS = {
+    "planner": ("planner", PROPOSE_TEMPLATE),
+    "painter": ("painter", GENERATE_TEMPLATE),
+    "critic": ("critic", REVIEW_TEMPLATE),
+    "marketer": ("marketer", PROMOTE_TEMPLATE),
+    "auctioneer": ("auctioneer", AUCTION_TEMPLATE),
+    "docent": ("docent", DOCENT_TEMPLATE),
+    "painter.course": ("painter", COURSE_PAINTER_TEMPLATE),
+    "critic.course": ("critic", COURSE_CRITIC_TEMPLATE),
+    "docent.course": ("docent", COURSE_DOCENT_TEMPLATE),
+    "auctioneer.course": ("auctioneer", COURSE_AUCTION_TEMPLATE),
+    "critic.summary": ("summarizer", SUMMARY_TEMPLATE),
+    "curator": ("curator", CHAT_TEMPLATE),
+    "curator.summary": ("summarizer", CHAT_SUMMARY_TEMPLATE),
+}
+
+# 컴파일된 체인 (이름 → PromptTemplate | 모델)과 체인별 모델 설정 (캐시 키에 포함)
+CHAINS = {}
+CHAIN_SETTINGS = {}
+# 체인별 템플릿 고정 부분(페르소나 + 형식 지침)의 추정 토큰 수
+CHAIN_FIXED_TOKENS = {}
+
+def compile_chain(template, model):
+    return PromptTemplate.from_template(template) | model
+
+def describe_model(model):
+    if hasattr(model, "describe"):
+        return model.describe()
+    return {
+        "model": getattr(model, "model", type(model).__name__),
+        "temperature": getattr(model, "temperature", None),
+    }
+
+def _model_for(persona, model=None):
+    # model을 직접 주면 모든 페르소나가 그 모델 하나를 쓴다 (벤치마크/테스트용)
+    model = model or llm
+    if isinstance(model, ModelRouter):
+        return model.model_for(persona)
+    return model
+
+def _compile(name, model=None):
+    persona, template = CHAIN_SPECS[name]
+    target = _model_for(persona, model)
+    prompt = PromptTemplate.from_template(template)
+    CHAINS[name] = prompt | target
+    CHAIN_SETTINGS[name] = describe_model(target)
+    CHAIN_FIXED_TOKENS[name] = estimate_tokens(prompt.format(**{v: "" for v in prompt.input_variables}))
+
+def build_chains(model=None):
+    """CHAIN_SPECS 전체를 컴파일한다. llm을 교체한 뒤에도 다시 호출하면 된다."""
+    CHAINS.clear()
+    CHAIN_SETTINGS.clear()
+    if (model or llm) is None:
+        return CHAINS
+    for name in CHAIN_SPECS:
+        _compile(name, model)
+    return CHAINS
+
+def register_chain(name, persona, template):
+    CHAIN_SPECS[name] = (persona, template)
+    if llm is not None:
+        _compile(name)
+
+def persona_of(name):
+    return CHAIN_SPECS[name][0]
+
+build_chains()
+
 # --- 데이터 모델 ---
+BATCH_MAX_CONCURRENCY = int(os.getenv("AI_BATCH_MAX_CONCURRENCY", "4"))
+BATCH_MAX_ITEMS = int(os.getenv("AI_BATCH_MAX_ITEMS", "100"))
+
 class PlanRequest(BaseModel):
     intent: str
 
@@ -103,6 +286,23 @@ class FullCourseRequest(BaseModel):
     topic: str
     style: str = "Digital Art"
 
+class ChatTurn(BaseModel):
+    user: str
+    ai: str
+
+class ChatRequest(BaseModel):
+    message: str
+    # history: 아직 요약에 접히지 않은 대화 (오래된 것부터), summary: 그 이전 대화의 누적 요약
+    history: List[ChatTurn] = Field(default_factory=list, max_length=100)
+    summary: str = ""
+    # 특정 작품 페이지에서 묻는 질문이면 그 작품 정보 (제목/설명)
+    art_info: str = ""
+
+class BatchRequest(BaseModel):
+    # 각 항목은 해당 페르소나 단건 API와 같은 형식 (예: docent → DocentRequest)
+    items: List[dict]
+    max_concurrency: int = Field(BATCH_MAX_CONCURRENCY, ge=1, le=32)
+
 # 헬퍼 함수
 def parse_response(content):
     try:
@@ -112,150 +312,447 @@ def parse_response(content):
     except Exception as e:
         return str(content)
 
+# ==================================================================
+# 💾 [캐시] 같은 페르소나 + 같은 입력 + 같은 모델 설정이면 재사용
+# ==================================================================
+response_cache = cache_from_env()
+
+def _cache_key(name, inputs):
+    # 키/카운터는 체인 이름 단위, opt-out은 페르소나 단위
+    if not response_cache.enabled_for(persona_of(name)):
+        return None
+    return make_cache_key(name, inputs, CHAIN_SETTINGS[name])
+
+# ==================================================================
+# 📏 [입력 예산] 프롬프트 입력 토큰 상한 + 긴 비평 요약
+# ==================================================================
+def prepare_inputs(name, inputs):
+    fixed = CHAIN_FIXED_TOKENS[name]
+    fitted, total, trimmed = fit_inputs(inputs, fixed)
+    note = f", 잘림: {', '.join(trimmed)}" if trimmed else ""
+    print(f"📏 [{name}] 입력 약 {total} 토큰 (템플릿 {fixed}{note})")
+    return fitted
+
+async def condense_review(review):
+    """비평문이 예산(AI_REVIEW_TOKEN_BUDGET)을 넘으면 요약본으로 바꾼다.
+
+    요약도 캐시/single-flight를 타므로 같은 비평은 한 번만 요약되고,
+    요약이 실패하면 예산 길이로 잘라서 쓴다.
+    """
+    size = estimate_tokens(review)
+    if size <= REVIEW_TOKEN_BUDGET:
+        return review
+    try:
+        limit = int(REVIEW_TOKEN_BUDGET * 1.5)  # 한글 기준 대략 글자 수
+        summary = await ainvoke_text("critic.summary", {"review": review, "limit": limit})
+    except Exception as e:
+        print(f"🔥 비평 요약 실패, 잘라서 사용: {e}")
+        return truncate_to_tokens(review, REVIEW_TOKEN_BUDGET)
+    print(f"✂️ 비평 요약: 약 {size} → {estimate_tokens(summary)} 토큰")
+    return summary
+
+def format_turns(turns):
+    return "\n".join(f"관람객: {t.user}\n큐레이터: {t.ai}" for t in turns)
+
+async def build_chat_context(turns, summary=""):
+    """최근 대화는 AI_CHAT_HISTORY_TOKEN_BUDGET 안에서 그대로 두고, 넘치는 오래된 대화는
+    기존 요약에 접어 넣는다 (누적 요약). (요약, 최근 대화 목록, 접힌 대화 수)를 반환한다.
+
+    호출하는 쪽이 새 요약과 접힌 개수를 저장해 두면, 한 번 접힌 대화는 다시 요약하지 않는다.
+    """
+    recent, used = [], 0
+    for turn in reversed(turns):
+        size = estimate_tokens(format_turns([turn]))
+        if used + size > CHAT_HISTORY_TOKEN_BUDGET:
+            break
+        recent.insert(0, turn)
+        used += size
+    folded = turns[:len(turns) - len(recent)]
+    if not folded:
+        return summary, recent, 0
+
+    history = format_turns(folded)
+    try:
+        limit = int(CHAT_SUMMARY_TOKEN_BUDGET * 1.5)  # 한글 기준 대략 글자 수
+        new_summary = await ainvoke_text("curator.summary", {"summary": summary or "없음", "history": history, "limit": limit})
+    except Exception as e:
+        print(f"🔥 대화 요약 실패, 잘라서 사용: {e}")
+        new_summary = truncate_to_tokens(f"{summary}\n{history}".strip(), CHAT_SUMMARY_TOKEN_BUDGET)
+    print(f"🗜️ 대화 {len(folded)}턴 요약에 반영 (최근 {len(recent)}턴 약 {used} 토큰 유지)")
+    return truncate_to_tokens(new_summary, CHAT_SUMMARY_TOKEN_BUDGET), recent, len(folded)
+
+# ==================================================================
+# 🚦 [흐름 제어] 동일 요청 합치기(single-flight) + 동시 실행 제한
+# ==================================================================
+flow = flow_control_from_env()
+
+@app.exception_handler(Overloaded)
+async def overloaded_handler(request, exc):
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": exc.detail},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+async def _generate(name, inputs, key):
+    persona = persona_of(name)
+    try:
+        async with flow.slot(persona):
+            # 첫 토큰 시간(TTFT)과 usage 집계를 위해 내부적으로는 스트리밍으로 받는다
+            with LLMCall(persona, name) as call:
+                message = None
+                async for chunk in CHAINS[name].astream(inputs):
+                    call.first_token()
+                    message = chunk if message is None else message + chunk
+                call.finish(message)
+    except Overloaded:
+        record_outcome(persona, name, "rejected")
+        raise
+    text = parse_response(message.content) if message is not None else ""
+    if key:
+        await response_cache.aset(name, key, text)
+    return text
+
+async def ainvoke_text(name, inputs):
+    inputs = prepare_inputs(name, inputs)
+    key = _cache_key(name, inputs)
+    if not key:
+        # 캐시 opt-out 페르소나(예: 화가)는 매번 새로 생성
+        return await _generate(name, inputs, None)
+    cached = await response_cache.aget(name, key)
+    if cached is not None:
+        record_outcome(persona_of(name), name, "cache_hit")
+        return cached
+    if flow.single_flight.is_inflight(key):
+        record_outcome(persona_of(name), name, "coalesced")
+    return await flow.single_flight.do(key, lambda: _generate(name, inputs, key))
+
+async def agent_reply(name, inputs, result_key, fallback):
+    # 과부하(429/503)는 그대로 올려보내고, 그 외 실패는 기존 대체 문구로
+    try:
+        return {result_key: await ainvoke_text(name, inputs)}
+    except Overloaded:
+        raise
+    except Exception:
+        print(traceback.format_exc())
+        return {result_key: fallback}
+
 @app.get("/")
 def read_root():
-    return {"status": "AI Personas Loaded", "mode": "Expert"}
+    return {"status": "AI Personas Loaded", "mode": "Expert", "provider": LLM_PROVIDER}
+
+@app.get("/cache/stats")
+def get_cache_stats():
+    return response_cache.stats()
+
+@app.delete("/cache")
+def clear_cache():
+    response_cache.clear()
+    return {"status": "cleared"}
+
+@app.get("/flow/stats")
+def get_flow_stats():
+    return flow.stats()
+
+@app.get("/router/stats")
+def get_router_stats():
+    if not isinstance(llm, ModelRouter):
+        return {"router": False}
+    return llm.stats()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+# ==================================================================
+# 🕸️ [실행 엔진] 의존성 그래프 기반 비동기 실행
+# ==================================================================
+# 단계별 타임아웃(초). 한 단계가 늦어져도 나머지 결과는 돌려준다.
+STEP_TIMEOUT = float(os.getenv("AI_STEP_TIMEOUT", "60"))
+
+async def _run_step(name, deps, call, tasks, results, errors, timeout):
+    # 선행 단계가 끝날 때까지 대기, 하나라도 실패하면 이 단계는 건너뜀
+    for dep in deps:
+        await tasks[dep]
+        if dep in errors:
+            errors[name] = f"선행 단계 실패: {dep}"
+            return
+    try:
+        results[name] = await asyncio.wait_for(call(results), timeout)
+    except asyncio.TimeoutError:
+        print(f"⏰ [{name}] {timeout}초 타임아웃")
+        errors[name] = f"시간 초과 ({timeout:g}s)"
+    except Exception as e:
+        print(traceback.format_exc())
+        errors[name] = str(e)
+
+async def run_graph(graph, timeout=STEP_TIMEOUT):
+    """graph: {결과 키: (선행 단계 키 목록, async call(results))}
+
+    선행 단계가 없는 단계는 즉시 동시에 시작하고, 나머지는 선행 단계가
+    끝나는 대로 시작한다. (results, errors)를 반환한다.
+    """
+    results, errors, tasks = {}, {}, {}
+    for name, (deps, call) in graph.items():
+        unknown = [d for d in deps if d not in graph]
+        if unknown:
+            raise ValueError(f"알 수 없는 선행 단계: {name} -> {unknown}")
+        tasks[name] = asyncio.create_task(
+            _run_step(name, deps, call, tasks, results, errors, timeout)
+        )
+    await asyncio.gather(*tasks.values())
+    return results, errors
 
 # ==================================================================
 # 🚀 [Full-Course] 페르소나 적용된 풀코스
 # ==================================================================
+# 화가 ‖ 비평가 → (비평 완료 후, 길면 요약) 도슨트 ‖ 경매사
 @app.post("/full-course")
-def run_full_course(request: FullCourseRequest):
+async def run_full_course(request: FullCourseRequest):
     if not llm: raise HTTPException(500, "AI 로드 실패")
     print(f"🔥 [풀코스] 전문가 팀 소집: {request.topic}")
-    
-    results = {}
-    
-    try:
-        # 1. 화가 (영어 프롬프트)
-        painter_chain = PromptTemplate.from_template(
-            f"{PERSONA_PAINTER}\n"
-            "주제: '{topic}', 스타일: '{style}'. \n"
-            "Generate a highly detailed English prompt for image generation."
-        ) | llm
-        img_prompt = parse_response(painter_chain.invoke({"topic": request.topic, "style": request.style}).content)
-        results["image_prompt"] = img_prompt
-
-        # 2. 비평가 (전문가 비평)
-        critic_chain = PromptTemplate.from_template(
-            f"{PERSONA_CRITIC}\n{FORMAT_INSTRUCTION}\n"
-            "작품 주제: '{topic}', 스타일: '{style}'. \n"
-            "이 작품이 완성되었다고 가정하고, 미술사적 맥락을 포함한 심도 있는 비평문을 작성하시오."
-        ) | llm
-        review_text = parse_response(critic_chain.invoke({"topic": request.topic, "style": request.style}).content)
-        results["critic_review"] = review_text
-
-        # 3. 도슨트 (스토리텔링)
-        docent_chain = PromptTemplate.from_template(
-            f"{PERSONA_DOCENT}\n{FORMAT_INSTRUCTION}\n"
-            "작품 주제: '{topic}', 비평 요약: '{review}'. \n"
-            "관람객들에게 말을 걸듯이 재미있게 작품을 해설해주세요."
-        ) | llm
-        docent_text = parse_response(docent_chain.invoke({"topic": request.topic, "review": review_text}).content)
-        results["docent_script"] = docent_text
-
-        # 4. 경매사 (가치 평가)
-        auction_chain = PromptTemplate.from_template(
-            f"{PERSONA_AUCTIONEER}\n{FORMAT_INSTRUCTION}\n"
-            "작품: '{topic}', 비평: '{review}'. \n"
-            "이 작품의 소장 가치를 강력하게 어필하고, 경매 시작가(ETH)와 오프닝 멘트를 작성하시오."
-        ) | llm
-        auction_text = parse_response(auction_chain.invoke({"topic": request.topic, "review": review_text}).content)
-        results["auction_report"] = auction_text
-
-        return results
 
+    base = {"topic": request.topic, "style": request.style}
+    graph = {
+        # 1. 화가 (영어 프롬프트)  2. 비평가 (전문가 비평)
+        "image_prompt": ([], lambda r: ainvoke_text("painter.course", base)),
+        "critic_review": ([], lambda r: ainvoke_text("critic.course", base)),
+        # 긴 비평은 한 번만 요약해서 도슨트/경매사가 함께 사용 (_로 시작하는 키는 응답에서 제외)
+        "_review_digest": (["critic_review"], lambda r: condense_review(r["critic_review"])),
+        # 3. 도슨트 (스토리텔링)  4. 경매사 (가치 평가)
+        "docent_script": (["_review_digest"], lambda r: ainvoke_text(
+            "docent.course", {"topic": request.topic, "review": r["_review_digest"]})),
+        "auction_report": (["_review_digest"], lambda r: ainvoke_text(
+            "auctioneer.course", {"topic": request.topic, "review": r["_review_digest"]})),
+    }
+    results, errors = await run_graph(graph)
+    results = {k: v for k, v in results.items() if not k.startswith("_")}
+
+    # 일부 단계가 실패해도 성공한 결과는 그대로 반환
+    if errors:
+        results["errors"] = errors
+    return results
+
+# ==================================================================
+# 📡 [스트리밍] Server-Sent Events
+# ==================================================================
+# 이벤트 형식
+#   data: {"delta": "..."}                 토큰 조각
+#   event: done  / data: {"<키>": "전문"}   완료 (일반 엔드포인트와 같은 키)
+#   event: error / data: {"error": "..."}  실패
+def sse_event(data, event=None):
+    head = f"event: {event}\n" if event else ""
+    return f"{head}data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+async def _sse_chunks(name, inputs, key):
+    # 캐시에 있으면 한 번에 흘려보내고, 없으면 스트리밍이 끝난 뒤 저장
+    inputs = prepare_inputs(name, inputs)
+    cache_key = _cache_key(name, inputs)
+    if cache_key:
+        cached = await response_cache.aget(name, cache_key)
+        if cached is not None:
+            record_outcome(persona_of(name), name, "cache_hit")
+            yield sse_event({"delta": cached})
+            yield sse_event({key: cached}, "done")
+            return
+
+    parts = []
+    try:
+        async with flow.slot(persona_of(name)):
+            with LLMCall(persona_of(name), name) as call:
+                message = None
+                async for chunk in CHAINS[name].astream(inputs):
+                    call.first_token()
+                    message = chunk if message is None else message + chunk
+                    text = parse_response(chunk.content)
+                    if text:
+                        parts.append(text)
+                        yield sse_event({"delta": text})
+                call.finish(message)
+        full_text = "".join(parts)
+        if cache_key:
+            await response_cache.aset(name, cache_key, full_text)
+        yield sse_event({key: full_text}, "done")
+    except Overloaded as e:
+        record_outcome(persona_of(name), name, "rejected")
+        yield sse_event({"error": e.detail, "status": e.status_code}, "error")
     except Exception as e:
         print(traceback.format_exc())
-        return {"error": str(e)}
+        yield sse_event({"error": str(e)}, "error")
+
+def sse_response(name, inputs, key):
+    return StreamingResponse(
+        _sse_chunks(name, inputs, key),
+        media_type="text/event-stream",
+        # 프록시(nginx 등)가 버퍼링하지 않도록
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 # ==================================================================
 # 개별 에이전트 (페르소나 적용 완료)
+#   POST /<agent>         → 완성된 JSON 한 번에
+#   POST /<agent>/stream  → 같은 입력, SSE 토큰 스트리밍
 # ==================================================================
 
 # 1. 기획자
 @app.post("/propose")
-def create_proposal(request: PlanRequest):
+async def create_proposal(request: PlanRequest):
     if not llm: raise HTTPException(500, "AI 로드 실패")
-    try:
-        chain = PromptTemplate.from_template(
-            f"{PERSONA_PLANNER}\n{FORMAT_INSTRUCTION}\n"
-            "클라이언트 요청: '{intent}'. \n"
-            "위 요청을 바탕으로 차별화된 전시 기획안을 작성하시오."
-        ) | llm
-        return {"draft_text": parse_response(chain.invoke({"intent": request.intent}).content)}
-    except Exception:
-        return {"draft_text": "AI 에러"}
+    return await agent_reply("planner", {"intent": request.intent}, "draft_text", "AI 에러")
+
+@app.post("/propose/stream")
+def stream_proposal(request: PlanRequest):
+    if not llm: raise HTTPException(500, "AI 로드 실패")
+    return sse_response("planner", {"intent": request.intent}, "draft_text")
 
 # 2. 화가
 @app.post("/generate")
-def start_work(request: WorkRequest):
+async def start_work(request: WorkRequest):
     if not llm: raise HTTPException(500, "AI 로드 실패")
-    try:
-        chain = PromptTemplate.from_template(
-            f"{PERSONA_PAINTER}\n"
-            "주제: '{topic}', 스타일: '{style}'. \n"
-            "Generate a creative and detailed English prompt."
-        ) | llm
-        return {"final_prompt": parse_response(chain.invoke({"topic": request.topic, "style": request.style}).content)}
-    except Exception:
-        return {"final_prompt": "Error"}
+    return await agent_reply("painter", {"topic": request.topic, "style": request.style}, "final_prompt", "Error")
+
+@app.post("/generate/stream")
+def stream_work(request: WorkRequest):
+    if not llm: raise HTTPException(500, "AI 로드 실패")
+    return sse_response("painter", {"topic": request.topic, "style": request.style}, "final_prompt")
 
 # 3. 비평가
 @app.post("/review")
-def create_review(request: ReviewRequest):
+async def create_review(request: ReviewRequest):
     if not llm: raise HTTPException(500, "AI 로드 실패")
-    try:
-        safe_info = request.art_info if request.art_info else "작품 정보 없음"
-        chain = PromptTemplate.from_template(
-            f"{PERSONA_CRITIC}\n{FORMAT_INSTRUCTION}\n"
-            "대상 작품: '{art_info}'. \n"
-            "전문가의 시선으로 이 작품을 냉철하게 분석하고 평가하시오."
-        ) | llm
-        return {"review_text": parse_response(chain.invoke({"art_info": safe_info}).content)}
-    except Exception:
-        return {"review_text": "비평 실패"}
+    safe_info = request.art_info if request.art_info else "작품 정보 없음"
+    return await agent_reply("critic", {"art_info": safe_info}, "review_text", "비평 실패")
+
+@app.post("/review/stream")
+def stream_review(request: ReviewRequest):
+    if not llm: raise HTTPException(500, "AI 로드 실패")
+    safe_info = request.art_info if request.art_info else "작품 정보 없음"
+    return sse_response("critic", {"art_info": safe_info}, "review_text")
 
 # 4. 마케터
 @app.post("/promote")
-def create_promo(request: PromoRequest):
+async def create_promo(request: PromoRequest):
     if not llm: raise HTTPException(500, "AI 로드 실패")
-    try:
-        chain = PromptTemplate.from_template(
-            f"{PERSONA_MARKETER}\n{FORMAT_INSTRUCTION}\n"
-            "전시 제목: '{title}'. 타겟: '{target}'. \n"
-            "이 전시가 SNS에서 바이럴 될 수 있도록 매력적인 홍보 문구를 작성해줘."
-        ) | llm
-        return {"promo_text": parse_response(chain.invoke({"title": request.exhibition_title, "target": request.target_audience}).content)}
-    except Exception:
-        return {"promo_text": "마케팅 실패"}
+    inputs = {"title": request.exhibition_title, "target": request.target_audience}
+    return await agent_reply("marketer", inputs, "promo_text", "마케팅 실패")
+
+@app.post("/promote/stream")
+def stream_promo(request: PromoRequest):
+    if not llm: raise HTTPException(500, "AI 로드 실패")
+    return sse_response("marketer", {"title": request.exhibition_title, "target": request.target_audience}, "promo_text")
 
 # 5. 경매사
 @app.post("/auction")
-def open_auction(request: AuctionRequest):
+async def open_auction(request: AuctionRequest):
     if not llm: raise HTTPException(500, "AI 로드 실패")
-    try:
-        safe_info = request.art_info if request.art_info else "미상 작품"
-        safe_review = request.critic_review if request.critic_review else "평가 없음"
-        chain = PromptTemplate.from_template(
-            f"{PERSONA_AUCTIONEER}\n{FORMAT_INSTRUCTION}\n"
-            "작품 정보: {art_info}, 비평 내용: {critic_review}. \n"
-            "이 정보를 바탕으로 경매 리포트(시작가, 가치 평가, 오프닝 멘트)를 작성하시오."
-        ) | llm
-        return {"auction_report": parse_response(chain.invoke({"art_info": safe_info, "critic_review": safe_review}).content)}
-    except Exception:
-        return {"auction_report": "경매 실패"}
+    safe_info = request.art_info if request.art_info else "미상 작품"
+    safe_review = await condense_review(request.critic_review) if request.critic_review else "평가 없음"
+    inputs = {"art_info": safe_info, "critic_review": safe_review}
+    return await agent_reply("auctioneer", inputs, "auction_report", "경매 실패")
+
+@app.post("/auction/stream")
+async def stream_auction(request: AuctionRequest):
+    if not llm: raise HTTPException(500, "AI 로드 실패")
+    safe_info = request.art_info if request.art_info else "미상 작품"
+    safe_review = await condense_review(request.critic_review) if request.critic_review else "평가 없음"
+    return sse_response("auctioneer", {"art_info": safe_info, "critic_review": safe_review}, "auction_report")
 
 # 6. 도슨트
 @app.post("/docent")
-def start_tour(request: DocentRequest):
+async def start_tour(request: DocentRequest):
     if not llm: raise HTTPException(500, "AI 로드 실패")
-    try:
-        chain = PromptTemplate.from_template(
-            f"{PERSONA_DOCENT}\n{FORMAT_INSTRUCTION}\n"
-            "작품 정보: {art_info}. \n"
-            "관람객({aud})이 흥미를 느낄 수 있도록 재미있는 해설 대본을 작성해줘."
-        ) | llm
-        return {"commentary": parse_response(chain.invoke({"art_info": request.art_info, "aud": request.audience_type}).content)}
-    except Exception:
-        return {"commentary": "해설 실패"}
\ No newline at end of file
+    inputs = {"art_info": request.art_info, "aud": request.audience_type}
+    return await agent_reply("docent", inputs, "commentary", "해설 실패")
+
+@app.post("/docent/stream")
+def stream_tour(request: DocentRequest):
+    if not llm: raise HTTPException(500, "AI 로드 실패")
+    return sse_response("docent", {"art_info": request.art_info, "aud": request.audience_type}, "commentary")
+
+# 7. 큐레이터 채팅 (대화 기록 기반)
+#   응답의 summary / folded 는 다음 요청의 summary / history 를 만들 때 쓴다
+#   (folded: 보낸 history 중 앞에서부터 요약에 접힌 턴 수)
+@app.post("/chat")
+async def chat(request: ChatRequest):
+    if not llm: raise HTTPException(500, "AI 로드 실패")
+    summary, recent, folded = await build_chat_context(request.history, request.summary)
+    inputs = {
+        "art_info": request.art_info or "없음", "summary": summary or "없음",
+        "history": format_turns(recent) or "없음", "message": request.message,
+    }
+    reply = await agent_reply("curator", inputs, "reply", "답변을 생성하지 못했습니다.")
+    return {**reply, "summary": summary, "folded": folded}
+
+# ==================================================================
+# 📦 [배치] 여러 입력을 한 번에 (갤러리 전체 도슨트/비평/홍보 문구 등)
+# ==================================================================
+# 페르소나 → (단건 요청 모델, 체인 입력 변환, 결과 키)
+BATCH_PERSONAS = {
+    "planner": (PlanRequest, lambda r: {"intent": r.intent}, "draft_text"),
+    "painter": (WorkRequest, lambda r: {"topic": r.topic, "style": r.style}, "final_prompt"),
+    "critic": (ReviewRequest, lambda r: {"art_info": r.art_info or "작품 정보 없음"}, "review_text"),
+    "marketer": (PromoRequest, lambda r: {"title": r.exhibition_title, "target": r.target_audience}, "promo_text"),
+    "auctioneer": (AuctionRequest, lambda r: {"art_info": r.art_info or "미상 작품", "critic_review": r.critic_review or "평가 없음"}, "auction_report"),
+    "docent": (DocentRequest, lambda r: {"art_info": r.art_info, "aud": r.audience_type}, "commentary"),
+}
+
+@app.post("/batch/{persona}")
+async def run_batch(persona: str, request: BatchRequest):
+    if not llm: raise HTTPException(500, "AI 로드 실패")
+    if persona not in BATCH_PERSONAS:
+        raise HTTPException(404, f"알 수 없는 페르소나: {persona}")
+    if len(request.items) > BATCH_MAX_ITEMS:
+        raise HTTPException(413, f"한 번에 최대 {BATCH_MAX_ITEMS}개까지 요청할 수 있습니다.")
+
+    model, to_inputs, result_key = BATCH_PERSONAS[persona]
+    print(f"📦 [배치] {persona} x {len(request.items)} (동시 {request.max_concurrency})")
+
+    # 결과는 입력 순서 그대로, 실패는 항목별 error로
+    results = [None] * len(request.items)
+    pending = {}  # 같은 입력은 한 번만 생성: 입력 JSON → (inputs, cache_key, [index...])
+    for i, item in enumerate(request.items):
+        try:
+            inputs = prepare_inputs(persona, to_inputs(model(**item)))
+        except ValidationError as e:
+            results[i] = {"index": i, "error": f"입력 형식 오류: {e.errors()[0]['msg']}"}
+            continue
+        dedupe = json.dumps(inputs, ensure_ascii=False, sort_keys=True)
+        if dedupe in pending:
+            pending[dedupe][2].append(i)
+            continue
+        key = _cache_key(persona, inputs)
+        cached = await response_cache.aget(persona, key) if key else None
+        if cached is not None:
+            record_outcome(persona, persona, "cache_hit")
+            results[i] = {"index": i, result_key: cached}
+        else:
+            pending[dedupe] = (inputs, key, [i])
+
+    if pending:
+        jobs = list(pending.values())
+        # 배치 하나는 흐름 제어 슬롯 하나로 취급하고, 내부 동시성은 페르소나 한도를 넘지 않게
+        concurrency = min(request.max_concurrency, flow.persona_limit(persona))
+        # 지연은 배치 전체 한 번으로 (endpoint 라벨은 미들웨어가 넣은 /batch/<persona>), 결과는 아래에서 항목별로
+        async with flow.slot(persona):
+            with LLMCall(persona, persona, count_request=False):
+                outputs = await CHAINS[persona].abatch(
+                    [inputs for inputs, _, _ in jobs],
+                    config={"max_concurrency": concurrency},
+                    return_exceptions=True,
+                )
+        for (_, key, indexes), output in zip(jobs, outputs):
+            record_outcome(persona, persona, "error" if isinstance(output, Exception) else "ok")
+            if isinstance(output, Exception):
+                print(f"🔥 [배치] {persona}{indexes} 실패: {output}")
+                for i in indexes:
+                    results[i] = {"index": i, "error": str(output)}
+                continue
+            record_usage(persona, persona, output)
+            text = parse_response(output.content)
+            if key:
+                await response_cache.aset(persona, key, text)
+            for i in indexes:
+                results[i] = {"index": i, result_key: text}
+
+    failed = sum(1 for r in results if "error" in r)
+    return {"persona": persona, "total": len(results), "failed": failed, "results": results}
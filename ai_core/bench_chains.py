@@ -0,0 +1,55 @@
+"""체인 레지스트리 마이크로 벤치마크
+
+요청마다 `PromptTemplate.from_template(...) | llm`을 새로 만들던 방식과
+시작 시 한 번 컴파일한 CHAINS를 꺼내 쓰는 방식의 요청당 오버헤드를 비교한다.
+네트워크 호출 없이 지연 0의 가짜 모델로 invoke 까지 측정한다.
+
+    python bench_chains.py [반복 횟수]
+"""
+import itertools
+import os
+import sys
+import time
+
+os.environ.setdefault("GOOGLE_API_KEY", "bench-dummy-key")
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+
+import agent
+
+INPUTS = {
+    "planner": {"intent": "사이버펑크 서울"},
+    "critic": {"art_info": "신비로운 사이버펑크 도시의 밤 풍경"},
+    "docent": {"art_info": "신비로운 사이버펑크 도시의 밤 풍경", "aud": "일반 관람객"},
+    "auctioneer": {"art_info": "네온의 밤", "critic_review": "색채가 강렬하다"},
+}
+
+
+def per_call_us(fn, n):
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def main(n=2000):
+    model = GenericFakeChatModel(messages=itertools.repeat(AIMessage(content="ok")))
+    agent.build_chains(model)
+
+    print(f"{'chain':<12} {'rebuild':>10} {'lookup':>10} {'rebuild+invoke':>16} {'lookup+invoke':>15}")
+    for name, inputs in INPUTS.items():
+        template = agent.CHAIN_SPECS[name][1]
+
+        rebuild = per_call_us(lambda: agent.compile_chain(template, model), n)
+        lookup = per_call_us(lambda: agent.CHAINS[name], n)
+        rebuild_invoke = per_call_us(
+            lambda: agent.compile_chain(template, model).invoke(inputs), n // 10
+        )
+        lookup_invoke = per_call_us(lambda: agent.CHAINS[name].invoke(inputs), n // 10)
+
+        print(f"{name:<12} {rebuild:>8.1f}us {lookup:>8.2f}us {rebuild_invoke:>14.1f}us {lookup_invoke:>13.1f}us")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
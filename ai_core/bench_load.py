@@ -0,0 +1,152 @@
+"""ai_core 부하 테스트 벤치마크
+
+모든 엔드포인트(/full-course, 스트리밍, 배치 포함)를 지정한 동시성 단계로 호출하고
+처리량(req/s)과 p50/p95/p99 지연을 출력한다. 스트리밍 엔드포인트는 첫 바이트까지의
+시간(TTFB)도 함께 측정한다.
+
+기본은 같은 프로세스에 uvicorn을 127.0.0.1로 띄우고 가짜 모델(AI_LLM_PROVIDER=fake)로
+실행하므로 Gemini 쿼터와 외부 네트워크가 필요 없다. --url 을 주면 떠 있는 서버를 대상으로 한다.
+
+    python bench_load.py                                  # 기본 단계 1,8,32
+    python bench_load.py -c 1 16 64 -n 200 -e review full-course
+    AI_FAKE_LATENCY_MS=800 AI_FAKE_FAILURE_RATE=0.05 python bench_load.py
+    python bench_load.py --url http://localhost:8002
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import threading
+import time
+
+import httpx
+
+# 엔드포인트 → (경로, 요청 본문 생성 함수). i로 입력을 바꿔 캐시 적중을 피한다.
+ENDPOINTS = {
+    "propose": ("/propose", lambda i: {"intent": f"사이버펑크 서울 {i}"}),
+    "generate": ("/generate", lambda i: {"topic": f"네온의 밤 {i}", "style": "Digital Art"}),
+    "review": ("/review", lambda i: {"art_info": f"신비로운 사이버펑크 도시의 밤 풍경 {i}"}),
+    "promote": ("/promote", lambda i: {"exhibition_title": f"디지털 르네상스 {i}", "target_audience": "MZ세대"}),
+    "auction": ("/auction", lambda i: {"art_info": f"네온의 밤 {i}", "critic_review": "색채가 강렬하다"}),
+    "docent": ("/docent", lambda i: {"art_info": f"사이버펑크 서울 {i}", "audience_type": "일반 관람객"}),
+    "full-course": ("/full-course", lambda i: {"topic": f"도시의 기억 {i}", "style": "Digital Art"}),
+    "review-stream": ("/review/stream", lambda i: {"art_info": f"스트리밍 작품 {i}"}),
+    "docent-stream": ("/docent/stream", lambda i: {"art_info": f"스트리밍 해설 {i}"}),
+    "batch-docent": ("/batch/docent", lambda i: {"items": [{"art_info": f"배치 {i}-{k}"} for k in range(10)]}),
+}
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = min(len(ordered) - 1, max(0, round(p / 100 * (len(ordered) - 1))))
+    return ordered[k]
+
+
+# 단건 엔드포인트는 실패해도 200 + 대체 문구를 돌려주므로 문구로 판별
+FALLBACK_TEXTS = {"AI 에러", "Error", "비평 실패", "마케팅 실패", "경매 실패", "해설 실패"}
+
+
+def is_error(path, status, body):
+    if status != 200:
+        return True
+    if path.endswith("/stream"):
+        return "event: error" in body
+    data = json.loads(body)
+    if "errors" in data or data.get("failed"):
+        return True
+    return any(v in FALLBACK_TEXTS for v in data.values() if isinstance(v, str))
+
+
+def start_local_server():
+    import uvicorn
+    import agent
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(agent.app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, f"http://127.0.0.1:{port}"
+
+
+async def one_request(client, path, payload):
+    start = time.perf_counter()
+    ttfb = None
+    if path.endswith("/stream"):
+        chunks = []
+        async with client.stream("POST", path, json=payload) as resp:
+            async for chunk in resp.aiter_text():
+                if ttfb is None:
+                    ttfb = time.perf_counter() - start
+                chunks.append(chunk)
+            status, body = resp.status_code, "".join(chunks)
+    else:
+        resp = await client.post(path, json=payload)
+        status, body = resp.status_code, resp.text
+    return time.perf_counter() - start, ttfb, is_error(path, status, body)
+
+
+async def run_level(client, name, concurrency, total):
+    path, make_payload = ENDPOINTS[name]
+    latencies, ttfbs, errors = [], [], 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            try:
+                elapsed, ttfb, failed = await one_request(client, path, make_payload(f"{concurrency}-{i}"))
+            except Exception:
+                elapsed, ttfb, failed = 0.0, None, True
+            if failed:
+                errors += 1
+            else:
+                latencies.append(elapsed)
+                if ttfb is not None:
+                    ttfbs.append(ttfb)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - start
+
+    ms = lambda v: f"{v * 1000:8.0f}"
+    ttfb_col = ms(percentile(ttfbs, 50)) if ttfbs else "       -"
+    print(
+        f"{name:<14} {concurrency:>5} {total:>6} {errors:>5} {total / wall:>8.1f}"
+        f" {ms(percentile(latencies, 50))} {ms(percentile(latencies, 95))} {ms(percentile(latencies, 99))} {ttfb_col}"
+    )
+
+
+async def main(args):
+    server, base_url = None, args.url
+    if not base_url:
+        # 가짜 모델 + 캐시 끔 (매 요청이 실제 생성 경로를 타도록)
+        os.environ.setdefault("AI_LLM_PROVIDER", "fake")
+        os.environ.setdefault("AI_CACHE_MAX_ENTRIES", "0")
+        server, base_url = start_local_server()
+
+    limits = httpx.Limits(max_connections=max(args.concurrency) * 2)
+    try:
+        async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+            print(f"{'endpoint':<14} {'conc':>5} {'reqs':>6} {'errs':>5} {'req/s':>8} {'p50ms':>8} {'p95ms':>8} {'p99ms':>8} {'ttfb50':>8}")
+            for name in args.endpoints:
+                for concurrency in args.concurrency:
+                    await run_level(client, name, concurrency, max(args.requests, concurrency))
+    finally:
+        if server:
+            server.should_exit = True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ai_core 부하 테스트")
+    parser.add_argument("-c", "--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("-n", "--requests", type=int, default=64, help="동시성 단계별 요청 수")
+    parser.add_argument("-e", "--endpoints", nargs="+", default=list(ENDPOINTS), choices=list(ENDPOINTS))
+    parser.add_argument("--url", help="대상 서버 주소 (생략 시 프로세스 내부 + 가짜 모델)")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    asyncio.run(main(parser.parse_args()))
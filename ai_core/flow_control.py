@@ -0,0 +1,146 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+
+# ==================================================================
+# 🚦 요청 흐름 제어: Single-flight 합치기 + 동시 실행 제한
+# ==================================================================
+# - SingleFlight: 같은 키로 동시에 들어온 요청은 진행 중인 생성 하나를 함께 기다림
+# - ConcurrencyLimiter: 동시 실행 수 제한 + 대기열 길이 제한
+#     대기열이 가득 차면 즉시 429, 대기 시간이 지나면 503 (Overloaded)
+
+
+class Overloaded(Exception):
+    def __init__(self, status_code, detail, retry_after=1):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class SingleFlight:
+    def __init__(self):
+        self._inflight = {}
+        self.leaders = 0
+        self.shared = 0
+
+    def is_inflight(self, key):
+        return key in self._inflight
+
+    async def do(self, key, factory):
+        task = self._inflight.get(key)
+        if task is None:
+            self.leaders += 1
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.shared += 1
+        # 기다리던 클라이언트 하나가 끊겨도 나머지를 위해 생성은 계속
+        return await asyncio.shield(task)
+
+    def stats(self):
+        return {"inflight": len(self._inflight), "leaders": self.leaders, "shared": self.shared}
+
+
+class ConcurrencyLimiter:
+    def __init__(self, name, limit, max_waiting, wait_timeout):
+        self.name = name
+        self.limit = limit
+        self.max_waiting = max_waiting
+        self.wait_timeout = wait_timeout
+        self._sem = asyncio.Semaphore(limit)
+        self.active = 0
+        self.waiting = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    @asynccontextmanager
+    async def slot(self):
+        # 실행 중 + 대기 중이 한도 + 대기열 길이를 넘으면 기다리지 않고 바로 거절
+        if self.active + self.waiting >= self.limit + self.max_waiting:
+            self.rejected += 1
+            raise Overloaded(429, f"{self.name}: 대기열이 가득 찼습니다.")
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._sem.acquire(), self.wait_timeout)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise Overloaded(503, f"{self.name}: 대기 시간({self.wait_timeout:g}s)을 초과했습니다.")
+        finally:
+            self.waiting -= 1
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._sem.release()
+
+    def stats(self):
+        return {
+            "limit": self.limit,
+            "active": self.active,
+            "waiting": self.waiting,
+            "max_waiting": self.max_waiting,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+        }
+
+
+class FlowControl:
+    """전역 제한 + 페르소나별 제한. 페르소나 슬롯을 먼저 잡고 전역 슬롯을 잡는다.
+
+    (페르소나 한도에 막혀 기다리는 요청이 전역 슬롯을 붙잡고 있지 않도록)
+    """
+
+    def __init__(self, global_limit, persona_limits, default_persona_limit, max_waiting, wait_timeout):
+        self.max_waiting = max_waiting
+        self.wait_timeout = wait_timeout
+        self.default_persona_limit = default_persona_limit
+        self.persona_limits = dict(persona_limits)
+        self.global_limiter = ConcurrencyLimiter("global", global_limit, max_waiting, wait_timeout)
+        self.persona_limiters = {}
+        self.single_flight = SingleFlight()
+
+    def persona_limit(self, persona):
+        return self.persona_limits.get(persona, self.default_persona_limit)
+
+    def _persona_limiter(self, persona):
+        limiter = self.persona_limiters.get(persona)
+        if limiter is None:
+            limiter = ConcurrencyLimiter(persona, self.persona_limit(persona), self.max_waiting, self.wait_timeout)
+            self.persona_limiters[persona] = limiter
+        return limiter
+
+    @asynccontextmanager
+    async def slot(self, persona):
+        async with self._persona_limiter(persona).slot():
+            async with self.global_limiter.slot():
+                yield
+
+    def stats(self):
+        return {
+            "global": self.global_limiter.stats(),
+            "personas": {p: l.stats() for p, l in self.persona_limiters.items()},
+            "single_flight": self.single_flight.stats(),
+        }
+
+
+def parse_limits(raw):
+    # "critic=4,docent=8" → {"critic": 4, "docent": 8}
+    limits = {}
+    for part in raw.split(","):
+        if "=" in part:
+            name, value = part.split("=", 1)
+            limits[name.strip()] = int(value)
+    return limits
+
+
+def flow_control_from_env():
+    return FlowControl(
+        global_limit=int(os.getenv("AI_MAX_CONCURRENCY", "16")),
+        persona_limits=parse_limits(os.getenv("AI_PERSONA_CONCURRENCY", "")),
+        default_persona_limit=int(os.getenv("AI_PERSONA_DEFAULT_CONCURRENCY", "8")),
+        max_waiting=int(os.getenv("AI_MAX_QUEUE", "64")),
+        wait_timeout=float(os.getenv("AI_QUEUE_TIMEOUT", "10")),
+    )
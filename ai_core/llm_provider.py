@@ -0,0 +1,214 @@
+import asyncio
+import hashlib
+import os
+import random
+import threading
+import time
+from typing import Any, Iterator, AsyncIterator, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+# ==================================================================
+# 🔌 LLM 공급자 선택 (AI_LLM_PROVIDER)
+# ==================================================================
+#   gemini (기본) : Google Gemini (GOOGLE_API_KEY 필요)
+#   fake          : 네트워크 없이 동작하는 결정적 가짜 모델 (부하 테스트/CI용)
+#
+# fake 설정
+#   AI_FAKE_LATENCY_MS      첫 토큰까지 지연의 중앙값 (기본 300)
+#   AI_FAKE_LATENCY_DIST    fixed | uniform | lognormal (기본 lognormal)
+#   AI_FAKE_LATENCY_SIGMA   lognormal 분산 / uniform 이면 ±비율 (기본 0.5)
+#   AI_FAKE_TOKENS_PER_SEC  토큰 생성 속도, 0이면 즉시 (기본 50)
+#   AI_FAKE_OUTPUT_TOKENS   응답 길이(토큰) (기본 120)
+#   AI_FAKE_FAILURE_RATE    0~1, 이 확률로 예외 발생 (기본 0)
+#   AI_FAKE_FAILURE_KIND    quota (429 쿼터 초과 흉내, 기본) | error (일반 오류)
+#   AI_FAKE_SEED            지연/실패 난수 시드 (기본 42)
+
+FAKE_WORDS = [
+    "빛", "색채", "구도", "질감", "네온", "도시", "밤", "기억", "여백", "리듬",
+    "대비", "서사", "감정", "시간", "흔적", "light", "texture", "neon", "dream", "canvas",
+]
+
+
+class FakePersonaLLM(BaseChatModel):
+    """프롬프트 해시로 응답을 만드는 결정적 가짜 채팅 모델.
+
+    같은 프롬프트에는 항상 같은 텍스트를 돌려주고, 지연/실패는 시드 고정 난수로
+    재현 가능하게 흉내 낸다. 스트리밍은 tokens_per_sec 속도로 토큰을 흘려보낸다.
+    """
+
+    model: str = "fake-persona"
+    temperature: float = 0.0
+    latency_ms: float = 300.0
+    latency_dist: str = "lognormal"
+    latency_sigma: float = 0.5
+    tokens_per_sec: float = 50.0
+    output_tokens: int = 120
+    failure_rate: float = 0.0
+    failure_kind: str = "quota"
+    max_output_tokens: Optional[int] = None
+    seed: int = 42
+
+    _rng: Any = None
+    _rng_lock: Any = None
+
+    def model_post_init(self, __context):
+        self._rng = random.Random(self.seed)
+        self._rng_lock = threading.Lock()
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-persona"
+
+    # --- 재현 가능한 난수 ---
+    def _sample_latency(self) -> float:
+        base = self.latency_ms / 1000.0
+        with self._rng_lock:
+            if self.latency_dist == "fixed":
+                return base
+            if self.latency_dist == "uniform":
+                return max(0.0, self._rng.uniform(base * (1 - self.latency_sigma), base * (1 + self.latency_sigma)))
+            return self._rng.lognormvariate(0.0, self.latency_sigma) * base
+
+    def _should_fail(self) -> bool:
+        if self.failure_rate <= 0:
+            return False
+        with self._rng_lock:
+            return self._rng.random() < self.failure_rate
+
+    # --- 응답 본문 ---
+    def _prompt_text(self, messages: List[BaseMessage]) -> str:
+        return "\n".join(str(m.content) for m in messages)
+
+    def _tokens(self, prompt: str) -> List[str]:
+        digest = hashlib.sha256(prompt.encode("utf-8")).digest()
+        count = self.output_tokens
+        if self.max_output_tokens:
+            count = min(count, self.max_output_tokens)
+        words = [FAKE_WORDS[digest[i % len(digest)] % len(FAKE_WORDS)] for i in range(count)]
+        return [w if i == 0 else " " + w for i, w in enumerate(words)]
+
+    def _usage(self, prompt: str, tokens: List[str]) -> dict:
+        # 대략적인 토큰 수 (공백 기준)
+        input_tokens = len(prompt.split())
+        return {
+            "input_tokens": input_tokens,
+            "output_tokens": len(tokens),
+            "total_tokens": input_tokens + len(tokens),
+        }
+
+    def _generation_time(self, tokens: List[str]) -> float:
+        return len(tokens) / self.tokens_per_sec if self.tokens_per_sec > 0 else 0.0
+
+    def _fail(self):
+        if self.failure_kind == "quota":
+            raise RuntimeError(f"429 RESOURCE_EXHAUSTED: {self.model} quota exceeded (fake)")
+        raise RuntimeError(f"{self.model}: injected failure (fake)")
+
+    # --- 동기 ---
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        prompt = self._prompt_text(messages)
+        tokens = self._tokens(prompt)
+        time.sleep(self._sample_latency() + self._generation_time(tokens))
+        if self._should_fail():
+            self._fail()
+        message = AIMessage(content="".join(tokens), usage_metadata=self._usage(prompt, tokens))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        prompt = self._prompt_text(messages)
+        tokens = self._tokens(prompt)
+        time.sleep(self._sample_latency())
+        if self._should_fail():
+            self._fail()
+        delay = 1 / self.tokens_per_sec if self.tokens_per_sec > 0 else 0
+        for i, token in enumerate(tokens):
+            if delay:
+                time.sleep(delay)
+            usage = self._usage(prompt, tokens) if i == len(tokens) - 1 else None
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token, usage_metadata=usage))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+    # --- 비동기 (이벤트 루프를 막지 않음) ---
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        prompt = self._prompt_text(messages)
+        tokens = self._tokens(prompt)
+        await asyncio.sleep(self._sample_latency() + self._generation_time(tokens))
+        if self._should_fail():
+            self._fail()
+        message = AIMessage(content="".join(tokens), usage_metadata=self._usage(prompt, tokens))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs) -> AsyncIterator[ChatGenerationChunk]:
+        prompt = self._prompt_text(messages)
+        tokens = self._tokens(prompt)
+        await asyncio.sleep(self._sample_latency())
+        if self._should_fail():
+            self._fail()
+        delay = 1 / self.tokens_per_sec if self.tokens_per_sec > 0 else 0
+        for i, token in enumerate(tokens):
+            if delay:
+                await asyncio.sleep(delay)
+            usage = self._usage(prompt, tokens) if i == len(tokens) - 1 else None
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token, usage_metadata=usage))
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+
+def fake_llm_from_env(**overrides):
+    settings = dict(
+        latency_ms=float(os.getenv("AI_FAKE_LATENCY_MS", "300")),
+        latency_dist=os.getenv("AI_FAKE_LATENCY_DIST", "lognormal"),
+        latency_sigma=float(os.getenv("AI_FAKE_LATENCY_SIGMA", "0.5")),
+        tokens_per_sec=float(os.getenv("AI_FAKE_TOKENS_PER_SEC", "50")),
+        output_tokens=int(os.getenv("AI_FAKE_OUTPUT_TOKENS", "120")),
+        failure_rate=float(os.getenv("AI_FAKE_FAILURE_RATE", "0")),
+        failure_kind=os.getenv("AI_FAKE_FAILURE_KIND", "quota"),
+        seed=int(os.getenv("AI_FAKE_SEED", "42")),
+    )
+    settings.update(overrides)
+    return FakePersonaLLM(**settings)
+
+
+def gemini_llm(model="models/gemini-flash-latest", temperature=0.8, api_key=None, **kwargs):
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    return ChatGoogleGenerativeAI(
+        model=model,
+        google_api_key=api_key or os.getenv("GOOGLE_API_KEY"),
+        temperature=temperature,
+        **kwargs,
+    )
+
+
+def create_llm(provider: Optional[str] = None):
+    provider = (provider or os.getenv("AI_LLM_PROVIDER", "gemini")).lower()
+    if provider == "fake":
+        return fake_llm_from_env()
+    if provider == "gemini":
+        return gemini_llm()
+    raise ValueError(f"알 수 없는 AI_LLM_PROVIDER: {provider}")
+
+
+def create_model(provider, model, max_output_tokens=None, **params):
+    """모델 라우터용: 공급자/모델명/설정으로 채팅 모델 인스턴스를 만든다.
+
+    params 는 문자열일 수 있다 (설정 문자열에서 파싱). api_key_env 는 gemini 키를
+    읽을 환경 변수 이름 (예비 키 사용 시).
+    """
+    if provider == "fake":
+        # 문자열 값("1", "0.5")은 pydantic 이 필드 타입으로 변환
+        return fake_llm_from_env(model=model, max_output_tokens=max_output_tokens, **params)
+    if provider == "gemini":
+        api_key_env = params.pop("api_key_env", None)
+        api_key = os.getenv(api_key_env) if api_key_env else None
+        temperature = float(params.pop("temperature", 0.8))
+        if max_output_tokens:
+            params["max_output_tokens"] = max_output_tokens
+        return gemini_llm(model=model, temperature=temperature, api_key=api_key, **params)
+    raise ValueError(f"알 수 없는 공급자: {provider}")
@@ -0,0 +1,251 @@
+import math
+import threading
+import time
+from contextvars import ContextVar
+
+# ==================================================================
+# 📊 페르소나별 지연/토큰 지표 (Prometheus text format)
+# ==================================================================
+# 외부 라이브러리 없이 Counter/Histogram 만 구현한다. GET /metrics 로 노출.
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, math.inf)
+TOKEN_BUCKETS = (16, 64, 128, 256, 512, 1024, 2048, 4096, 8192, math.inf)
+
+# 지금 처리 중인 HTTP 엔드포인트 (미들웨어가 설정, 하위 태스크로 전파됨)
+current_endpoint = ContextVar("current_endpoint", default="-")
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_text(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _number(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_label_text(self.labelnames, key)} {_number(value)}"
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._values = {}  # labels -> [버킷별 개수..., 합계, 개수]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def samples(self):
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._values.items())
+        for key, state in items:
+            for i, bound in enumerate(self.buckets):
+                labels = _label_text(self.labelnames, key, ("le", _number(bound)))
+                yield f"{self.name}_bucket{labels} {state[i]}"
+            labels = _label_text(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_number(state[-2])}"
+            yield f"{self.name}_count{labels} {state[-1]}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name, help_text, labelnames=()):
+        metric = Counter(name, help_text, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        metric = Histogram(name, help_text, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+LLM_LABELS = ("persona", "chain", "endpoint")
+
+LLM_REQUESTS = REGISTRY.counter(
+    "ai_llm_requests_total",
+    "Persona chain calls by outcome (ok, error, cache_hit, coalesced, rejected).",
+    LLM_LABELS + ("outcome",),
+)
+LLM_DURATION = REGISTRY.histogram(
+    "ai_llm_request_duration_seconds",
+    "Wall time of a persona chain generation.",
+    LLM_LABELS + ("status",),
+)
+LLM_TTFT = REGISTRY.histogram(
+    "ai_llm_time_to_first_token_seconds",
+    "Time from chain start to the first streamed token.",
+    LLM_LABELS,
+)
+LLM_TOKENS = REGISTRY.counter(
+    "ai_llm_tokens_total",
+    "Prompt/completion tokens reported by the model usage metadata.",
+    LLM_LABELS + ("type",),
+)
+LLM_PROMPT_TOKENS = REGISTRY.histogram(
+    "ai_llm_prompt_tokens",
+    "Prompt tokens per generation.",
+    LLM_LABELS,
+    TOKEN_BUCKETS,
+)
+LLM_COMPLETION_TOKENS = REGISTRY.histogram(
+    "ai_llm_completion_tokens",
+    "Completion tokens per generation.",
+    LLM_LABELS,
+    TOKEN_BUCKETS,
+)
+HTTP_DURATION = REGISTRY.histogram(
+    "ai_http_request_duration_seconds",
+    "HTTP request wall time by route.",
+    ("method", "route", "status"),
+)
+
+
+def llm_labels(persona, chain):
+    return {"persona": persona, "chain": chain, "endpoint": current_endpoint.get()}
+
+
+def record_outcome(persona, chain, outcome):
+    LLM_REQUESTS.inc(outcome=outcome, **llm_labels(persona, chain))
+
+
+def record_usage(persona, chain, message):
+    usage = getattr(message, "usage_metadata", None) or {}
+    labels = llm_labels(persona, chain)
+    prompt = usage.get("input_tokens")
+    completion = usage.get("output_tokens")
+    if prompt is not None:
+        LLM_TOKENS.inc(prompt, type="prompt", **labels)
+        LLM_PROMPT_TOKENS.observe(prompt, **labels)
+    if completion is not None:
+        LLM_TOKENS.inc(completion, type="completion", **labels)
+        LLM_COMPLETION_TOKENS.observe(completion, **labels)
+
+
+class LLMCall:
+    """체인 호출 하나의 지연/첫 토큰/토큰 수/결과를 기록한다.
+
+        with LLMCall(persona, chain) as call:
+            async for chunk in ...:
+                call.first_token()
+            call.finish(message)
+
+    count_request=False 면 지연만 기록 (배치처럼 항목별 결과를 따로 record_outcome 하는 경우).
+    """
+
+    def __init__(self, persona, chain, count_request=True):
+        self.persona = persona
+        self.chain = chain
+        self.count_request = count_request
+        self.labels = llm_labels(persona, chain)
+        self.started = None
+        self.ttft = None
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def first_token(self):
+        if self.ttft is None:
+            self.ttft = time.perf_counter() - self.started
+            LLM_TTFT.observe(self.ttft, **self.labels)
+
+    def finish(self, message):
+        record_usage(self.persona, self.chain, message)
+
+    def __exit__(self, exc_type, exc, tb):
+        status = "ok" if exc_type is None else "error"
+        LLM_DURATION.observe(time.perf_counter() - self.started, status=status, **self.labels)
+        if self.count_request:
+            LLM_REQUESTS.inc(outcome=status, **self.labels)
+        return False
+
+
+class MetricsMiddleware:
+    """HTTP 지연을 라우트별로 기록하고, 하위 호출에 current_endpoint를 전달한다.
+
+    스트리밍 응답도 본문 전송이 끝날 때까지를 잰다 (순수 ASGI 미들웨어).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        token = current_endpoint.set(scope["path"])
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = getattr(scope.get("route"), "path", "unmatched")
+            HTTP_DURATION.observe(
+                time.perf_counter() - started,
+                method=scope["method"], route=route, status=str(status["code"]),
+            )
+            current_endpoint.reset(token)
@@ -0,0 +1,348 @@
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List
+from urllib.parse import parse_qsl
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from llm_provider import create_model
+from metrics import REGISTRY
+
+# ==================================================================
+# 🧭 모델 라우터: 페르소나 → 모델 등급(tier) + 예비 모델 자동 전환
+# ==================================================================
+# 모델 지정 문자열: "공급자:모델명?설정=값&..." 를 쉼표로 나열 (앞에서부터 우선순위)
+#   gemini:models/gemini-flash-latest?temperature=0.8&api_key_env=GOOGLE_API_KEY_FALLBACK
+#   fake:fake-fast?latency_ms=100&failure_rate=0.2
+#
+# 환경 변수
+#   AI_TIER_FAST / AI_TIER_STANDARD   등급별 모델 목록 (기본값은 아래 DEFAULT_TIERS)
+#   AI_PERSONA_TIERS                  "painter=fast,critic=standard"
+#   AI_PERSONA_MAX_TOKENS             "painter=300,critic=2048"
+#   AI_MODEL_TIMEOUT                  모델 호출(스트리밍은 첫 토큰) 타임아웃, 초 (기본 30)
+#   AI_BREAKER_FAILURES               연속 실패 몇 번이면 차단할지 (기본 5)
+#   AI_BREAKER_RESET                  차단 후 재시도까지 대기, 초 (기본 30)
+
+DEFAULT_TIERS = {
+    "gemini": {
+        "fast": "gemini:models/gemini-flash-lite-latest?temperature=0.8,"
+                "gemini:models/gemini-flash-latest?temperature=0.8&api_key_env=GOOGLE_API_KEY_FALLBACK",
+        "standard": "gemini:models/gemini-flash-latest?temperature=0.8,"
+                    "gemini:models/gemini-flash-lite-latest?temperature=0.8&api_key_env=GOOGLE_API_KEY_FALLBACK",
+    },
+    "fake": {
+        "fast": "fake:fake-fast,fake:fake-backup",
+        "standard": "fake:fake-standard,fake:fake-backup",
+    },
+}
+
+# 짧은 작업(화가의 영어 프롬프트, 마케터 카피)은 가벼운 등급으로
+DEFAULT_PERSONA_TIERS = {
+    "planner": "standard",
+    "painter": "fast",
+    "critic": "standard",
+    "marketer": "fast",
+    "auctioneer": "standard",
+    "docent": "standard",
+    "curator": "standard",
+    "summarizer": "fast",
+}
+
+DEFAULT_PERSONA_MAX_TOKENS = {
+    "planner": 2048,
+    "painter": 400,
+    "critic": 2048,
+    "marketer": 800,
+    "auctioneer": 1200,
+    "docent": 1200,
+    "curator": 1000,
+    "summarizer": 600,
+}
+
+MODEL_CALLS = REGISTRY.counter(
+    "ai_model_calls_total",
+    "Calls per concrete model by outcome (ok, fallback, error, skipped_open).",
+    ("model", "outcome"),
+)
+
+
+# 동기 호출(invoke)에 타임아웃을 걸기 위한 스레드 풀.
+# future.result(timeout=...) 가 시간을 넘겨도 이미 실행 중인 invoke 는 멈추지 않는다: 결과만 버리고
+# 다음 모델로 넘어가며, 워커 스레드는 모델 호출이 끝날 때까지 풀의 자리를 차지한다.
+# 느린 모델이 계속 붙잡고 있으면 풀이 가득 차서 이후 동기 호출은 대기열에서 타임아웃될 수 있다.
+_SYNC_CALLS = ThreadPoolExecutor(max_workers=32, thread_name_prefix="model-sync")
+
+
+class AllModelsUnavailable(RuntimeError):
+    pass
+
+
+def is_fallback_error(exc):
+    """예비 모델로 넘어갈 만한 오류인지: 타임아웃 / 쿼터·레이트 리밋."""
+    if isinstance(exc, (asyncio.TimeoutError, TimeoutError)):
+        return True
+    text = f"{type(exc).__name__} {exc}".lower()
+    return any(sign in text for sign in ("429", "resource_exhausted", "resourceexhausted", "quota", "rate limit", "ratelimit", "deadline", "timeout"))
+
+
+class ModelBreaker:
+    """모델 하나의 사용 가능 여부 (페르소나끼리 공유).
+
+    타임아웃/쿼터 오류가 failure_threshold 번 이어지면 그 모델은 reset_timeout 초 동안 후보에서 빠진다.
+    쉬는 시간이 끝나면 요청 하나만 먼저 보내 보고, 성공하면 다시 후보로, 실패하면 또 쉰다.
+    시험 요청이 결과 없이 끝나면 (호출 쪽 취소 등) reset_timeout 이 지난 뒤 다른 요청으로 다시 시험한다.
+    여러 스레드(동기 invoke)와 이벤트 루프가 같이 쓰므로 잠금으로 보호한다.
+    """
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.benched_until = None  # 쉬는 중이면 끝나는 시각 (time.monotonic)
+        self.probe_started = None  # 쉬는 시간이 끝난 뒤 시험 요청을 보낸 시각
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.benched_until is None:
+                return True
+            now = time.monotonic()
+            if now < self.benched_until:
+                return False
+            if self.probe_started is not None and now - self.probe_started < self.reset_timeout:
+                return False
+            self.probe_started = now
+            return True
+
+    def success(self):
+        with self._lock:
+            self.failures = 0
+            self.benched_until = None
+            self.probe_started = None
+
+    def failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.probe_started is not None or self.failures >= self.failure_threshold:
+                if self.benched_until is None:
+                    print(f"🚧 [라우터] {self.name} {self.reset_timeout:g}초 제외 ({self.failures}회 연속 실패)")
+                self.benched_until = time.monotonic() + self.reset_timeout
+            self.probe_started = None
+
+    def stats(self):
+        with self._lock:
+            if self.benched_until is None:
+                state = "closed"
+            elif self.probe_started is not None or time.monotonic() >= self.benched_until:
+                state = "half_open"
+            else:
+                state = "open"
+            return {"state": state, "failures": self.failures}
+
+
+class RoutedChatModel(BaseChatModel):
+    """후보 모델을 우선순위대로 시도하는 채팅 모델.
+
+    타임아웃/쿼터 오류면 다음 후보로 넘어가고, 차단(open)된 모델은 건너뛴다.
+    스트리밍은 첫 토큰을 받기 전까지만 다른 모델로 전환할 수 있고, 버린 스트림은 바로 닫는다.
+    """
+
+    persona: str
+    tier: str
+    max_output_tokens: int
+    timeout: float
+    candidates: List[Any]  # [(모델 이름, 모델, ModelBreaker)]
+
+    @property
+    def _llm_type(self) -> str:
+        return "routed"
+
+    def describe(self):
+        return {
+            "tier": self.tier,
+            "models": [name for name, _, _ in self.candidates],
+            "max_output_tokens": self.max_output_tokens,
+        }
+
+    def _available(self):
+        for name, model, breaker in self.candidates:
+            if breaker.allow():
+                yield name, model, breaker
+            else:
+                MODEL_CALLS.inc(model=name, outcome="skipped_open")
+
+    def _failed(self, name, breaker, exc):
+        if is_fallback_error(exc):
+            breaker.failure()
+            MODEL_CALLS.inc(model=name, outcome="fallback")
+            print(f"🔁 [라우터] {self.persona}: {name} 실패 → 다음 모델 ({exc})")
+            return True
+        # 모델은 응답했지만 요청 자체가 잘못된 경우: 차단 대상 아님
+        breaker.success()
+        MODEL_CALLS.inc(model=name, outcome="error")
+        return False
+
+    def _unavailable(self, last_error):
+        if last_error is not None:
+            return last_error
+        return AllModelsUnavailable(f"{self.persona}: 사용 가능한 모델이 없습니다 (모두 차단됨)")
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        last_error = None
+        for name, model, breaker in self._available():
+            # 비동기 경로와 같은 타임아웃 (concurrent.futures.TimeoutError 는 TimeoutError → 다음 모델로)
+            future = _SYNC_CALLS.submit(contextvars.copy_context().run, model.invoke, messages, stop=stop, **kwargs)
+            try:
+                message = future.result(timeout=self.timeout)
+            except Exception as e:
+                future.cancel()
+                if not self._failed(name, breaker, e):
+                    raise
+                last_error = e
+                continue
+            breaker.success()
+            MODEL_CALLS.inc(model=name, outcome="ok")
+            return ChatResult(generations=[ChatGeneration(message=message)])
+        raise self._unavailable(last_error)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        last_error = None
+        for name, model, breaker in self._available():
+            try:
+                message = await asyncio.wait_for(model.ainvoke(messages, stop=stop, **kwargs), self.timeout)
+            except Exception as e:
+                if not self._failed(name, breaker, e):
+                    raise
+                last_error = e
+                continue
+            breaker.success()
+            MODEL_CALLS.inc(model=name, outcome="ok")
+            return ChatResult(generations=[ChatGeneration(message=message)])
+        raise self._unavailable(last_error)
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        last_error = None
+        for name, model, breaker in self._available():
+            stream = model.astream(messages, stop=stop, **kwargs).__aiter__()
+            try:
+                try:
+                    first = await asyncio.wait_for(stream.__anext__(), self.timeout)
+                except StopAsyncIteration:
+                    breaker.success()
+                    MODEL_CALLS.inc(model=name, outcome="ok")
+                    return
+                except Exception as e:
+                    if not self._failed(name, breaker, e):
+                        raise
+                    last_error = e
+                    continue
+
+                yield ChatGenerationChunk(message=first)
+                try:
+                    async for chunk in stream:
+                        yield ChatGenerationChunk(message=chunk)
+                except Exception as e:
+                    # 이미 토큰을 보낸 뒤라 전환 불가: 차단 집계만 하고 그대로 실패
+                    self._failed(name, breaker, e)
+                    raise
+                breaker.success()
+                MODEL_CALLS.inc(model=name, outcome="ok")
+                return
+            finally:
+                # 전환/실패/소비자 중단 어느 경우든 이 모델의 스트림(업스트림 HTTP 연결)을 닫는다
+                aclose = getattr(stream, "aclose", None)
+                if aclose is not None:
+                    await aclose()
+        raise self._unavailable(last_error)
+
+
+def parse_model_spec(spec):
+    # "gemini:models/x?temperature=0.8" → ("gemini", "models/x", {"temperature": "0.8"})
+    provider, _, rest = spec.strip().partition(":")
+    model, _, query = rest.partition("?")
+    return provider, model, dict(parse_qsl(query))
+
+
+def parse_mapping(raw, cast=str):
+    mapping = {}
+    for part in raw.split(","):
+        if "=" in part:
+            name, value = part.split("=", 1)
+            mapping[name.strip()] = cast(value.strip())
+    return mapping
+
+
+class ModelRouter:
+    def __init__(self, tiers, persona_tiers, persona_max_tokens, timeout=30.0,
+                 breaker_failures=5, breaker_reset=30.0, default_tier="standard"):
+        self.tiers = {tier: [s for s in specs.split(",") if s.strip()] for tier, specs in tiers.items()}
+        self.persona_tiers = dict(persona_tiers)
+        self.persona_max_tokens = dict(persona_max_tokens)
+        self.timeout = timeout
+        self.default_tier = default_tier
+        self.breaker_failures = breaker_failures
+        self.breaker_reset = breaker_reset
+        self.breakers = {}  # 모델 이름 → ModelBreaker (페르소나끼리 공유)
+        self._models = {}  # (모델 지정, max_tokens) → 모델 인스턴스
+        self._routed = {}  # 페르소나 → RoutedChatModel
+
+    def _breaker(self, name):
+        if name not in self.breakers:
+            self.breakers[name] = ModelBreaker(name, self.breaker_failures, self.breaker_reset)
+        return self.breakers[name]
+
+    def _model(self, spec, max_tokens):
+        key = (spec, max_tokens)
+        if key not in self._models:
+            provider, model, params = parse_model_spec(spec)
+            self._models[key] = create_model(provider, model, max_output_tokens=max_tokens, **params)
+        return self._models[key]
+
+    def model_for(self, persona):
+        if persona not in self._routed:
+            tier = self.persona_tiers.get(persona, self.default_tier)
+            if tier not in self.tiers:
+                raise ValueError(f"{persona}: 알 수 없는 모델 등급 {tier}")
+            max_tokens = self.persona_max_tokens.get(persona)
+            candidates = []
+            for spec in self.tiers[tier]:
+                name = spec.split("?")[0]
+                # 같은 모델이라도 API 키가 다르면 별도 차단기
+                params = parse_model_spec(spec)[2]
+                if "api_key_env" in params:
+                    name = f"{name}@{params['api_key_env']}"
+                candidates.append((name, self._model(spec, max_tokens), self._breaker(name)))
+            self._routed[persona] = RoutedChatModel(
+                persona=persona, tier=tier, max_output_tokens=max_tokens or 0,
+                timeout=self.timeout, candidates=candidates,
+            )
+        return self._routed[persona]
+
+    def stats(self):
+        return {
+            "personas": {p: m.describe() for p, m in self._routed.items()},
+            "breakers": {name: b.stats() for name, b in self.breakers.items()},
+        }
+
+
+def router_from_env(provider="gemini"):
+    defaults = DEFAULT_TIERS.get(provider)
+    if defaults is None:
+        raise ValueError(f"알 수 없는 AI_LLM_PROVIDER: {provider}")
+    tiers = {tier: os.getenv(f"AI_TIER_{tier.upper()}", specs) for tier, specs in defaults.items()}
+    persona_tiers = {**DEFAULT_PERSONA_TIERS, **parse_mapping(os.getenv("AI_PERSONA_TIERS", ""))}
+    max_tokens = {**DEFAULT_PERSONA_MAX_TOKENS, **parse_mapping(os.getenv("AI_PERSONA_MAX_TOKENS", ""), int)}
+    return ModelRouter(
+        tiers,
+        persona_tiers,
+        max_tokens,
+        timeout=float(os.getenv("AI_MODEL_TIMEOUT", "30")),
+        breaker_failures=int(os.getenv("AI_BREAKER_FAILURES", "5")),
+        breaker_reset=float(os.getenv("AI_BREAKER_RESET", "30")),
+    )
@@ -0,0 +1,176 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# ==================================================================
+# 💾 페르소나 응답 캐시 (메모리 LRU + TTL, 선택적 SQLite 디스크 계층)
+# ==================================================================
+# 1차: 프로세스 메모리 LRU (가장 오래 안 쓴 항목부터 제거)
+# 2차: AI_CACHE_DB 경로가 있으면 SQLite 파일 (재시작 후에도 유지)
+# 키: 페르소나 + 정규화된 입력 + 모델 설정(모델명, temperature 등)의 해시
+# 에이전트(async 경로)는 aget/aset 을 쓴다: 메모리는 바로, SQLite 파일 I/O 는 스레드에서 (이벤트 루프를 막지 않도록)
+
+
+def normalize_text(value):
+    # 앞뒤 공백 제거 + 연속 공백/줄바꿈을 한 칸으로 ("작품  A" == "작품 A")
+    if isinstance(value, str):
+        return " ".join(value.split())
+    return value
+
+
+def make_cache_key(persona, inputs, model_settings=None):
+    payload = {
+        "persona": persona,
+        "inputs": {k: normalize_text(v) for k, v in sorted(inputs.items())},
+        "model": model_settings or {},
+    }
+    raw = json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, max_entries=1024, ttl=3600.0, db_path=None, disabled_personas=()):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.disabled_personas = set(disabled_personas)
+        self._memory = OrderedDict()  # key -> (만료 시각, 값)
+        self._lock = threading.Lock()
+        self._stats = {}  # persona -> {"hits", "disk_hits", "misses", "stores"}
+
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS response_cache ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    def enabled_for(self, persona):
+        return self.max_entries > 0 and persona not in self.disabled_personas
+
+    def _count(self, persona, field):
+        counters = self._stats.setdefault(
+            persona, {"hits": 0, "disk_hits": 0, "misses": 0, "stores": 0}
+        )
+        counters[field] += 1
+
+    def _get_memory(self, persona, key, now):
+        # self._lock 을 잡은 상태에서 호출
+        entry = self._memory.get(key)
+        if entry and entry[0] > now:
+            self._memory.move_to_end(key)
+            self._count(persona, "hits")
+            return entry[1]
+        if entry:
+            del self._memory[key]
+        return None
+
+    def get(self, persona, key):
+        now = time.time()
+        with self._lock:
+            value = self._get_memory(persona, key, now)
+            if value is not None:
+                return value
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, expires_at FROM response_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row and row[1] > now:
+                    self._put_memory(key, row[0], row[1])
+                    self._count(persona, "disk_hits")
+                    return row[0]
+                if row:
+                    self._db.execute("DELETE FROM response_cache WHERE key = ?", (key,))
+                    self._db.commit()
+
+            self._count(persona, "misses")
+            return None
+
+    def set(self, persona, key, value):
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._put_memory(key, value, expires_at)
+            self._count(persona, "stores")
+            self._put_disk(key, value, expires_at)
+
+    async def aget(self, persona, key):
+        if self._db is None:
+            return self.get(persona, key)
+        with self._lock:
+            value = self._get_memory(persona, key, time.time())
+        if value is not None:
+            return value
+        # 메모리에 없을 때만 디스크 계층 조회를 스레드로 (get 이 메모리를 한 번 더 보는 건 무시할 만함)
+        return await asyncio.to_thread(self.get, persona, key)
+
+    async def aset(self, persona, key, value):
+        if self._db is None:
+            return self.set(persona, key, value)
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._put_memory(key, value, expires_at)
+            self._count(persona, "stores")
+        await asyncio.to_thread(self._write_disk, key, value, expires_at)
+
+    def _write_disk(self, key, value, expires_at):
+        with self._lock:
+            self._put_disk(key, value, expires_at)
+
+    def _put_disk(self, key, value, expires_at):
+        # self._lock 을 잡은 상태에서 호출
+        if self._db is not None:
+            self._db.execute(
+                "INSERT OR REPLACE INTO response_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, expires_at),
+            )
+            self._db.commit()
+
+    def _put_memory(self, key, value, expires_at):
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM response_cache")
+                self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            personas = {p: dict(c) for p, c in self._stats.items()}
+            size = len(self._memory)
+        hits = sum(c["hits"] + c["disk_hits"] for c in personas.values())
+        misses = sum(c["misses"] for c in personas.values())
+        return {
+            "entries": size,
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "disk": self._db is not None,
+            "disabled_personas": sorted(self.disabled_personas),
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+            "personas": personas,
+        }
+
+
+def cache_from_env():
+    # AI_CACHE_MAX_ENTRIES=0 이면 캐시 끔
+    # AI_CACHE_DISABLED_PERSONAS: 매번 다른 결과가 필요한 페르소나 (기본: 화가)
+    disabled = os.getenv("AI_CACHE_DISABLED_PERSONAS", "painter")
+    return ResponseCache(
+        max_entries=int(os.getenv("AI_CACHE_MAX_ENTRIES", "1024")),
+        ttl=float(os.getenv("AI_CACHE_TTL", "3600")),
+        db_path=os.getenv("AI_CACHE_DB") or None,
+        disabled_personas=[p.strip() for p in disabled.split(",") if p.strip()],
+    )
@@ -0,0 +1,65 @@
+import os
+
+# ==================================================================
+# 📏 입력 토큰 예산
+# ==================================================================
+# Gemini 토크나이저를 부르면 네트워크 왕복이 생기므로 글자 수로 추정한다.
+#   ASCII 약 4자/토큰, 한글 등 그 외 문자 약 1.5자/토큰 (보수적으로 크게 잡음)
+#
+#   AI_PROMPT_TOKEN_BUDGET   프롬프트 하나의 최대 입력 토큰 (기본 3000)
+#   AI_REVIEW_TOKEN_BUDGET   다음 페르소나에 넘길 비평문 최대 토큰, 넘으면 요약 (기본 600)
+#   AI_CHAT_HISTORY_TOKEN_BUDGET  채팅에 그대로 넣을 최근 대화 최대 토큰, 넘치는 오래된 대화는 요약 (기본 1200)
+#   AI_CHAT_SUMMARY_TOKEN_BUDGET  채팅 누적 요약 최대 토큰 (기본 400)
+
+PROMPT_TOKEN_BUDGET = int(os.getenv("AI_PROMPT_TOKEN_BUDGET", "3000"))
+REVIEW_TOKEN_BUDGET = int(os.getenv("AI_REVIEW_TOKEN_BUDGET", "600"))
+CHAT_HISTORY_TOKEN_BUDGET = int(os.getenv("AI_CHAT_HISTORY_TOKEN_BUDGET", "1200"))
+CHAT_SUMMARY_TOKEN_BUDGET = int(os.getenv("AI_CHAT_SUMMARY_TOKEN_BUDGET", "400"))
+
+TRUNCATION_MARK = " …(생략)"
+
+
+def estimate_tokens(text):
+    if not text:
+        return 0
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    other_chars = len(text) - ascii_chars
+    return int(ascii_chars / 4 + other_chars / 1.5 + 0.999)
+
+
+def truncate_to_tokens(text, max_tokens):
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    budget = max(0, max_tokens - estimate_tokens(TRUNCATION_MARK))
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if estimate_tokens(text[:mid]) <= budget:
+            low = mid
+        else:
+            high = mid - 1
+    return text[:low] + TRUNCATION_MARK
+
+
+def fit_inputs(inputs, fixed_tokens, budget=PROMPT_TOKEN_BUDGET):
+    """템플릿 고정 부분 + 입력 변수가 예산을 넘으면 가장 긴 입력부터 잘라 맞춘다.
+
+    (맞춘 inputs, 추정 입력 토큰 수, 잘린 변수 이름 목록)을 반환한다.
+    """
+    sizes = {k: estimate_tokens(v) for k, v in inputs.items() if isinstance(v, str)}
+    total = fixed_tokens + sum(sizes.values())
+    if total <= budget:
+        return inputs, total, []
+
+    fitted = dict(inputs)
+    trimmed = []
+    for name in sorted(sizes, key=sizes.get, reverse=True):
+        over = total - budget
+        if over <= 0:
+            break
+        keep = max(0, sizes[name] - over)
+        fitted[name] = truncate_to_tokens(inputs[name], keep)
+        new_size = estimate_tokens(fitted[name])
+        total -= sizes[name] - new_size
+        trimmed.append(name)
+    return fitted, total, trimmed
@@ -0,0 +1,243 @@
+import asyncio
+import os
+import random
+import time
+from contextlib import asynccontextmanager
+
+import httpx
+
+# =========================================================
+# 🔌 AI 에이전트 HTTP 클라이언트 (연결 재사용 + 타임아웃 + 재시도 + 차단기)
+# =========================================================
+# 앱 수명(lifespan) 동안 AsyncClient 하나를 공유해서 keep-alive 연결을 재사용한다.
+#
+# 환경 변수
+#   AI_AGENT_URL               에이전트 주소 (기본 http://art_ai_agent:8002)
+#   AGENT_MAX_CONNECTIONS      연결 풀 최대 연결 수 (기본 50)
+#   AGENT_MAX_KEEPALIVE        유지할 유휴 연결 수 (기본 20)
+#   AGENT_CONNECT_TIMEOUT      연결 타임아웃, 초 (기본 3)
+#   AGENT_RETRIES              재시도 횟수 (기본 2)
+#   AGENT_RETRY_BACKOFF        재시도 대기 기준값, 초 (기본 0.2, 지수 증가 + 지터)
+#   AGENT_BREAKER_FAILURES     연속 실패 몇 번이면 차단할지 (기본 5)
+#   AGENT_BREAKER_RESET        차단 후 재시도까지 대기, 초 (기본 15)
+
+# 경로별 읽기 타임아웃 (초). 스트리밍은 조각 사이 간격 기준.
+READ_TIMEOUTS = {
+    "/propose": 60,
+    "/generate": 30,
+    "/review": 60,
+    "/promote": 30,
+    "/auction": 60,
+    "/docent": 30,
+    "/chat": 60,
+    "/full-course": 300,
+    "/batch/": 600,
+    "/stream": 120,
+}
+DEFAULT_READ_TIMEOUT = 60
+
+# 에이전트가 잠깐 과부하(429/503)이거나 게이트웨이 오류일 때만 다시 시도
+RETRY_STATUS = {429, 502, 503, 504}
+MAX_RETRY_AFTER = 5.0
+
+
+class AgentError(Exception):
+    """에이전트가 응답했지만 200이 아닌 경우."""
+
+    def __init__(self, status_code, detail=""):
+        super().__init__(f"AI 응답 코드 {status_code} {detail}".strip())
+        self.status_code = status_code
+
+
+class AgentUnavailable(Exception):
+    """연결 실패/타임아웃, 또는 차단기가 열려 있어 호출하지 않은 경우."""
+
+
+class CircuitBreaker:
+    """closed → (연속 실패) → open → (reset_timeout 후 1회 시험) → half_open → closed/open"""
+
+    def __init__(self, failure_threshold=5, reset_timeout=15.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_inflight = False
+
+    def allow(self):
+        if self.state == "open":
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self.state = "half_open"
+            self._trial_inflight = False
+        if self.state == "half_open":
+            if self._trial_inflight:
+                return False
+            self._trial_inflight = True
+        return True
+
+    def success(self):
+        self.state = "closed"
+        self.failures = 0
+        self._trial_inflight = False
+
+    def release(self):
+        # 시험 호출이 성공/실패 집계 없이 끝난 경우(취소 등) 다음 시험을 막지 않도록 반납
+        self._trial_inflight = False
+
+    def failure(self):
+        self.failures += 1
+        self._trial_inflight = False
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                print(f"🚧 [Backend] AI 에이전트 차단 ({self.failures}회 연속 실패)")
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def stats(self):
+        return {"state": self.state, "failures": self.failures}
+
+
+def read_timeout_for(path):
+    if path.endswith("/stream"):
+        return READ_TIMEOUTS["/stream"]
+    for prefix, seconds in READ_TIMEOUTS.items():
+        if path == prefix or (prefix.endswith("/") and path.startswith(prefix)):
+            return seconds
+    return DEFAULT_READ_TIMEOUT
+
+
+class AgentClient:
+    def __init__(self, base_url, max_connections=50, max_keepalive=20, connect_timeout=3.0,
+                 retries=2, backoff=0.2, breaker_failures=5, breaker_reset=15.0):
+        self.base_url = base_url.rstrip("/")
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive)
+        self.connect_timeout = connect_timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.breaker = CircuitBreaker(breaker_failures, breaker_reset)
+        self._client = None
+
+    async def start(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(base_url=self.base_url, limits=self.limits)
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _timeout(self, path):
+        return httpx.Timeout(read_timeout_for(path), connect=self.connect_timeout)
+
+    def _delay(self, attempt, retry_after=None):
+        # full jitter: 0 ~ backoff * 2^attempt, 서버가 Retry-After 를 주면 그만큼은 기다림
+        delay = random.uniform(0, self.backoff * (2 ** attempt))
+        if retry_after:
+            delay = max(delay, min(float(retry_after), MAX_RETRY_AFTER))
+        return delay
+
+    def _check_open(self, path):
+        """차단 중이면 AgentUnavailable. half-open 시험 호출이면 True (끝날 때 release 해야 함)."""
+        if not self.breaker.allow():
+            raise AgentUnavailable(f"AI 에이전트 차단 중 ({path})")
+        return self.breaker.state == "half_open"
+
+    def _record_status(self, status_code):
+        # 429(과부하)/4xx 는 에이전트가 살아 있다는 뜻이므로 차단 집계에서 제외
+        if status_code >= 500:
+            self.breaker.failure()
+        else:
+            self.breaker.success()
+
+    async def post(self, path, payload, idempotent=True):
+        """JSON 을 보내고 JSON 을 받는다.
+
+        연결 자체가 안 된 경우는 항상 다시 시도하고, 보내는 중/응답 대기 중 오류나
+        429/5xx 는 idempotent 호출일 때만 다시 시도한다.
+        """
+        await self.start()
+        trial = self._check_open(path)
+        try:
+            return await self._post(path, payload, idempotent)
+        finally:
+            if trial:
+                self.breaker.release()  # 취소 등으로 집계 없이 끝나도 시험 슬롯은 반납
+
+    async def _post(self, path, payload, idempotent):
+        attempts = 1 + self.retries
+        for attempt in range(attempts):
+            last = attempt == attempts - 1
+            try:
+                resp = await self._client.post(path, json=payload, timeout=self._timeout(path))
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout) as e:
+                if last:
+                    self.breaker.failure()
+                    raise AgentUnavailable(f"{path}: {e!r}") from e
+            except httpx.TransportError as e:
+                # 요청을 보내는 중/보낸 뒤 실패 (쓰기·읽기 오류, 타임아웃, 프로토콜 오류)
+                if last or not idempotent:
+                    self.breaker.failure()
+                    raise AgentUnavailable(f"{path}: {e!r}") from e
+            else:
+                if resp.status_code == 200:
+                    try:
+                        data = resp.json()
+                    except ValueError as e:
+                        self.breaker.failure()
+                        raise AgentError(502, f"잘못된 JSON 응답: {e}") from e
+                    self.breaker.success()
+                    return data
+                if resp.status_code not in RETRY_STATUS or last or not idempotent:
+                    self._record_status(resp.status_code)
+                    raise AgentError(resp.status_code, resp.text[:200])
+                await asyncio.sleep(self._delay(attempt, resp.headers.get("Retry-After")))
+                continue
+            await asyncio.sleep(self._delay(attempt))
+
+    @asynccontextmanager
+    async def stream(self, path, payload):
+        """스트리밍 응답을 연다. 첫 응답(헤더)까지만 연결 재시도를 한다."""
+        await self.start()
+        trial = self._check_open(path)
+        try:
+            for attempt in range(1 + self.retries):
+                try:
+                    request = self._client.build_request("POST", path, json=payload, timeout=self._timeout(path))
+                    resp = await self._client.send(request, stream=True)
+                    break
+                except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout) as e:
+                    if attempt == self.retries:
+                        self.breaker.failure()
+                        raise AgentUnavailable(f"{path}: {e!r}") from e
+                    await asyncio.sleep(self._delay(attempt))
+                except httpx.TransportError as e:
+                    # 헤더를 기다리다 타임아웃 등: 스트리밍은 다시 보내지 않는다
+                    self.breaker.failure()
+                    raise AgentUnavailable(f"{path}: {e!r}") from e
+            try:
+                self._record_status(resp.status_code)
+                if resp.status_code != 200:
+                    raise AgentError(resp.status_code)
+                yield resp
+            finally:
+                await resp.aclose()
+        finally:
+            if trial:
+                self.breaker.release()
+
+    def stats(self):
+        return {"base_url": self.base_url, "breaker": self.breaker.stats()}
+
+
+def agent_client_from_env():
+    return AgentClient(
+        os.getenv("AI_AGENT_URL", "http://art_ai_agent:8002"),
+        max_connections=int(os.getenv("AGENT_MAX_CONNECTIONS", "50")),
+        max_keepalive=int(os.getenv("AGENT_MAX_KEEPALIVE", "20")),
+        connect_timeout=float(os.getenv("AGENT_CONNECT_TIMEOUT", "3")),
+        retries=int(os.getenv("AGENT_RETRIES", "2")),
+        backoff=float(os.getenv("AGENT_RETRY_BACKOFF", "0.2")),
+        breaker_failures=int(os.getenv("AGENT_BREAKER_FAILURES", "5")),
+        breaker_reset=float(os.getenv("AGENT_BREAKER_RESET", "15")),
+    )
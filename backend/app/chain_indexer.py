@@ -0,0 +1,375 @@
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import sys
+
+import httpx
+from eth_abi import decode
+from eth_utils import keccak, to_checksum_address
+from sqlalchemy import delete, select
+
+from . import database, models
+
+# =========================================================
+# ⛓️ ArtPlanningDAO 이벤트 인덱서 (체인 로그 → dao_* 테이블)
+# =========================================================
+#   CHAIN_RPC_URL          JSON-RPC 주소 (기본 http://127.0.0.1:8545, 로컬 Hardhat 노드)
+#   DAO_CONTRACT_ADDRESS   인덱싱할 컨트랙트 주소 (필수)
+#   DAO_START_BLOCK        커서가 없을 때 시작 블록 (기본 0, 배포 블록을 넣으면 빠름)
+#   CHAIN_CONFIRMATIONS    최신 블록에서 이만큼 뒤까지만 반영 (기본 3, 얕은 reorg 는 아예 보지 않음)
+#   CHAIN_LOG_BATCH        eth_getLogs 한 번에 조회할 블록 수 (기본 2000, 노드가 거절하면 반씩 나눔)
+#   CHAIN_POLL_INTERVAL    따라잡은 뒤 새 블록 확인 간격, 초 (기본 5)
+#
+#   python -m app.chain_indexer run      # 계속 따라가기 (인덱서 프로세스는 하나만)
+#   python -m app.chain_indexer once     # 지금 확정된 블록까지 한 번
+#   python -m app.chain_indexer status
+#
+# 로그 반영과 커서(chain_cursors) 갱신은 한 트랜잭션이라 중간에 죽어도 커서부터 다시 하면 된다.
+# 확정 깊이보다 깊은 reorg 로 커서 블록의 해시가 바뀌면, 반영해 둔 로그 중 체인과 블록 해시가
+# 맞는 곳까지 되돌아가 그 뒤 로그를 지우고, 영향받은 안건은 남은 로그로 다시 계산한 뒤 이어 간다.
+
+# (이벤트 이름, [(인자 이름, 타입, indexed)])  (blockchain/contracts/ArtPlanningDAO*.sol 과 맞출 것)
+# ArtPlanningDAO 는 제목을, ArtPlanningDAOV2 는 본문 해시를 싣고 나머지 이벤트는 같다.
+EVENTS = [
+    ("ProposalCreated", [("id", "uint256", False), ("title", "string", False), ("proposer", "address", False)]),
+    ("ProposalCreated", [("id", "uint256", False), ("contentHash", "bytes32", False), ("proposer", "address", False)]),
+    ("Voted", [("id", "uint256", False), ("voter", "address", False), ("currentVotes", "uint256", False)]),
+    ("StatusChanged", [("id", "uint256", False), ("newStatus", "uint8", False)]),
+]
+PROPOSAL_STATUS = ["IN_PROGRESS", "ACCEPTED", "REJECTED"]  # enum ProposalStatus 순서
+MAX_BACKOFF = 300  # 동기화가 계속 실패할 때 폴링 간격 상한 (초)
+
+
+def event_topic(name, params):
+    return "0x" + keccak(text=f"{name}({','.join(t for _, t, _ in params)})").hex()
+
+
+TOPICS = {event_topic(name, params): (name, params) for name, params in EVENTS}
+
+
+def content_hash(meta_hash):
+    """art_requests.meta_hash → V2 컨트랙트에 올리는 bytes32 (0x 소문자 hex).
+
+    이미 32바이트 hex 면 그대로, 아니면 (IPFS CID 등) 문자열의 keccak256 — 프론트의 ethers.id(meta_hash) 와 같다.
+    """
+    if not meta_hash:
+        return None
+    if meta_hash.startswith("0x") and len(meta_hash) == 66:
+        try:
+            bytes.fromhex(meta_hash[2:])
+            return meta_hash.lower()
+        except ValueError:
+            pass
+    return "0x" + keccak(text=meta_hash).hex()
+
+
+def _normalize(value):
+    if isinstance(value, bytes):
+        return "0x" + value.hex()
+    if isinstance(value, str) and value.startswith("0x") and len(value) == 42:
+        return value.lower()  # 주소는 소문자로 저장
+    return value
+
+
+def decode_log(log):
+    """(이벤트 이름, 인자 dict) 또는 None (모르는 이벤트)."""
+    event = TOPICS.get(log["topics"][0]) if log["topics"] else None
+    if event is None:
+        return None
+    name, params = event
+    plain = [(n, t) for n, t, indexed in params if not indexed]
+    values = dict(zip([n for n, _ in plain], decode([t for _, t in plain], bytes.fromhex(log["data"][2:]))))
+    topics = iter(log["topics"][1:])
+    for n, t, indexed in params:
+        if indexed:
+            values[n] = decode([t], bytes.fromhex(next(topics)[2:]))[0]
+    return name, {n: _normalize(v) for n, v in values.items()}
+
+
+class RpcError(Exception):
+    def __init__(self, message, code=None):
+        super().__init__(f"{message} (code {code})" if code is not None else message)
+        self.code = code
+
+
+class ChainRpc:
+    """이더리움 JSON-RPC 최소 클라이언트 (연결 하나를 재사용)."""
+
+    def __init__(self, url, timeout=30.0):
+        self.url = url
+        self.timeout = timeout
+        self._ids = itertools.count(1)
+        self._client = None
+
+    async def call(self, method, *params):
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=self.timeout)
+        resp = await self._client.post(self.url, json={
+            "jsonrpc": "2.0", "id": next(self._ids), "method": method, "params": list(params)})
+        resp.raise_for_status()
+        body = resp.json()
+        if body.get("error"):
+            raise RpcError(body["error"].get("message", "RPC error"), body["error"].get("code"))
+        return body["result"]
+
+    async def block_number(self):
+        return int(await self.call("eth_blockNumber"), 16)
+
+    async def block_hash(self, number):
+        block = await self.call("eth_getBlockByNumber", hex(number), False)
+        return block["hash"] if block else None
+
+    async def get_logs(self, address, from_block, to_block, topics):
+        return await self.call("eth_getLogs", {
+            "address": address, "fromBlock": hex(from_block), "toBlock": hex(to_block), "topics": [topics]})
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class DaoIndexer:
+    def __init__(self, rpc, address, start_block=0, confirmations=3, batch=2000, poll_interval=5.0):
+        self.rpc = rpc
+        self.address = address.lower()
+        self.name = f"ArtPlanningDAO:{self.address}"
+        self.start_block = start_block
+        self.confirmations = confirmations
+        self.batch = batch
+        self.poll_interval = poll_interval
+
+    # --- 커서 ---
+    async def cursor(self, db):
+        """(마지막으로 반영한 블록, 그 블록 해시). 처음이면 (start_block - 1, None)."""
+        row = await db.get(models.ChainCursor, self.name)
+        if row is None:
+            return self.start_block - 1, None
+        return row.block_number, row.block_hash
+
+    async def _set_cursor(self, db, number, block_hash):
+        row = await db.get(models.ChainCursor, self.name)
+        if row is None:
+            db.add(models.ChainCursor(name=self.name, block_number=number, block_hash=block_hash))
+        else:
+            row.block_number, row.block_hash = number, block_hash
+
+    # --- 동기화 ---
+    async def sync_once(self):
+        """확정된 블록(head - confirmations)까지 따라잡는다. 반영한 이벤트 수."""
+        safe = await self.rpc.block_number() - self.confirmations
+        async with database.AsyncSessionLocal() as db:
+            number, block_hash = await self.cursor(db)
+        if block_hash is not None and await self.rpc.block_hash(number) != block_hash:
+            number = await self._rewind(number)
+
+        applied = 0
+        while number < safe:
+            end = min(safe, number + self.batch)
+            logs = await self._logs(number + 1, end)
+            end_hash = await self.rpc.block_hash(end)
+            async with database.AsyncSessionLocal() as db:
+                applied += await self._store_logs(db, logs)
+                await self._set_cursor(db, end, end_hash)
+                await db.commit()
+            if logs:
+                print(f"⛓️ [Chain] 블록 {number + 1}~{end}: 이벤트 {len(logs)}건 반영")
+            number = end
+        return applied
+
+    async def _logs(self, start, end):
+        # 노드가 범위/결과 수 제한으로 거절하면 반씩 나눠서 다시 (다음 배치부터는 줄인 크기로)
+        try:
+            return await self.rpc.get_logs(self.address, start, end, list(TOPICS))
+        except RpcError as e:
+            if start == end:
+                raise
+            mid = (start + end) // 2
+            self.batch = max(1, mid - start + 1)
+            print(f"⚠️ [Chain] eth_getLogs {start}~{end} 거절 ({e}), {self.batch}블록씩 다시 조회")
+            return await self._logs(start, mid) + await self._logs(mid + 1, end)
+
+    async def _store_logs(self, db, logs):
+        events = []
+        for log in sorted(logs, key=lambda l: (int(l["blockNumber"], 16), int(l["logIndex"], 16))):
+            if log.get("removed"):
+                continue
+            decoded = decode_log(log)
+            if decoded is None:
+                continue
+            name, values = decoded
+            row = models.DaoEvent(
+                contract_address=self.address, block_number=int(log["blockNumber"], 16),
+                block_hash=log["blockHash"], tx_hash=log["transactionHash"], log_index=int(log["logIndex"], 16),
+                event=name, proposal_id=values["id"], data=json.dumps(values, ensure_ascii=False),
+            )
+            db.add(row)
+            events.append(row)
+        await self._apply(db, events)
+        return len(events)
+
+    async def _apply(self, db, events):
+        """이벤트 순서대로 dao_proposals / dao_votes 를 갱신한다 (새 로그, reorg 뒤 재계산 공용)."""
+        P = models.DaoProposal
+        ids = {e.proposal_id for e in events}
+        if not ids:
+            return
+        proposals = {p.proposal_id: p for p in (await db.scalars(
+            select(P).where(P.contract_address == self.address, P.proposal_id.in_(ids)))).all()}
+        for e in events:
+            values = json.loads(e.data)
+            proposal = proposals.get(e.proposal_id)
+            if e.event == "ProposalCreated":
+                request = await self._link(db, values["proposer"], values.get("title"), values.get("contentHash"))
+                proposal = proposals[e.proposal_id] = P(
+                    contract_address=self.address, proposal_id=e.proposal_id,
+                    title=values.get("title") or (request.title if request else None),
+                    content_hash=values.get("contentHash"), proposer=values["proposer"],
+                    status=PROPOSAL_STATUS[0], vote_count=0, art_request_id=request.id if request else None,
+                    created_block=e.block_number, created_tx=e.tx_hash, updated_block=e.block_number,
+                )
+                db.add(proposal)
+                continue
+            if proposal is None:
+                print(f"⚠️ [Chain] 생성 로그 없는 안건 #{e.proposal_id} 의 {e.event} 건너뜀")
+                continue
+            if e.event == "Voted":
+                proposal.vote_count = values["currentVotes"]
+                db.add(models.DaoVote(
+                    contract_address=self.address, proposal_id=e.proposal_id, voter=values["voter"],
+                    vote_count=values["currentVotes"], block_number=e.block_number, tx_hash=e.tx_hash,
+                ))
+            elif e.event == "StatusChanged":
+                if values["newStatus"] >= len(PROPOSAL_STATUS):
+                    print(f"⚠️ [Chain] 안건 #{e.proposal_id} 의 알 수 없는 상태 {values['newStatus']} 건너뜀")
+                    continue
+                proposal.status = PROPOSAL_STATUS[values["newStatus"]]
+            proposal.updated_block = e.block_number
+
+    async def _link(self, db, proposer, title, digest=None):
+        # 같은 지갑으로 DB 에 올린 안건 중 제목(V2 는 meta_hash 의 본문 해시)이 같은 가장 최근 것
+        # (지갑 주소는 소문자/체크섬 둘 다)
+        A = models.ArtRequest
+        query = select(A).where(A.wallet_address.in_([proposer, to_checksum_address(proposer)]))
+        query = query.order_by(A.created_at.desc(), A.id.desc())
+        if digest is None:
+            return await db.scalar(query.where(A.title == title).limit(1))
+        # 해시는 되돌릴 수 없으니 제안자 지갑의 안건들만 해시해서 비교 (지갑당 안건 수는 적다)
+        for request in (await db.scalars(query.where(A.meta_hash.is_not(None)))).all():
+            if content_hash(request.meta_hash) == digest:
+                return request
+        return None
+
+    # --- reorg ---
+    async def _rewind(self, number):
+        """커서 블록이 체인에서 바뀌었을 때: 해시가 맞는 블록까지 되돌리고 그 블록 번호를 돌려준다."""
+        E, P, V = models.DaoEvent, models.DaoProposal, models.DaoVote
+        async with database.AsyncSessionLocal() as db:
+            fork, below = self.start_block - 1, number + 1
+            while True:
+                blocks = (await db.execute(
+                    select(E.block_number, E.block_hash).where(E.contract_address == self.address, E.block_number < below)
+                    .group_by(E.block_number, E.block_hash).order_by(E.block_number.desc()).limit(100)
+                )).all()
+                if not blocks:
+                    break
+                match = None
+                for block_number, block_hash in blocks:
+                    if await self.rpc.block_hash(block_number) == block_hash:
+                        match = block_number
+                        break
+                if match is not None:
+                    fork = match
+                    break
+                below = blocks[-1][0]
+
+            stale = (E.contract_address == self.address, E.block_number > fork)
+            affected = set((await db.scalars(select(E.proposal_id).where(*stale))).all())
+            await db.execute(delete(E).where(*stale))
+            if affected:
+                # 영향받은 안건은 지우고 남은 로그로 처음부터 다시 계산
+                mine = (P.contract_address == self.address, P.proposal_id.in_(affected))
+                await db.execute(delete(P).where(*mine))
+                await db.execute(delete(V).where(V.contract_address == self.address, V.proposal_id.in_(affected)))
+                remaining = (await db.scalars(
+                    select(E).where(E.contract_address == self.address, E.proposal_id.in_(affected))
+                    .order_by(E.block_number, E.log_index)
+                )).all()
+                await self._apply(db, remaining)
+            await self._set_cursor(db, fork, await self.rpc.block_hash(fork) if fork >= 0 else None)
+            await db.commit()
+        print(f"🔀 [Chain] reorg 감지: 블록 {number} → {fork} 로 되돌림 (안건 {len(affected)}건 재계산)")
+        return fork
+
+    async def run(self):
+        print(f"⛓️ [Chain] {self.name} 인덱싱 시작 (확정 {self.confirmations}블록, 배치 {self.batch})")
+        failures = 0
+        while True:
+            try:
+                await self.sync_once()
+                failures = 0
+            except Exception as e:
+                # RPC 오류뿐 아니라 DB/디코딩 오류에도 루프가 죽지 않도록, 연속 실패면 점점 늦게 재시도
+                failures += 1
+                print(f"🔥 [Chain] 동기화 실패 ({failures}회 연속): {e!r}")
+            await asyncio.sleep(min(self.poll_interval * 2 ** min(failures, 6), MAX_BACKOFF))
+
+    async def status(self):
+        async with database.AsyncSessionLocal() as db:
+            number, block_hash = await self.cursor(db)
+        try:
+            head = await self.rpc.block_number()
+        except (httpx.HTTPError, RpcError) as e:
+            head, error = None, str(e)
+        else:
+            error = None
+        return {
+            "contract": self.address, "cursor": number, "cursor_hash": block_hash, "head": head,
+            "lag": head - self.confirmations - number if head is not None else None,
+            "confirmations": self.confirmations, "error": error,
+        }
+
+
+def dao_contract_from_env():
+    address = os.getenv("DAO_CONTRACT_ADDRESS")
+    return address.lower() if address else None
+
+
+def dao_indexer_from_env():
+    address = dao_contract_from_env()
+    if not address:
+        raise ValueError("DAO_CONTRACT_ADDRESS 가 필요합니다.")
+    return DaoIndexer(
+        ChainRpc(os.getenv("CHAIN_RPC_URL", "http://127.0.0.1:8545")),
+        address,
+        start_block=int(os.getenv("DAO_START_BLOCK", "0")),
+        confirmations=int(os.getenv("CHAIN_CONFIRMATIONS", "3")),
+        batch=int(os.getenv("CHAIN_LOG_BATCH", "2000")),
+        poll_interval=float(os.getenv("CHAIN_POLL_INTERVAL", "5")),
+    )
+
+
+async def _main(command):
+    indexer = dao_indexer_from_env()
+    try:
+        if command == "run":
+            await indexer.run()
+        elif command == "once":
+            applied = await indexer.sync_once()
+            print(f"✅ [Chain] 이벤트 {applied}건 반영")
+        else:
+            print(json.dumps(await indexer.status(), ensure_ascii=False, indent=2))
+    finally:
+        await indexer.rpc.close()
+        await database.async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m app.chain_indexer")
+    parser.add_argument("command", choices=["run", "once", "status"])
+    try:
+        asyncio.run(_main(parser.parse_args().command))
+    except KeyboardInterrupt:
+        sys.exit(0)
@@ -0,0 +1,278 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import time
+
+from sqlalchemy import event, insert, inspect, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, object_session
+
+from . import database, models
+
+# =========================================================
+# 🎧 도슨트 대본 미리 만들기 (작품 + 관람객 유형별로 DB 에 저장)
+# =========================================================
+#   DOCENT_AUDIENCES      미리 만들 관람객 유형, 쉼표 구분 (기본 "일반 관람객")
+#   DOCENT_BATCH_SIZE     에이전트 /batch/docent 한 번에 보낼 작품 수 (기본 20)
+#   DOCENT_CONCURRENCY    한 배치 안에서 동시에 생성할 수 (기본 4)
+#   DOCENT_MAX_RETRIES    DB 오류 등으로 갱신이 통째로 실패했을 때 다시 시도할 횟수 (기본 5)
+#
+# 작품이 ORM 으로 추가되거나 제목/설명이 바뀌어 커밋되면 파이프라인 큐에 들어가고,
+# 잠깐 모았다가 백그라운드에서 대본을 만든다. insert() 로 한꺼번에 넣은 기존 작품은 backfill 로:
+#
+#   python -m app.docent_scripts backfill                      # 없거나 작품이 바뀐 대본만
+#   python -m app.docent_scripts backfill --workers 8 --force  # 전부 다시
+
+DEFAULT_AUDIENCE = "일반 관람객"
+AGENT_FALLBACK = "해설 실패"  # agent.py /docent 가 실패 시 돌려주는 문구 (저장하지 않음)
+
+
+def audiences_from_env():
+    return [a.strip() for a in os.getenv("DOCENT_AUDIENCES", DEFAULT_AUDIENCE).split(",") if a.strip()]
+
+
+def art_info(title, description):
+    return f"{title}: {description}" if description else (title or "")
+
+
+def source_hash(title, description, audience):
+    raw = json.dumps([title or "", description or "", audience], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+# --- 조회 / 저장 ---
+async def get_script(db, item_id, audience):
+    # (item_id, audience_type) 유니크 인덱스 한 번
+    D = models.DocentScript
+    return await db.scalar(select(D.script).where(D.item_id == item_id, D.audience_type == audience))
+
+
+async def _upsert(db, item_id, audience, script, digest):
+    D = models.DocentScript
+    values = {"script": script, "source_hash": digest}
+    where = (D.item_id == item_id, D.audience_type == audience)
+    if (await db.execute(update(D).where(*where).values(**values))).rowcount:
+        return
+    try:
+        async with db.begin_nested():
+            await db.execute(insert(D).values(item_id=item_id, audience_type=audience, **values))
+    except IntegrityError:
+        # 다른 워커가 먼저 넣었으면 덮어쓰기
+        await db.execute(update(D).where(*where).values(**values))
+
+
+async def save_script(item_id, audience, script, digest):
+    async with database.AsyncSessionLocal() as db:
+        await _upsert(db, item_id, audience, script, digest)
+        await db.commit()
+
+
+async def generate_one(agent, item, audience):
+    """대본 하나를 만들어 저장하고 돌려준다 (엔드포인트에서 저장된 대본이 없을 때)."""
+    result = await agent.post("/docent", {"art_info": art_info(item.title, item.description), "audience_type": audience})
+    script = result.get("commentary")
+    if not script or script == AGENT_FALLBACK:
+        raise RuntimeError("도슨트 대본 생성 실패")
+    await save_script(item.id, audience, script, source_hash(item.title, item.description, audience))
+    return script
+
+
+# --- 여러 작품 한꺼번에 (파이프라인 / backfill) ---
+async def refresh_items(agent, item_ids, audiences, batch_size=20, concurrency=4, force=False):
+    """대본이 없거나 작품 제목/설명이 바뀐 것만 /batch/docent 로 만들어 저장. (생성 수, 실패 수)"""
+    G, D = models.GalleryItem, models.DocentScript
+    generated = failed = 0
+    async with database.AsyncSessionLocal() as db:
+        items = (await db.execute(
+            select(G.id, G.title, G.description).where(G.id.in_(list(item_ids))).order_by(G.id))).all()
+        for audience in audiences:
+            stored = dict((await db.execute(
+                select(D.item_id, D.source_hash).where(D.audience_type == audience, D.item_id.in_([i.id for i in items]))
+            )).all())
+            stale = [i for i in items if force or stored.get(i.id) != source_hash(i.title, i.description, audience)]
+            for start in range(0, len(stale), batch_size):
+                chunk = stale[start:start + batch_size]
+                payload = {
+                    "items": [{"art_info": art_info(i.title, i.description), "audience_type": audience} for i in chunk],
+                    "max_concurrency": concurrency,
+                }
+                try:
+                    outputs = (await agent.post("/batch/docent", payload, idempotent=False))["results"]
+                except Exception as e:
+                    print(f"🔥 [Docent] 배치 생성 실패 ({len(chunk)}건): {e}")
+                    failed += len(chunk)
+                    continue
+                for item, output in zip(chunk, outputs):
+                    script = output.get("commentary")
+                    if not script or "error" in output:
+                        failed += 1
+                        continue
+                    await _upsert(db, item.id, audience, script, source_hash(item.title, item.description, audience))
+                    generated += 1
+                await db.commit()
+    return generated, failed
+
+
+class DocentPipeline:
+    """작품 추가/수정 시 대본을 백그라운드로 만드는 큐 (잠깐 모아서 배치로)."""
+
+    def __init__(self, agent, audiences, batch_size=20, concurrency=4, delay=1.0, max_retries=5):
+        self.agent = agent
+        self.audiences = audiences
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.delay = delay
+        self.max_retries = max_retries
+        self._pending = set()
+        self._retries = {}  # item_id -> 연속 실패 횟수 (DB 오류 등으로 묶음 전체가 실패한 경우)
+        self._wake = None
+        self._loop = None
+        self._task = None
+        self.generated = 0
+        self.failed = 0
+
+    def start(self):
+        if self._task is None:
+            self._loop = asyncio.get_running_loop()
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._pending:
+            print(f"⚠️ [Docent] 종료 시 대기 중이던 작품 {len(self._pending)}건 (backfill 로 채울 수 있음)")
+
+    def enqueue(self, item_ids):
+        if self._loop is None:
+            return  # 파이프라인이 없는 프로세스 (관리 스크립트 등)
+        self._loop.call_soon_threadsafe(self._add, set(item_ids))
+
+    def _add(self, item_ids):
+        self._pending |= item_ids
+        self._wake.set()
+
+    async def _run(self):
+        while True:
+            await self._wake.wait()
+            await asyncio.sleep(self.delay)  # 연달아 바뀌는 작품을 한 번에
+            self._wake.clear()
+            item_ids, self._pending = self._pending, set()
+            try:
+                generated, failed = await refresh_items(
+                    self.agent, item_ids, self.audiences, self.batch_size, self.concurrency)
+            except Exception as e:
+                self._retry(item_ids, e)
+                continue
+            for item_id in item_ids:
+                self._retries.pop(item_id, None)
+            self.generated += generated
+            self.failed += failed
+            print(f"🎧 [Docent] 작품 {len(item_ids)}건 대본 갱신 (생성 {generated}, 실패 {failed})")
+
+    def _retry(self, item_ids, error):
+        # 잠시 뒤 다시 대기열에 넣는다 (지수 백오프). 횟수를 다 쓴 작품은 실패로 세고 backfill 에 맡긴다.
+        attempts = max(self._retries.get(i, 0) for i in item_ids) + 1
+        if attempts > self.max_retries:
+            for item_id in item_ids:
+                self._retries.pop(item_id, None)
+            self.failed += len(item_ids)
+            print(f"🔥 [Docent] 대본 갱신 포기 ({len(item_ids)}건, {self.max_retries}회 재시도): {error}")
+            return
+        for item_id in item_ids:
+            self._retries[item_id] = attempts
+        backoff = self.delay * 2 ** attempts
+        print(f"🔥 [Docent] 대본 갱신 실패 ({len(item_ids)}건, {backoff:.0f}초 뒤 재시도 {attempts}/{self.max_retries}): {error}")
+        self._loop.call_later(backoff, self._add, item_ids)
+
+    def stats(self):
+        return {"pending": len(self._pending), "generated": self.generated, "failed": self.failed,
+                "audiences": self.audiences}
+
+
+def watch_gallery_items(pipeline):
+    """GalleryItem 이 ORM 으로 추가되거나 제목/설명이 바뀌면 커밋 후 파이프라인에 넣는다."""
+
+    def _mark(mapper, connection, target):
+        state = inspect(target)
+        if state.attrs.title.history.has_changes() or state.attrs.description.history.has_changes():
+            object_session(target).info.setdefault("docent_items", set()).add(target.id)
+
+    event.listen(models.GalleryItem, "after_insert", _mark)
+    event.listen(models.GalleryItem, "after_update", _mark)
+
+    @event.listens_for(Session, "after_commit")
+    def _enqueue(session):
+        item_ids = session.info.pop("docent_items", None)
+        if item_ids:
+            pipeline.enqueue(item_ids)
+
+    @event.listens_for(Session, "after_soft_rollback")
+    def _discard(session, previous_transaction):
+        session.info.pop("docent_items", None)
+
+
+def docent_pipeline_from_env(agent):
+    return DocentPipeline(
+        agent,
+        audiences_from_env(),
+        batch_size=int(os.getenv("DOCENT_BATCH_SIZE", "20")),
+        concurrency=int(os.getenv("DOCENT_CONCURRENCY", "4")),
+        max_retries=int(os.getenv("DOCENT_MAX_RETRIES", "5")),
+    )
+
+
+# --- backfill ---
+async def backfill(agent, audiences, workers=4, batch_size=20, concurrency=4, force=False):
+    async with database.AsyncSessionLocal() as db:
+        item_ids = (await db.scalars(select(models.GalleryItem.id).order_by(models.GalleryItem.id))).all()
+    chunks = [item_ids[i:i + batch_size] for i in range(0, len(item_ids), batch_size)]
+    sem = asyncio.Semaphore(workers)
+    done = {"generated": 0, "failed": 0}
+    started = time.perf_counter()
+
+    async def run(chunk):
+        async with sem:
+            generated, failed = await refresh_items(agent, chunk, audiences, batch_size, concurrency, force)
+            done["generated"] += generated
+            done["failed"] += failed
+
+    await asyncio.gather(*(run(chunk) for chunk in chunks))
+    elapsed = time.perf_counter() - started
+    print(f"✅ [Docent] 작품 {len(item_ids)}건 x {len(audiences)}유형: 생성 {done['generated']}, "
+          f"실패 {done['failed']} ({elapsed:.1f}s, 워커 {workers})")
+    return done
+
+
+async def _main(args):
+    from .agent_client import agent_client_from_env
+
+    agent = agent_client_from_env()
+    await agent.start()
+    try:
+        result = await backfill(agent, args.audience or audiences_from_env(), args.workers,
+                                args.batch_size, args.concurrency, args.force)
+    finally:
+        await agent.close()
+        await database.async_engine.dispose()
+    return 1 if result["failed"] else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m app.docent_scripts")
+    parser.add_argument("command", choices=["backfill"])
+    parser.add_argument("--audience", action="append", help="관람객 유형 (여러 번 지정 가능, 기본 DOCENT_AUDIENCES)")
+    parser.add_argument("--workers", type=int, default=4, help="동시에 처리할 배치 수")
+    parser.add_argument("--batch-size", type=int, default=int(os.getenv("DOCENT_BATCH_SIZE", "20")))
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("DOCENT_CONCURRENCY", "4")),
+                        help="배치 하나 안에서 동시에 생성할 수")
+    parser.add_argument("--force", action="store_true", help="저장된 대본도 다시 생성")
+    sys.exit(asyncio.run(_main(parser.parse_args())))
@@ -0,0 +1,105 @@
+import hashlib
+import os
+import re
+
+import numpy as np
+
+# =========================================================
+# 🔢 로컬 텍스트 임베딩 (외부 API 없이)
+# =========================================================
+# 기본은 단어 + 글자 bigram 을 해싱하는 방식이라 추가 패키지/모델 파일이 필요 없다.
+# 조사/어미가 달라도("색감이 어때요" / "색감 어떤가요") 겹치는 조각이 많아 가깝게 나온다.
+# 동의어까지 잡으려면 로컬 문장 임베딩 모델을 지정한다 (sentence-transformers 가 있을 때만):
+#   <PREFIX>_EMBEDDER=sentence-transformers:jhgan/ko-sroberta-multitask
+# 모델 파일은 미리 받아 두어야 하며, 실행 중에는 네트워크를 쓰지 않는다.
+
+TOKEN_PATTERN = re.compile(r"[0-9a-z가-힣]+")
+
+# 짧은 질문 비교용: 조사/어미를 떼고, 어떤 질문에나 붙는 말은 버린다
+# ("이 작품 색감 어때요?" → 색감). 남는 말이 없으면 영벡터 (어떤 질문과도 유사도 0).
+KOREAN_PARTICLES = (
+    "에서는", "으로는", "에게", "에서", "으로", "이랑", "까지", "부터",
+    "은", "는", "이", "가", "을", "를", "의", "도", "에", "로", "와", "과", "랑", "요",
+)
+QUESTION_STOPWORDS = frozenset({
+    "이", "그", "저", "이거", "그거", "저거", "작품", "그림", "좀", "어때", "어때요", "어떤가요", "어떤지",
+    "뭐예요", "뭔가요", "무엇인가요", "알려", "알려줘", "알려주세요", "주세요", "설명", "설명해", "해주세요",
+    "궁금해요", "대해", "대해서", "있나요", "있어요", "인가요", "나요", "건가요", "요",
+})
+
+
+class HashingEmbedder:
+    def __init__(self, dim=512, stopwords=(), particles=()):
+        self.dim = dim
+        self.stopwords = frozenset(stopwords)
+        self.particles = tuple(particles)
+
+    def _normalize(self, word):
+        for _ in range(2):  # "색감은요" → "색감은" → "색감"
+            if word in self.stopwords:
+                return None
+            suffix = next((p for p in self.particles if word.endswith(p) and len(word) > len(p) + 1), None)
+            if suffix is None:
+                break
+            word = word[:-len(suffix)]
+        return None if word in self.stopwords else word
+
+    def _features(self, text):
+        for word in TOKEN_PATTERN.findall((text or "").lower()):
+            word = self._normalize(word)
+            if not word:
+                continue
+            yield word, 1.0
+            for i in range(len(word) - 1):
+                yield word[i:i + 2], 0.5
+
+    def embed(self, text):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature, weight in self._features(text):
+            digest = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+            vector[digest % self.dim] += weight if digest >> 63 else -weight
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def embed_many(self, texts):
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return np.stack([self.embed(t) for t in texts])
+
+    def describe(self):
+        return f"hashing-{self.dim}"
+
+
+class SentenceTransformerEmbedder:
+    """로컬에 받아 둔 sentence-transformers 모델 (선택 의존성)."""
+
+    def __init__(self, model_name):
+        from sentence_transformers import SentenceTransformer  # 선택 의존성
+
+        self.model_name = model_name
+        self.model = SentenceTransformer(model_name, local_files_only=True)
+        self.dim = self.model.get_sentence_embedding_dimension()
+
+    def embed(self, text):
+        return self.embed_many([text])[0]
+
+    def embed_many(self, texts):
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return self.model.encode(list(texts), normalize_embeddings=True, convert_to_numpy=True).astype(np.float32)
+
+    def describe(self):
+        return self.model_name
+
+
+def embedder_from_env(prefix, dim=512, **hashing_options):
+    """<prefix>_EMBEDDER: hashing (기본) | sentence-transformers:<모델 이름 또는 경로>"""
+    spec = os.getenv(f"{prefix}_EMBEDDER", "hashing")
+    if spec.startswith("sentence-transformers:"):
+        try:
+            return SentenceTransformerEmbedder(spec.split(":", 1)[1])
+        except Exception as e:
+            print(f"⚠️ [Embedding] {spec} 로드 실패, 해싱 임베딩 사용: {e}")
+    elif spec != "hashing":
+        raise ValueError(f"알 수 없는 {prefix}_EMBEDDER: {spec}")
+    return HashingEmbedder(dim, **hashing_options)
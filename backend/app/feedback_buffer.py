@@ -0,0 +1,187 @@
+import asyncio
+import json
+import os
+
+from sqlalchemy import insert
+from sqlalchemy.exc import DataError, IntegrityError
+
+# =========================================================
+# ✍️ 관람평 쓰기 버퍼 (여러 건을 multi-row INSERT 한 번으로)
+# =========================================================
+#   FEEDBACK_WRITE_MODE      direct (기본, 요청마다 INSERT + commit)
+#                            group  (모아서 INSERT, 커밋될 때까지 응답 대기 → 유실 없음)
+#                            async  (모아서 INSERT, 바로 응답 → 프로세스가 죽으면 버퍼 유실 가능)
+#   FEEDBACK_FLUSH_SIZE      이만큼 쌓이면 바로 flush (기본 200)
+#   FEEDBACK_FLUSH_INTERVAL  최대 대기 시간, 초 (기본 0.5)
+#   FEEDBACK_MAX_RETRIES     async 모드에서 한 건을 다시 시도하는 최대 횟수 (기본 5)
+#   FEEDBACK_DEAD_LETTER     끝내 기록하지 못한 관람평을 남길 JSONL 파일 (없으면 로그만)
+#
+# 묶음 INSERT 가 실패하면 한 건씩 다시 넣어 문제 있는 행만 골라낸다.
+# 행 자체가 잘못된 경우(FK/제약 위반)는 바로, 그 밖의 실패는 재시도 한도를 넘으면 dead-letter 로 보낸다.
+# 앱 종료(lifespan) 시 stop() 이 남은 버퍼를 모두 flush 한다.
+
+WRITE_MODES = ("direct", "group", "async")
+
+
+class FeedbackBuffer:
+    def __init__(self, engine, table, mode="group", flush_size=200, flush_interval=0.5, max_retries=5,
+                 dead_letter_path=None):
+        if mode not in ("group", "async"):
+            raise ValueError(f"알 수 없는 FEEDBACK_WRITE_MODE: {mode}")
+        self.engine = engine
+        self.table = table
+        self.mode = mode
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.dead_letter_path = dead_letter_path
+        self._pending = []  # [(row, future 또는 None, 실패 횟수)]
+        self._wake = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task = None
+        self._closing = False
+        self.flushed_rows = 0
+        self.batches = 0
+        self.failures = 0
+        self.dead_letters = 0
+
+    @property
+    def durable(self):
+        return self.mode == "group"
+
+    def start(self):
+        if self._task is None:
+            self._closing = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        # 새 요청은 더 받지 않는다고 가정하고, 주기 작업을 끝낸 뒤 남은 것을 모두 기록
+        self._closing = True
+        self._wake.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+        await self.flush()
+        if self._pending:
+            print(f"🔥 [Feedback] 종료 시 기록하지 못한 관람평 {len(self._pending)}건")
+            leftover = [row for row, _, _ in self._pending]
+            self._pending.clear()
+            await self._dead_letter(leftover, "shutdown")
+
+    async def add(self, row):
+        """한 건을 버퍼에 넣는다. group 모드면 그 건이 커밋될 때까지 기다린다."""
+        self.start()
+        future = asyncio.get_running_loop().create_future() if self.durable else None
+        self._pending.append((row, future, 0))
+        if len(self._pending) >= self.flush_size:
+            self._wake.set()
+        if future is not None:
+            await future
+
+    async def _run(self):
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+    async def flush(self):
+        async with self._flush_lock:
+            retry = []
+            while self._pending:
+                batch = self._pending[:self.flush_size]
+                del self._pending[:len(batch)]
+                try:
+                    async with self.engine.begin() as conn:
+                        await conn.execute(insert(self.table), [row for row, _, _ in batch])
+                except Exception as e:
+                    self.failures += 1
+                    print(f"🔥 [Feedback] {len(batch)}건 묶음 기록 실패, 한 건씩 다시 시도: {e}")
+                    retry += await self._insert_each(batch)
+                    continue
+                self.batches += 1
+                self.flushed_rows += len(batch)
+                for _, future, _ in batch:
+                    if future is not None and not future.done():
+                        future.set_result(None)
+            # async 모드에서 일시적으로 실패한 건은 뒤에 새로 들어온 관람평을 막지 않도록 다음 주기에
+            self._pending.extend(retry)
+
+    async def _insert_each(self, batch):
+        """한 건씩 INSERT. 다음 주기에 다시 시도할 항목 목록을 돌려준다 (async 모드만)."""
+        retry, dead = [], []
+        error = None  # DB 연결 문제 등 행과 무관한 실패면 나머지는 넣어 보지 않고 같은 처리
+        for row, future, attempts in batch:
+            if error is None:
+                try:
+                    async with self.engine.begin() as conn:
+                        await conn.execute(insert(self.table), [row])
+                except (IntegrityError, DataError) as e:
+                    # 이 행 자체가 잘못됨 (없는 작품 등) → 다시 해도 같으므로 바로 포기
+                    if future is None:
+                        dead.append(row)
+                    elif not future.done():
+                        future.set_exception(e)
+                    continue
+                except Exception as e:
+                    error = e
+                else:
+                    self.flushed_rows += 1
+                    if future is not None and not future.done():
+                        future.set_result(None)
+                    continue
+            if future is not None:
+                if not future.done():
+                    future.set_exception(error)
+            elif attempts + 1 >= self.max_retries:
+                dead.append(row)
+            else:
+                retry.append((row, None, attempts + 1))
+        if dead:
+            await self._dead_letter(dead, "insert failed")
+        return retry
+
+    async def _dead_letter(self, rows, reason):
+        self.dead_letters += len(rows)
+        print(f"🪦 [Feedback] 기록하지 못한 관람평 {len(rows)}건 ({reason})")
+        if not self.dead_letter_path:
+            return
+
+        def write():
+            with open(self.dead_letter_path, "a", encoding="utf-8") as f:
+                for row in rows:
+                    f.write(json.dumps({"reason": reason, "row": row}, ensure_ascii=False, default=str) + "\n")
+        try:
+            await asyncio.to_thread(write)
+        except OSError as e:
+            print(f"🔥 [Feedback] dead-letter 파일 기록 실패: {e}")
+
+    def stats(self):
+        return {
+            "mode": self.mode,
+            "pending": len(self._pending),
+            "flushed_rows": self.flushed_rows,
+            "batches": self.batches,
+            "failures": self.failures,
+            "dead_letters": self.dead_letters,
+        }
+
+
+def feedback_buffer_from_env(engine, table):
+    """direct 모드면 None (버퍼 없이 요청마다 바로 INSERT)."""
+    mode = os.getenv("FEEDBACK_WRITE_MODE", "direct")
+    if mode not in WRITE_MODES:
+        raise ValueError(f"알 수 없는 FEEDBACK_WRITE_MODE: {mode}")
+    if mode == "direct":
+        return None
+    return FeedbackBuffer(
+        engine,
+        table,
+        mode=mode,
+        flush_size=int(os.getenv("FEEDBACK_FLUSH_SIZE", "200")),
+        flush_interval=float(os.getenv("FEEDBACK_FLUSH_INTERVAL", "0.5")),
+        max_retries=int(os.getenv("FEEDBACK_MAX_RETRIES", "5")),
+        dead_letter_path=os.getenv("FEEDBACK_DEAD_LETTER") or None,
+    )
@@ -0,0 +1,261 @@
+import asyncio
+import hashlib
+import io
+import json
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+from urllib.parse import quote
+
+import httpx
+
+# =========================================================
+# 🖼️ 스튜디오 이미지 저장소 (내용 주소 기반, 크기 제한)
+# =========================================================
+#   STUDIO_IMAGE_DIR        저장 폴더 (기본 data/studio_images)
+#   STUDIO_IMAGE_MAX_MB     원본 + 축소본 전체 최대 크기, MB (기본 1024). 넘으면 가장 오래 안 본 것부터 삭제
+#   STUDIO_IMAGE_WIDTHS     허용하는 축소본 가로 크기 (기본 "256,512", 256 = 썸네일)
+#   STUDIO_IMAGE_SIZE       생성 크기 (기본 1024x768)
+#   STUDIO_IMAGE_GENERATOR  pollinations (기본, 원격) | local (네트워크 없이 결정적으로 그림, 테스트/오프라인용)
+#
+# 파일은 objects/<sha256 앞 2자>/<sha256> 에 한 번만 저장하고, 메타데이터는 index.db(SQLite)에 둔다.
+#   blobs        digest → 크기, content-type, (축소본이면) 원본 digest + 가로 크기, 마지막 조회 시각
+#   generations  hash(keywords, style, seed) → 화가 프롬프트 + 원본 digest
+# 같은 (keywords, style, seed) 요청은 화가 호출과 이미지 생성 없이 저장된 결과를 돌려준다.
+
+DIGEST_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+def normalize_keywords(keywords):
+    return " ".join((keywords or "").split())
+
+
+def default_seed(keywords, style):
+    # seed 를 안 주면 같은 키워드/스타일은 항상 같은 seed (다른 그림을 원하면 seed 를 지정)
+    raw = f"{normalize_keywords(keywords)}|{style}".encode("utf-8")
+    return int(hashlib.sha256(raw).hexdigest()[:8], 16) % 99999 + 1
+
+
+def generation_key(keywords, style, seed):
+    raw = json.dumps([normalize_keywords(keywords), style, seed], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ImageStore:
+    def __init__(self, root, max_bytes=1024 * 1024 * 1024, widths=(256, 512)):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.widths = tuple(sorted(widths))
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(root, "index.db"), check_same_thread=False)
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS blobs ("
+            " digest TEXT PRIMARY KEY, size INTEGER NOT NULL, content_type TEXT NOT NULL,"
+            " source TEXT, width INTEGER, last_access REAL NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS ix_blobs_last_access ON blobs (last_access);"
+            "CREATE INDEX IF NOT EXISTS ix_blobs_source_width ON blobs (source, width);"
+            "CREATE TABLE IF NOT EXISTS generations ("
+            " key TEXT PRIMARY KEY, digest TEXT NOT NULL, prompt TEXT, seed INTEGER, created_at REAL NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS ix_generations_digest ON generations (digest);"
+        )
+        self._db.commit()
+        self._total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+        self.evictions = 0
+
+    def path(self, digest):
+        return os.path.join(self.root, "objects", digest[:2], digest)
+
+    # --- 원본 ---
+    def put(self, data, content_type, source=None, width=None):
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path(digest)
+        with self._lock:
+            exists = self._db.execute("SELECT 1 FROM blobs WHERE digest = ?", (digest,)).fetchone()
+            if not exists or not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(tmp, "wb") as f:
+                    f.write(data)
+                os.replace(tmp, path)  # 읽는 쪽이 덜 쓴 파일을 보지 않도록
+            if not exists:
+                self._db.execute(
+                    "INSERT INTO blobs (digest, size, content_type, source, width, last_access) VALUES (?, ?, ?, ?, ?, ?)",
+                    (digest, len(data), content_type, source, width, time.time()))
+            # 워커 여러 개가 같은 폴더를 쓰므로 합계는 매번 index.db 에서 다시 읽는다
+            self._total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+            self._evict(keep={digest, source})
+            self._db.commit()
+        return digest
+
+    def get(self, digest):
+        """(파일 경로, content-type) 또는 None. 조회 시각을 갱신한다 (LRU)."""
+        with self._lock:
+            row = self._db.execute("SELECT content_type FROM blobs WHERE digest = ?", (digest,)).fetchone()
+            if row is None or not os.path.exists(self.path(digest)):
+                return None
+            self._db.execute("UPDATE blobs SET last_access = ? WHERE digest = ?", (time.time(), digest))
+            self._db.commit()
+        return self.path(digest), row[0]
+
+    # --- 축소본 (썸네일 등) ---
+    def variant(self, digest, width):
+        """원본을 가로 width 로 줄인 JPEG. (파일 경로, content-type, 축소본 digest) 또는 None."""
+        if width not in self.widths:
+            raise ValueError(f"허용하지 않는 크기: {width} (가능: {', '.join(map(str, self.widths))})")
+        if self.get(digest) is None:
+            return None
+        with self._lock:
+            row = self._db.execute(
+                "SELECT digest FROM blobs WHERE source = ? AND width = ?", (digest, width)).fetchone()
+        if row is not None:
+            found = self.get(row[0])
+            if found is not None:
+                return (*found, row[0])
+
+        from PIL import Image
+
+        with Image.open(self.path(digest)) as image:
+            if image.width > width:
+                image = image.resize((width, max(1, round(image.height * width / image.width))), Image.LANCZOS)
+            buffer = io.BytesIO()
+            image.convert("RGB").save(buffer, "JPEG", quality=85, optimize=True)
+        variant_digest = self.put(buffer.getvalue(), "image/jpeg", source=digest, width=width)
+        found = self.get(variant_digest)
+        return (*found, variant_digest) if found else None
+
+    # --- (keywords, style, seed) → 생성 결과 ---
+    def lookup(self, key):
+        """{"digest", "prompt", "seed"} 또는 None (이미지가 지워졌으면 None)."""
+        with self._lock:
+            row = self._db.execute("SELECT digest, prompt, seed FROM generations WHERE key = ?", (key,)).fetchone()
+        if row is None or self.get(row[0]) is None:
+            return None
+        return {"digest": row[0], "prompt": row[1], "seed": row[2]}
+
+    def bind(self, key, digest, prompt, seed):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO generations (key, digest, prompt, seed, created_at) VALUES (?, ?, ?, ?, ?)",
+                (key, digest, prompt, seed, time.time()))
+            self._db.commit()
+
+    # --- 용량 제한 ---
+    def _evict(self, keep=()):
+        # 가장 오래 안 본 파일부터. 원본이 지워지면 그 축소본과 생성 기록도 함께 지운다.
+        keep = [digest for digest in keep if digest]
+        placeholders = ", ".join("?" * len(keep))
+        while self._total > self.max_bytes:
+            row = self._db.execute(
+                f"SELECT digest FROM blobs WHERE digest NOT IN ({placeholders}) ORDER BY last_access LIMIT 1",
+                keep).fetchone()
+            if row is None:
+                break
+            self._delete(row[0])
+
+    def _delete(self, digest):
+        for (variant,) in self._db.execute("SELECT digest FROM blobs WHERE source = ?", (digest,)).fetchall():
+            self._delete(variant)
+        size = self._db.execute("SELECT size FROM blobs WHERE digest = ?", (digest,)).fetchone()
+        self._db.execute("DELETE FROM blobs WHERE digest = ?", (digest,))
+        self._db.execute("DELETE FROM generations WHERE digest = ?", (digest,))
+        try:
+            os.remove(self.path(digest))
+        except FileNotFoundError:
+            pass
+        if size:
+            self._total -= size[0]
+            self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            blobs, variants = self._db.execute(
+                "SELECT COUNT(*), COUNT(source) FROM blobs").fetchone()
+            generations = self._db.execute("SELECT COUNT(*) FROM generations").fetchone()[0]
+        return {
+            "root": self.root, "bytes": self._total, "max_bytes": self.max_bytes,
+            "blobs": blobs, "variants": variants, "generations": generations, "evictions": self.evictions,
+        }
+
+
+# =========================================================
+# 🎨 이미지 생성기
+# =========================================================
+class PollinationsGenerator:
+    """pollinations.ai 에서 이미지를 받아온다 (키 없음, 원격)."""
+
+    def __init__(self, base_url="https://image.pollinations.ai/prompt/", model="flux", timeout=120.0):
+        self.base_url = base_url
+        self.model = model
+        self.timeout = timeout
+        self._client = None
+
+    def url(self, prompt, seed, width, height):
+        return (f"{self.base_url}{quote(prompt)}?seed={seed}&width={width}&height={height}"
+                f"&nologo=true&model={self.model}")
+
+    async def generate(self, prompt, seed, width, height):
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=httpx.Timeout(self.timeout, connect=10.0), follow_redirects=True)
+        resp = await self._client.get(self.url(prompt, seed, width, height))
+        resp.raise_for_status()
+        return resp.content, resp.headers.get("content-type", "image/jpeg").split(";")[0]
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class LocalImageGenerator:
+    """네트워크 없이 (prompt, seed) 로 항상 같은 PNG 를 그린다 (테스트/오프라인 데모용)."""
+
+    async def generate(self, prompt, seed, width, height):
+        return await asyncio.to_thread(self._render, prompt, seed, width, height)
+
+    def _render(self, prompt, seed, width, height):
+        from PIL import Image, ImageDraw
+
+        rng = random.Random(hashlib.sha256(f"{prompt}|{seed}".encode("utf-8")).digest())
+        color = lambda: tuple(rng.randrange(256) for _ in range(3))
+        image = Image.new("RGB", (width, height), color())
+        draw = ImageDraw.Draw(image)
+        for _ in range(12):
+            x, y = rng.randrange(width), rng.randrange(height)
+            r = rng.randrange(width // 16, width // 3)
+            if rng.random() < 0.5:
+                draw.ellipse((x - r, y - r, x + r, y + r), fill=color())
+            else:
+                draw.rectangle((x - r, y - r // 2, x + r, y + r // 2), fill=color())
+        buffer = io.BytesIO()
+        image.save(buffer, "PNG")
+        return buffer.getvalue(), "image/png"
+
+    async def close(self):
+        pass
+
+
+def image_store_from_env():
+    widths = [int(w) for w in os.getenv("STUDIO_IMAGE_WIDTHS", "256,512").split(",") if w.strip()]
+    return ImageStore(
+        os.getenv("STUDIO_IMAGE_DIR", os.path.join("data", "studio_images")),
+        max_bytes=int(float(os.getenv("STUDIO_IMAGE_MAX_MB", "1024")) * 1024 * 1024),
+        widths=widths,
+    )
+
+
+def image_generator_from_env():
+    name = os.getenv("STUDIO_IMAGE_GENERATOR", "pollinations")
+    if name == "local":
+        return LocalImageGenerator()
+    if name != "pollinations":
+        raise ValueError(f"알 수 없는 STUDIO_IMAGE_GENERATOR: {name}")
+    return PollinationsGenerator()
+
+
+def image_size_from_env():
+    width, height = os.getenv("STUDIO_IMAGE_SIZE", "1024x768").lower().split("x")
+    return int(width), int(height)
@@ -0,0 +1,388 @@
+import asyncio
+import itertools
+import json
+import os
+import uuid
+from collections import defaultdict, namedtuple
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, select, update
+
+from . import database, models
+from .agent_client import AgentError
+
+# =========================================================
+# ⏳ 비동기 AI 작업 큐 (오래 걸리는 생성은 작업 id 로 바로 응답)
+# =========================================================
+#   JOB_WORKERS          프로세스당 워커 수 (기본 4, 0 이면 이 프로세스는 작업을 받기만 하고 실행하지 않음)
+#   JOB_MAX_ATTEMPTS     기본 최대 시도 횟수 (기본 3)
+#   JOB_RETRY_BACKOFF    재시도 대기 기준값, 초 (기본 5, 시도마다 2배)
+#   JOB_TIMEOUT          작업 하나의 기본 최대 실행 시간, 초 (기본 600)
+#   JOB_POLL_INTERVAL    브로커 알림이 없을 때 DB 를 확인하는 간격, 초 (기본 2)
+#   JOB_LEASE            실행 중 작업의 heartbeat 가 이만큼 끊기면 다시 QUEUED, 초 (기본 120)
+#
+# 작업의 원본은 ai_jobs 테이블이고, 브로커는 "새 작업 / 상태 변경" 알림만 나른다.
+#   - LocalBroker: 프로세스 안 우선순위 큐 + 구독 (단일 프로세스, 테스트)
+#   - 워커가 여러 프로세스에 있으면 각자 JOB_POLL_INTERVAL 마다 DB 에서 우선순위 순으로 가져간다.
+#     실행권은 조건부 UPDATE (QUEUED → RUNNING) 로 잡으므로 한 작업은 한 워커만 실행한다.
+# 재시작해도 QUEUED 는 그대로 남아 실행되고, heartbeat 가 끊긴 RUNNING 은 다시 QUEUED 로 돌린다.
+
+QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED = "QUEUED", "RUNNING", "SUCCEEDED", "FAILED", "CANCELLED"
+TERMINAL_STATUSES = (SUCCEEDED, FAILED, CANCELLED)
+
+JobKind = namedtuple("JobKind", "handler schema priority max_attempts timeout")
+
+
+def utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def is_retryable(exc):
+    # 에이전트가 4xx 로 거절했거나 입력이 잘못된 경우는 다시 해도 같으므로 바로 실패
+    if isinstance(exc, AgentError):
+        return exc.status_code >= 500 or exc.status_code == 429
+    return not isinstance(exc, (ValueError, TypeError, KeyError))
+
+
+def job_view(job):
+    return {
+        "job_id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "priority": job.priority,
+        "attempts": job.attempts,
+        "max_attempts": job.max_attempts,
+        "result": json.loads(job.result) if job.result else None,
+        "error": job.error,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
+
+
+class LocalBroker:
+    """프로세스 안 브로커: 새 작업은 우선순위 큐로, 상태 변경은 구독자 큐로."""
+
+    def __init__(self):
+        self._queue = None  # 이벤트 루프 안에서 처음 쓸 때 만든다
+        self._seq = itertools.count()
+        self._subscribers = defaultdict(set)
+
+    def _jobs(self):
+        if self._queue is None:
+            self._queue = asyncio.PriorityQueue()
+        return self._queue
+
+    def publish(self, job_id, priority):
+        self._jobs().put_nowait((-priority, next(self._seq), job_id))
+
+    async def next(self, timeout):
+        """우선순위가 가장 높은 작업 id, timeout 안에 없으면 None."""
+        if timeout <= 0:
+            try:
+                return self._jobs().get_nowait()[2]
+            except asyncio.QueueEmpty:
+                return None
+        try:
+            return (await asyncio.wait_for(self._jobs().get(), timeout))[2]
+        except asyncio.TimeoutError:
+            return None
+
+    def notify(self, job_id, event):
+        for queue in list(self._subscribers.get(job_id, ())):
+            queue.put_nowait(event)
+
+    @contextmanager
+    def subscribe(self, job_id):
+        queue = asyncio.Queue()
+        self._subscribers[job_id].add(queue)
+        try:
+            yield queue
+        finally:
+            self._subscribers[job_id].discard(queue)
+            if not self._subscribers[job_id]:
+                del self._subscribers[job_id]
+
+    def stats(self):
+        return {
+            "broker": "local",
+            "pending_messages": self._queue.qsize() if self._queue is not None else 0,
+            "subscribers": sum(len(s) for s in self._subscribers.values()),
+        }
+
+
+class JobQueue:
+    def __init__(self, broker, workers=4, max_attempts=3, backoff=5.0, timeout=600.0, poll_interval=2.0, lease=120.0):
+        self.broker = broker
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self._kinds = {}
+        self._tasks = []
+        self._running = {}  # job_id → 실행 task (이 프로세스)
+        self._cancelled = set()
+        self.counts = defaultdict(int)
+
+    def register(self, kind, handler, schema=None, priority=0, max_attempts=None, timeout=None):
+        """handler: async (payload dict) → JSON 으로 저장할 결과 dict. schema 가 있으면 제출 시 검증."""
+        self._kinds[kind] = JobKind(handler, schema, priority, max_attempts or self.max_attempts,
+                                    timeout or self.timeout)
+
+    @property
+    def kinds(self):
+        return sorted(self._kinds)
+
+    # --- 제출 / 조회 / 취소 ---
+    async def submit(self, kind, payload, priority=None, wallet_address=None):
+        spec = self._kinds.get(kind)
+        if spec is None:
+            raise KeyError(kind)
+        if spec.schema is not None:
+            payload = spec.schema(**payload).model_dump()  # 잘못된 입력은 제출 단계에서 ValidationError
+        now = utcnow()
+        job = models.AIJob(
+            id=uuid.uuid4().hex, kind=kind, wallet_address=wallet_address, status=QUEUED,
+            priority=spec.priority if priority is None else priority,
+            payload=json.dumps(payload, ensure_ascii=False), attempts=0, max_attempts=spec.max_attempts,
+            run_after=now, created_at=now,
+        )
+        async with database.AsyncSessionLocal() as db:
+            db.add(job)
+            await db.commit()
+        self.counts["submitted"] += 1
+        self.broker.publish(job.id, job.priority)
+        self._notify(job)
+        return job
+
+    async def get(self, job_id):
+        async with database.AsyncSessionLocal() as db:
+            return await db.get(models.AIJob, job_id)
+
+    async def recent(self, wallet_address, limit=20):
+        J = models.AIJob
+        async with database.AsyncSessionLocal() as db:
+            return (await db.scalars(
+                select(J).where(J.wallet_address == wallet_address).order_by(J.created_at.desc()).limit(limit)
+            )).all()
+
+    async def cancel(self, job_id):
+        """대기 중이면 바로 CANCELLED, 이 프로세스에서 실행 중이면 중단한다. 취소됐는지 여부."""
+        J = models.AIJob
+        async with database.AsyncSessionLocal() as db:
+            changed = (await db.execute(
+                update(J).where(J.id == job_id, J.status == QUEUED)
+                .values(status=CANCELLED, finished_at=utcnow(), error="취소됨")
+            )).rowcount
+            await db.commit()
+        if changed:
+            self.counts["cancelled"] += 1
+            job = await self.get(job_id)
+            self._notify(job)
+            return True
+        task = self._running.get(job_id)
+        if task is None:
+            return False
+        self._cancelled.add(job_id)
+        task.cancel()
+        await asyncio.wait({task}, timeout=5)
+        return True
+
+    def subscribe(self, job_id):
+        return self.broker.subscribe(job_id)
+
+    def _notify(self, job):
+        self.broker.notify(job.id, job_view(job))
+
+    # --- 워커 ---
+    def start(self):
+        if self._tasks or self.workers <= 0:
+            return
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._sweep()))
+        print(f"⏳ [Job] 워커 {self.workers}개 시작 ({', '.join(self.kinds)})")
+
+    async def stop(self):
+        running = list(self._running)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if running:
+            # 종료로 끊긴 작업은 시도 횟수를 되돌려 다시 대기 (다음 기동 때 또는 다른 프로세스가 실행)
+            J = models.AIJob
+            async with database.AsyncSessionLocal() as db:
+                await db.execute(
+                    update(J).where(J.id.in_(running), J.status == RUNNING)
+                    .values(status=QUEUED, attempts=J.attempts - 1, heartbeat_at=None, run_after=utcnow())
+                )
+                await db.commit()
+            print(f"⏳ [Job] 종료: 실행 중이던 작업 {len(running)}건 다시 대기")
+
+    async def _worker(self):
+        idle = True
+        while True:
+            try:
+                # 방금 작업을 끝냈으면 기다리지 않고 바로 다음 작업을 찾는다
+                job_id = await self.broker.next(self.poll_interval if idle else 0)
+                job = (await self._claim(job_id) if job_id else None) or await self._claim()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"🔥 [Job] 작업 가져오기 실패: {e}")
+                await asyncio.sleep(self.poll_interval)
+                continue
+            idle = job is None
+            if job is None:
+                continue
+            self._running[job.id] = task = asyncio.create_task(self._execute(job))
+            try:
+                await task
+            finally:
+                self._running.pop(job.id, None)
+
+    async def _claim(self, job_id=None):
+        """job_id (없으면 실행할 수 있는 작업 중 우선순위가 가장 높은 것) 의 실행권을 잡는다."""
+        J = models.AIJob
+        now = utcnow()
+        async with database.AsyncSessionLocal() as db:
+            if job_id is not None:
+                candidates = [job_id]
+            else:
+                candidates = (await db.scalars(
+                    select(J.id).where(J.status == QUEUED, J.run_after <= now)
+                    .order_by(J.priority.desc(), J.created_at).limit(self.workers)
+                )).all()
+            for candidate in candidates:
+                claimed = (await db.execute(
+                    update(J).where(J.id == candidate, J.status == QUEUED, J.run_after <= now)
+                    .values(status=RUNNING, attempts=J.attempts + 1, started_at=now, heartbeat_at=now)
+                )).rowcount
+                await db.commit()
+                if claimed:
+                    job = await db.get(J, candidate)
+                    self._notify(job)
+                    return job
+        return None
+
+    async def _execute(self, job):
+        spec = self._kinds.get(job.kind)
+        heartbeat = asyncio.create_task(self._heartbeat(job.id))
+        print(f"⏳ [Job] {job.kind} {job.id[:8]} 시작 ({job.attempts}/{job.max_attempts})")
+        try:
+            if spec is None:
+                raise KeyError(f"등록되지 않은 작업 종류: {job.kind}")
+            result = await asyncio.wait_for(spec.handler(json.loads(job.payload)), spec.timeout)
+        except asyncio.CancelledError:
+            if job.id not in self._cancelled:
+                raise  # 종료 중 → stop() 이 다시 대기 상태로 돌린다
+            self._cancelled.discard(job.id)
+            await self._finish(job, CANCELLED, error="취소됨")
+            return
+        except asyncio.TimeoutError:
+            await self._fail(job, TimeoutError(f"시간 초과 ({spec.timeout:g}s)"))
+            return
+        except Exception as e:
+            await self._fail(job, e)
+            return
+        finally:
+            heartbeat.cancel()
+        await self._finish(job, SUCCEEDED, result=result)
+
+    async def _finish(self, job, status, result=None, error=None):
+        J = models.AIJob
+        values = {
+            "status": status, "finished_at": utcnow(), "heartbeat_at": None, "error": error,
+            "result": json.dumps(result, ensure_ascii=False) if result is not None else None,
+        }
+        async with database.AsyncSessionLocal() as db:
+            await db.execute(update(J).where(J.id == job.id, J.status == RUNNING).values(**values))
+            await db.commit()
+        for key, value in values.items():
+            setattr(job, key, value)
+        self.counts[status.lower()] += 1
+        print(f"{'✅' if status == SUCCEEDED else '⏹️'} [Job] {job.kind} {job.id[:8]} {status}")
+        self._notify(job)
+
+    async def _fail(self, job, exc):
+        error = f"{type(exc).__name__}: {exc}" if str(exc) else type(exc).__name__
+        if job.attempts >= job.max_attempts or not is_retryable(exc):
+            print(f"🔥 [Job] {job.kind} {job.id[:8]} 실패: {error}")
+            await self._finish(job, FAILED, error=error)
+            return
+        # 지수 백오프 뒤 다시 QUEUED (그 시각이 지나면 DB 확인 주기에 다시 잡힌다)
+        delay = self.backoff * (2 ** (job.attempts - 1))
+        J = models.AIJob
+        values = {"status": QUEUED, "run_after": utcnow() + timedelta(seconds=delay), "heartbeat_at": None,
+                  "error": error}
+        async with database.AsyncSessionLocal() as db:
+            await db.execute(update(J).where(J.id == job.id, J.status == RUNNING).values(**values))
+            await db.commit()
+        for key, value in values.items():
+            setattr(job, key, value)
+        self.counts["retried"] += 1
+        print(f"🔁 [Job] {job.kind} {job.id[:8]} {job.attempts}/{job.max_attempts} 실패, {delay:g}s 뒤 재시도: {error}")
+        self._notify(job)
+
+    async def _heartbeat(self, job_id):
+        J = models.AIJob
+        while True:
+            await asyncio.sleep(self.lease / 3)
+            async with database.AsyncSessionLocal() as db:
+                await db.execute(update(J).where(J.id == job_id, J.status == RUNNING).values(heartbeat_at=utcnow()))
+                await db.commit()
+
+    async def _sweep(self):
+        while True:
+            try:
+                await self.recover()
+            except Exception as e:
+                print(f"🔥 [Job] 중단된 작업 복구 실패: {e}")
+            await asyncio.sleep(self.lease / 2)
+
+    async def recover(self):
+        """heartbeat 가 끊긴 RUNNING 작업 (워커 프로세스가 죽은 경우) 을 다시 대기시키거나, 시도를 다 썼으면 실패."""
+        J = models.AIJob
+        now = utcnow()
+        stale = (J.status == RUNNING, J.heartbeat_at < now - timedelta(seconds=self.lease))
+        async with database.AsyncSessionLocal() as db:
+            requeued = (await db.execute(
+                update(J).where(*stale, J.attempts < J.max_attempts)
+                .values(status=QUEUED, run_after=now, heartbeat_at=None, error="워커 중단으로 다시 대기")
+            )).rowcount
+            failed = (await db.execute(
+                update(J).where(*stale).values(status=FAILED, finished_at=now, heartbeat_at=None, error="워커 중단")
+            )).rowcount
+            await db.commit()
+        if requeued or failed:
+            self.counts["recovered"] += requeued
+            print(f"🩹 [Job] 중단된 작업 복구: 다시 대기 {requeued}, 실패 {failed}")
+        return requeued, failed
+
+    async def stats(self):
+        J = models.AIJob
+        async with database.AsyncSessionLocal() as db:
+            by_status = dict((await db.execute(select(J.status, func.count()).group_by(J.status))).all())
+        return {
+            "workers": self.workers,
+            "kinds": self.kinds,
+            "running_here": len(self._running),
+            "by_status": by_status,
+            "counts": dict(self.counts),
+            **self.broker.stats(),
+        }
+
+
+def job_queue_from_env():
+    return JobQueue(
+        LocalBroker(),
+        workers=int(os.getenv("JOB_WORKERS", "4")),
+        max_attempts=int(os.getenv("JOB_MAX_ATTEMPTS", "3")),
+        backoff=float(os.getenv("JOB_RETRY_BACKOFF", "5")),
+        timeout=float(os.getenv("JOB_TIMEOUT", "600")),
+        poll_interval=float(os.getenv("JOB_POLL_INTERVAL", "2")),
+        lease=float(os.getenv("JOB_LEASE", "120")),
+    )
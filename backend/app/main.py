@@ -1,24 +1,87 @@
-from fastapi import FastAPI, Depends, Query, HTTPException
+from fastapi import BackgroundTasks, FastAPI, Depends, Query, HTTPException, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
-from app import models, schemas, database
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from sqlalchemy import and_, desc, func, insert, or_, select
+from pydantic import ValidationError
+from app import models, schemas, database, migrations
+from app.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor, split_page
+from app.profile_cache import profile_cache_from_env
+from app.agent_client import AgentError, agent_client_from_env
+from app.feedback_buffer import feedback_buffer_from_env
+from app.recommender import recommender_from_env, reindex_on_commit
+from app.semantic_cache import chat_scope, semantic_cache_from_env
+from app import docent_scripts
+from app.chain_indexer import dao_contract_from_env, dao_indexer_from_env
+from app.jobs import TERMINAL_STATUSES, job_queue_from_env, job_view
+from app.image_store import (
+    DIGEST_PATTERN, default_seed, generation_key, image_generator_from_env, image_size_from_env, image_store_from_env,
+)
+from contextlib import asynccontextmanager
+from datetime import datetime
 from typing import List, Optional
+import asyncio
+import os
 import time
-import requests
 import json
-import urllib.parse # ✅ URL 인코딩을 위해 추가 필요
-import random
 
 
-# AI 에이전트 서버 주소 (도커 서비스 이름 사용)
-AI_AGENT_URL = "http://art_ai_agent:8002"
+# AI 에이전트 클라이언트 (주소는 AI_AGENT_URL, 기본값은 도커 서비스 이름)
+ai_agent = agent_client_from_env()
+
+# 마이페이지 유저 요약 캐시 (PROFILE_CACHE_URL 로 워커 간 공유 캐시 사용 가능)
+profile_cache = profile_cache_from_env()
+
+# 관람평 쓰기 버퍼 (FEEDBACK_WRITE_MODE=group|async 일 때만, 기본은 요청마다 INSERT)
+feedback_buffer = feedback_buffer_from_env(database.async_engine, models.GalleryFeedback.__table__)
+
+# 맞춤 작품 추천 (CHROMA_URL 이 있으면 Chroma, 없으면 워커 메모리 NumPy 인덱스)
+recommender = recommender_from_env()
+reindex_on_commit(recommender)
+
+# 큐레이터 채팅 의미 캐시 (비슷한 질문은 저장된 답변 재사용, SEMANTIC_CACHE_MAX=0 이면 끔)
+chat_cache = semantic_cache_from_env()
+
+# 스튜디오 이미지: 내용 주소 저장소 + 생성기 (STUDIO_IMAGE_GENERATOR=local 이면 네트워크 없이)
+image_store = image_store_from_env()
+image_generator = image_generator_from_env()
+
+# 도슨트 대본: 작품이 추가/수정되면 백그라운드로 미리 만들어 docent_scripts 테이블에 저장
+docent_pipeline = docent_scripts.docent_pipeline_from_env(ai_agent)
+docent_scripts.watch_gallery_items(docent_pipeline)
+
+# 온체인 DAO 안건: 인덱서(python -m app.chain_indexer run, 별도 프로세스)가 채운 dao_* 테이블을 조회
+dao_contract = dao_contract_from_env()
+dao_indexer = dao_indexer_from_env() if dao_contract else None
+
+# 오래 걸리는 AI 생성 작업 큐 (ai_jobs 테이블 + 워커 풀, 작업 종류는 아래 ⏳ 섹션에서 등록)
+job_queue = job_queue_from_env()
 
 
-# DB 테이블 생성
-models.Base.metadata.create_all(bind=database.engine)
+# DB 테이블/인덱스는 배포 시 `python -m app.migrations upgrade` 로 한 번만 만든다
+# (워커마다 import 시 create_all 로 DDL 조회를 하지 않도록)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    migrations.check_on_startup()
+    # 에이전트 연결 풀은 앱이 떠 있는 동안 하나만 유지
+    await ai_agent.start()
+    docent_pipeline.start()
+    job_queue.start()
+    yield
+    await job_queue.stop()
+    await docent_pipeline.stop()
+    if feedback_buffer is not None:
+        await feedback_buffer.stop()
+    await ai_agent.close()
+    await profile_cache.close()
+    await image_generator.close()
+    if dao_indexer is not None:
+        await dao_indexer.rpc.close()
+    await database.async_engine.dispose()
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -26,24 +89,77 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 get_db = database.get_db
 
+# =========================================================
+# 📡 AI 스트리밍(SSE) 중계 헬퍼
+# =========================================================
+# agent.py의 /<agent>/stream 응답을 받는 즉시 한 조각씩 그대로 흘려보낸다.
+# 연결 실패/에러 응답이면 기존 일반 API와 같은 대체 문구를 done 이벤트로 보낸다.
+def _sse_event(data, event=None):
+    head = f"event: {event}\n" if event else ""
+    return f"{head}data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def _sse_done(raw: str):
+    # 모아 둔 SSE 원문에서 done 이벤트의 data 를 찾는다 (없으면 None)
+    for block in raw.split("\n\n"):
+        lines = block.strip().splitlines()
+        if lines and lines[0] == "event: done":
+            for line in lines[1:]:
+                if line.startswith("data: "):
+                    return json.loads(line[len("data: "):])
+    return None
+
+def relay_agent_stream(path: str, payload: dict, key: str, fallback: str, on_done=None):
+    # on_done: 스트림이 정상 완료되면 done 이벤트 data 로 호출 (예: 결과 저장)
+    async def generate():
+        raw = [] if on_done else None
+        try:
+            async with ai_agent.stream(path, payload) as resp:
+                async for chunk in resp.aiter_raw():
+                    if raw is not None:
+                        raw.append(chunk)
+                    yield chunk
+        except AgentError as e:
+            print(f"🔥 AI 스트림 에러: {e.status_code}")
+            yield _sse_event({key: fallback}, "done")
+            return
+        except Exception as e:
+            print(f"🔥 스트림 통신 에러: {str(e)}")
+            yield _sse_event({key: fallback}, "done")
+            return
+        if raw is not None:
+            done = _sse_done(b"".join(raw).decode("utf-8", errors="replace"))
+            if done and done.get(key):
+                try:
+                    await on_done(done)
+                except Exception as e:
+                    print(f"🔥 스트림 결과 처리 에러: {str(e)}")
+
+    return StreamingResponse(
+        generate(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 # =========================================================
 # 1. 🔑 인증 & 유저 관리 (DB 연동)
 # =========================================================
 @app.post("/api/auth/wallet-login")
-def wallet_login(req: schemas.WalletLoginRequest, db: Session = Depends(get_db)):
+async def wallet_login(req: schemas.WalletLoginRequest, db: AsyncSession = Depends(get_db)):
     # 1. 유저 확인
-    user = db.query(models.User).filter(models.User.wallet_address == req.wallet_address).first()
+    user = await db.get(models.User, req.wallet_address)
     
     # 2. 없으면 자동 가입
     if not user:
         user = models.User(wallet_address=req.wallet_address, token_balance=100.0)
         db.add(user)
-        db.commit()
-        db.refresh(user)
+        await db.commit()
+        await db.refresh(user)
+        await profile_cache.set(user.wallet_address, user_summary(user))
     
     return {"status": "success", "wallet_address": user.wallet_address}
 
@@ -55,31 +171,52 @@ def logout(wallet_address: str):
     return {"status": "success", "message": "Logged out successfully"}
 
 # 유저 조회 헬퍼 함수
-def get_user_or_404(wallet_address: str, db: Session):
-    user = db.query(models.User).filter(models.User.wallet_address == wallet_address).first()
+async def get_user_or_404(wallet_address: str, db: AsyncSession):
+    user = await db.get(models.User, wallet_address)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
 
+# 유저 요약 (캐시 → 없으면 DB 한 번 조회 후 캐시)
+USER_SUMMARY_FIELDS = (
+    "wallet_address", "nickname", "membership_grade", "token_balance",
+    "pending_rewards", "is_delegated", "delegated_to", "badge",
+)
+
+def user_summary(user: models.User) -> dict:
+    return {field: getattr(user, field) for field in USER_SUMMARY_FIELDS}
+
+async def get_user_summary_or_404(wallet_address: str, db: AsyncSession) -> dict:
+    summary = await profile_cache.get(wallet_address)
+    if summary is None:
+        summary = user_summary(await get_user_or_404(wallet_address, db))
+        await profile_cache.set(wallet_address, summary)
+    return summary
+
+# 마이페이지용 통합 조회 (멤버십/잔액/보상/위임/뱃지를 한 번에)
+@app.get("/api/user/summary", response_model=schemas.UserSummaryResponse)
+async def get_user_summary(wallet_address: str, db: AsyncSession = Depends(get_db)):
+    return await get_user_summary_or_404(wallet_address, db)
+
 @app.get("/api/user/membership")
-def get_membership(wallet_address: str, db: Session = Depends(get_db)):
-    user = get_user_or_404(wallet_address, db)
-    return {"grade": user.membership_grade}
+async def get_membership(wallet_address: str, db: AsyncSession = Depends(get_db)):
+    user = await get_user_summary_or_404(wallet_address, db)
+    return {"grade": user["membership_grade"]}
 
 @app.get("/api/wallet/balance")
-def get_token_balance(wallet_address: str, db: Session = Depends(get_db)):
-    user = get_user_or_404(wallet_address, db)
-    return {"balance": user.token_balance}
+async def get_token_balance(wallet_address: str, db: AsyncSession = Depends(get_db)):
+    user = await get_user_summary_or_404(wallet_address, db)
+    return {"balance": user["token_balance"]}
 
 @app.get("/api/wallet/rewards")
-def get_pending_rewards(wallet_address: str, db: Session = Depends(get_db)):
-    user = get_user_or_404(wallet_address, db)
-    return {"pending_amount": user.pending_rewards}
+async def get_pending_rewards(wallet_address: str, db: AsyncSession = Depends(get_db)):
+    user = await get_user_summary_or_404(wallet_address, db)
+    return {"pending_amount": user["pending_rewards"]}
 
 @app.get("/api/dao/delegation")
-def get_delegation_status(wallet_address: str, db: Session = Depends(get_db)):
-    user = get_user_or_404(wallet_address, db)
-    return {"delegated_to": user.delegated_to, "amount": 0}
+async def get_delegation_status(wallet_address: str, db: AsyncSession = Depends(get_db)):
+    user = await get_user_summary_or_404(wallet_address, db)
+    return {"delegated_to": user["delegated_to"], "amount": 0}
 
 @app.get("/api/user/activity")
 def get_user_activity(wallet_address: str):
@@ -89,102 +226,337 @@ def get_user_activity(wallet_address: str):
 def get_referral_stats(wallet_address: str):
     return {"invite_count": 0, "reward": 0}
 
-@app.get("/api/user/proposals")
-def get_my_proposals(wallet_address: str, db: Session = Depends(get_db)):
-    return db.query(models.ArtRequest).filter(models.ArtRequest.wallet_address == wallet_address).all()
+@app.get("/api/user/proposals", response_model=List[schemas.ProposalResponse])
+async def get_my_proposals(
+    wallet_address: str,
+    response: Response,
+    cursor: Optional[str] = Query(None, description="이전 응답의 X-Next-Cursor 헤더 값"),
+    limit: int = Query(50, ge=1, le=200),
+    db: AsyncSession = Depends(get_db)
+):
+    # (wallet_address, created_at, id) 인덱스를 타는 최신순 keyset 페이지
+    stmt = select(models.ArtRequest).where(models.ArtRequest.wallet_address == wallet_address)
+    rows, next_cursor = await proposals_page(db, stmt, cursor, limit, descending=True)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return rows
 
 # [복구] 마이페이지 개인별 전시 추천 (명세서: GET /api/user/recommend)
 @app.get("/api/user/recommend", response_model=schemas.RecommendationResponse)
-def get_user_recommendation(wallet_address: str, db: Session = Depends(get_db)):
-    return {
-        "title": "디지털 르네상스: 비트코인과 예술",
-        "reason": "회원님의 최근 활동(사이버펑크 선호)을 분석하여 추천된 전시입니다."
-    }
+async def get_user_recommendation(wallet_address: str, db: AsyncSession = Depends(get_db)):
+    # user_recommendations 에 미리 계산된 추천 중 1순위 (없거나 오래되면 다시 계산)
+    recs = await recommender.get(db, wallet_address, 1)
+    if not recs:
+        return {
+            "title": "추천할 작품이 아직 없습니다",
+            "reason": "갤러리에 작품이 등록되면 회원님의 활동을 바탕으로 추천해 드립니다."
+        }
+    return {"title": recs[0]["title"], "reason": recs[0]["reason"]}
 
 # [복구] 큐레이터 뱃지 관리 (명세서: PATCH /api/user/badge)
 @app.patch("/api/user/badge")
-def update_user_badge(wallet_address: str, db: Session = Depends(get_db)):
-    user = get_user_or_404(wallet_address, db)
+async def update_user_badge(wallet_address: str, db: AsyncSession = Depends(get_db)):
+    user = await get_user_or_404(wallet_address, db)
     user.badge = "Certified Curator" # 예시 로직
-    db.commit()
+    await db.commit()
+    await profile_cache.set(wallet_address, user_summary(user))
     return {"status": "updated", "badge": "Certified Curator"}
 
 
 # =========================================================
 # 2. 🖼️ 온라인 전시관 & 관람평
 # =========================================================
+# 관람평 포함 방식: full(전체, 기본) | latest(작품별 최신 N개) | count(개수만) | none
+GALLERY_FEEDBACK_MODES = ("full", "latest", "count", "none")
+
+async def _feedback_counts(db: AsyncSession, item_ids):
+    rows = await db.execute(
+        select(models.GalleryFeedback.item_id, func.count(models.GalleryFeedback.id))
+        .where(models.GalleryFeedback.item_id.in_(item_ids))
+        .group_by(models.GalleryFeedback.item_id)
+    )
+    return dict(rows.all())
+
+async def _latest_feedbacks(db: AsyncSession, item_ids, per_item: int):
+    # 작품별 최신 N개를 윈도 함수 한 번으로 조회 (MySQL 8 / SQLite 3.25+)
+    rank = func.row_number().over(
+        partition_by=models.GalleryFeedback.item_id,
+        order_by=(models.GalleryFeedback.created_at.desc(), models.GalleryFeedback.id.desc()),
+    ).label("rank")
+    ranked = (
+        select(models.GalleryFeedback.id.label("id"), rank)
+        .where(models.GalleryFeedback.item_id.in_(item_ids))
+        .subquery()
+    )
+    rows = await db.scalars(
+        select(models.GalleryFeedback)
+        .join(ranked, ranked.c.id == models.GalleryFeedback.id)
+        .where(ranked.c.rank <= per_item)
+        .order_by(models.GalleryFeedback.item_id, ranked.c.rank)
+    )
+    grouped = {}
+    for fb in rows:
+        grouped.setdefault(fb.item_id, []).append(fb)
+    return grouped
+
+async def load_gallery_page(db: AsyncSession, cursor: Optional[str], limit: int, feedbacks: str, feedback_limit: int):
+    """작품 한 페이지 + 관람평을 IN 쿼리로 한 번에 불러온다. (결과, 다음 커서)를 반환."""
+    query = select(models.GalleryItem)
+    if feedbacks == "full":
+        query = query.options(selectinload(models.GalleryItem.feedbacks))
+    if cursor:
+        last_id = decode_cursor(cursor).get("id")
+        if not isinstance(last_id, int):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.where(models.GalleryItem.id > last_id)
+    rows = await db.scalars(query.order_by(models.GalleryItem.id).limit(limit + 1))
+    items, has_more = split_page(rows.all(), limit)
+    next_cursor = encode_cursor({"id": items[-1].id}) if has_more else None
+
+    if feedbacks == "full":
+        return items, next_cursor
+
+    ids = [item.id for item in items]
+    counts = await _feedback_counts(db, ids) if ids and feedbacks != "none" else {}
+    latest = await _latest_feedbacks(db, ids, feedback_limit) if ids and feedbacks == "latest" else {}
+    page = []
+    for item in items:
+        page.append({
+            "id": item.id,
+            "title": item.title,
+            "artist_address": item.artist_address,
+            "image_url": item.image_url,
+            "description": item.description,
+            "feedbacks": latest.get(item.id, []),
+            "feedback_count": counts.get(item.id, 0) if feedbacks != "none" else None,
+        })
+    return page, next_cursor
+
 @app.get("/api/gallery/items", response_model=List[schemas.GalleryItemResponse])
-def get_gallery_items(db: Session = Depends(get_db)):
-    return db.query(models.GalleryItem).all()
+async def get_gallery_items(
+    response: Response,
+    cursor: Optional[str] = Query(None, description="이전 응답의 X-Next-Cursor 헤더 값"),
+    limit: int = Query(50, ge=1, le=200),
+    feedbacks: str = Query("full", enum=list(GALLERY_FEEDBACK_MODES)),
+    feedback_limit: int = Query(3, ge=1, le=50, description="feedbacks=latest 일 때 작품별 개수"),
+    db: AsyncSession = Depends(get_db)
+):
+    page, next_cursor = await load_gallery_page(db, cursor, limit, feedbacks, feedback_limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return page
 
 @app.post("/api/gallery/feedback")
-def create_feedback(item_id: int, content: str, wallet_address: str, db: Session = Depends(get_db)):
+async def create_feedback(item_id: int, content: str, wallet_address: str, db: AsyncSession = Depends(get_db)):
+    # 없는 작품이면 여기서 거절 (버퍼에 들어간 뒤 FK 위반으로 묶음 전체가 실패하지 않도록)
+    if await db.get(models.GalleryItem, item_id) is None:
+        raise HTTPException(status_code=404, detail="Item not found")
+    if feedback_buffer is not None:
+        row = {"item_id": item_id, "content": content, "wallet_address": wallet_address}
+        try:
+            await feedback_buffer.add(row)
+        except Exception as e:
+            print(f"🔥 관람평 저장 에러: {str(e)}")
+            raise HTTPException(status_code=503, detail="Feedback could not be saved")
+        return {"status": "feedback_saved" if feedback_buffer.durable else "feedback_queued"}
+
     feedback = models.GalleryFeedback(
         item_id=item_id, 
         content=content, 
         wallet_address=wallet_address
     )
     db.add(feedback)
-    db.commit()
+    await db.commit()
     return {"status": "feedback_saved"}
 
+# 관람평 여러 건을 한 번의 multi-row INSERT (한 트랜잭션)로 저장
+@app.post("/api/gallery/feedback/bulk")
+async def create_feedback_bulk(req: schemas.FeedbackBulkRequest, db: AsyncSession = Depends(get_db)):
+    if not req.items:
+        return {"status": "feedback_saved", "count": 0}
+    item_ids = {item.item_id for item in req.items}
+    found = set((await db.scalars(select(models.GalleryItem.id).where(models.GalleryItem.id.in_(item_ids)))).all())
+    if found != item_ids:
+        raise HTTPException(status_code=404, detail=f"Item not found: {sorted(item_ids - found)}")
+    await db.execute(insert(models.GalleryFeedback), [item.model_dump() for item in req.items])
+    await db.commit()
+    return {"status": "feedback_saved", "count": len(req.items)}
+
 # ==========================================
 # [추가] 도슨트 기능 (작품 설명 생성)
 # ==========================================
+# 작품 + 관람객 유형별 대본은 docent_scripts 테이블에 미리 만들어 두고 (작품 추가/수정 시, backfill)
+# 여기서는 유니크 인덱스 조회 한 번으로 돌려준다. 없으면 그 자리에서 만들어 저장한다.
+_docent_jobs = {}
+
+async def docent_script_on_demand(item: models.GalleryItem, audience_type: str):
+    # 같은 작품에 요청이 몰려도 생성은 한 번만
+    key = (item.id, audience_type)
+    job = _docent_jobs.get(key)
+    if job is None:
+        job = _docent_jobs[key] = asyncio.ensure_future(docent_scripts.generate_one(ai_agent, item, audience_type))
+        job.add_done_callback(lambda _: _docent_jobs.pop(key, None))
+    return await asyncio.shield(job)
+
 @app.post("/api/gallery/docent")
-def generate_docent_script(item_id: int = 0):
-    print(f"📡 [Backend] 도슨트 요청 (ID: {item_id})")
-    
-    # 1. DB에서 작품 찾기 (없으면 임시 데이터 사용)
-    # (실제로는 DB에서 조회해야 하지만, 여기선 예시로 처리)
-    art_info = "신비로운 사이버펑크 도시의 밤 풍경" # 기본값
-    
-    # 2. AI 에이전트(도슨트)에게 대본 요청
+async def generate_docent_script(
+    item_id: int,
+    audience_type: str = docent_scripts.DEFAULT_AUDIENCE,
+    db: AsyncSession = Depends(get_db)
+):
+    script = await docent_scripts.get_script(db, item_id, audience_type)
+    if script is not None:
+        return {"text_script": script}
+
+    print(f"📡 [Backend] 도슨트 대본 생성 (ID: {item_id}, {audience_type})")
+    item = await db.get(models.GalleryItem, item_id)
+    if not item:
+        raise HTTPException(status_code=404, detail="Item not found")
+    await db.close()  # 생성하는 동안 DB 커넥션을 잡고 있지 않도록
+
+    # 실패 문구는 저장하지 않는다 (다음 요청에서 다시 생성)
     try:
-        payload = {
-            "art_info": art_info,
-            "audience_type": "일반 관람객"
-        }
-        # agent.py의 /docent 엔드포인트 호출
-        response = requests.post(f"{AI_AGENT_URL}/docent", json=payload, timeout=10)
-        
-        if response.status_code == 200:
-            script = response.json().get("commentary", "작품 설명을 불러오지 못했습니다.")
-            return {"text_script": script}
-        else:
-            return {"text_script": "AI 도슨트가 현재 바쁩니다."}
-            
+        return {"text_script": await docent_script_on_demand(item, audience_type)}
+    except AgentError:
+        return {"text_script": "AI 도슨트가 현재 바쁩니다."}
     except Exception as e:
         print(f"🔥 도슨트 에러: {str(e)}")
         return {"text_script": "잠시 후 다시 시도해주세요."}
 
+# ==========================================
+# [추가] 갤러리 전체 일괄 생성 (도슨트/비평/홍보)
+# ==========================================
+# 작품 정보 → agent.py /batch/{persona} 항목 변환
+GALLERY_BATCH_PERSONAS = {
+    "docent": ("commentary", lambda item, aud: {"art_info": docent_scripts.art_info(item.title, item.description), "audience_type": aud}),
+    "critic": ("review_text", lambda item, aud: {"art_info": docent_scripts.art_info(item.title, item.description)}),
+    "marketer": ("promo_text", lambda item, aud: {"exhibition_title": item.title, "target_audience": aud}),
+}
+GALLERY_BATCH_CHUNK = 100  # agent.py의 AI_BATCH_MAX_ITEMS 기본값과 맞춤
+
+@app.post("/api/gallery/batch/{persona}")
+async def batch_gallery_items(
+    persona: str,
+    audience_type: str = "일반 관람객",
+    max_concurrency: int = Query(4, ge=1, le=32),
+    db: AsyncSession = Depends(get_db)
+):
+    if persona not in GALLERY_BATCH_PERSONAS:
+        raise HTTPException(status_code=404, detail=f"Unsupported persona: {persona}")
+    result_key, to_payload = GALLERY_BATCH_PERSONAS[persona]
+
+    items = (await db.scalars(select(models.GalleryItem).order_by(models.GalleryItem.id))).all()
+    print(f"📡 [Backend] 갤러리 일괄 생성 요청: {persona} x {len(items)}")
+
+    results = []
+    for start in range(0, len(items), GALLERY_BATCH_CHUNK):
+        chunk = items[start:start + GALLERY_BATCH_CHUNK]
+        payload = {
+            "items": [to_payload(item, audience_type) for item in chunk],
+            "max_concurrency": max_concurrency
+        }
+        try:
+            # 수백 건을 다시 생성하는 비싼 호출이므로 연결 실패일 때만 재시도
+            outputs = (await ai_agent.post(f"/batch/{persona}", payload, idempotent=False))["results"]
+        except Exception as e:
+            print(f"🔥 일괄 생성 에러: {str(e)}")
+            outputs = [{"error": "AI 에이전트와 연결할 수 없습니다."}] * len(chunk)
+
+        for item, output in zip(chunk, outputs):
+            entry = {"item_id": item.id, "title": item.title}
+            if "error" in output:
+                entry["error"] = output["error"]
+            else:
+                entry["text"] = output.get(result_key, "")
+            results.append(entry)
+
+    return {"persona": persona, "total": len(results), "results": results}
+
+@app.post("/api/gallery/docent/stream")
+async def stream_docent_script(
+    item_id: int,
+    audience_type: str = docent_scripts.DEFAULT_AUDIENCE,
+    db: AsyncSession = Depends(get_db)
+):
+    script = await docent_scripts.get_script(db, item_id, audience_type)
+    if script is not None:
+        # 저장된 대본은 한 번에 흘려보낸다 (에이전트 캐시 적중과 같은 형식)
+        async def stored():
+            yield _sse_event({"delta": script})
+            yield _sse_event({"commentary": script}, "done")
+        return StreamingResponse(stored(), media_type="text/event-stream",
+                                 headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+    print(f"📡 [Backend] 도슨트 스트리밍 생성 (ID: {item_id}, {audience_type})")
+    item = await db.get(models.GalleryItem, item_id)
+    if not item:
+        raise HTTPException(status_code=404, detail="Item not found")
+    await db.close()
+    digest = docent_scripts.source_hash(item.title, item.description, audience_type)
+
+    async def save(done):
+        await docent_scripts.save_script(item_id, audience_type, done["commentary"], digest)
+
+    payload = {"art_info": docent_scripts.art_info(item.title, item.description), "audience_type": audience_type}
+    return relay_agent_stream("/docent/stream", payload, "commentary", "잠시 후 다시 시도해주세요.", on_done=save)
+
+@app.get("/api/gallery/docent/stats")
+def docent_stats():
+    return docent_pipeline.stats()
+
 
 # =========================================================
 # 3. 안건 (Proposals)
 # =========================================================
+# (created_at, id) 기준 keyset 페이지. 커서가 없으면 offset 으로 시작 위치를 잡는다 (기존 page 호환).
+async def proposals_page(db: AsyncSession, query, cursor: Optional[str], limit: int, descending: bool, offset: int = 0):
+    created_at, pk = models.ArtRequest.created_at, models.ArtRequest.id
+    if cursor:
+        values = decode_cursor(cursor)
+        try:
+            last_created = datetime.fromisoformat(values["created_at"])
+            last_id = int(values["id"])
+        except (KeyError, TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        if descending:
+            query = query.where(or_(created_at < last_created, and_(created_at == last_created, pk < last_id)))
+        else:
+            query = query.where(or_(created_at > last_created, and_(created_at == last_created, pk > last_id)))
+
+    order = (created_at.desc(), pk.desc()) if descending else (created_at.asc(), pk.asc())
+    query = query.order_by(*order)
+    if offset and not cursor:
+        query = query.offset(offset)
+    rows, has_more = split_page((await db.scalars(query.limit(limit + 1))).all(), limit)
+    next_cursor = None
+    if has_more:
+        last = rows[-1]
+        next_cursor = encode_cursor({"created_at": last.created_at.isoformat(), "id": last.id})
+    return rows, next_cursor
+
 @app.get("/api/proposals", response_model=List[schemas.ProposalResponse], summary="안건 목록 조회")
-def get_proposals(
+async def get_proposals(
+    response: Response,
     status: Optional[str] = Query(None),
     sort: Optional[str] = Query("latest"),
     page: int = Query(1, ge=1),
     limit: int = Query(10, ge=1, le=100),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="이전 응답의 X-Next-Cursor 헤더 값 (지정하면 page 무시)"),
+    db: AsyncSession = Depends(get_db)
 ):
-    query = db.query(models.ArtRequest)
+    query = select(models.ArtRequest)
     if status:
-        query = query.filter(models.ArtRequest.status == status)
-    
-    if sort == "latest":
-        query = query.order_by(models.ArtRequest.created_at.desc())
-    elif sort == "oldest":
-        query = query.order_by(models.ArtRequest.created_at.asc())
-    
-    offset = (page - 1) * limit
-    return query.offset(offset).limit(limit).all()
+        query = query.where(models.ArtRequest.status == status)
+
+    # (status, created_at, id) 인덱스 순서 그대로 읽고, 깊은 페이지는 커서로 이어서 조회
+    rows, next_cursor = await proposals_page(db, query, cursor, limit, descending=(sort != "oldest"), offset=(page - 1) * limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return rows
 
 # [안건 DB 저장]
 @app.post("/api/proposals", summary="안건 생성(DB저장)")
-def create_proposal(req: schemas.ProposalCreate, db: Session = Depends(get_db)):
+async def create_proposal(req: schemas.ProposalCreate, db: AsyncSession = Depends(get_db)):
     new_p = models.ArtRequest(
         wallet_address=req.wallet_address,
         title=req.title,
@@ -195,13 +567,13 @@ def create_proposal(req: schemas.ProposalCreate, db: Session = Depends(get_db)):
         status="OPEN"
     )
     db.add(new_p)
-    db.commit()
-    db.refresh(new_p)
+    await db.commit()
+    await db.refresh(new_p)
     return new_p
 
 @app.patch("/api/proposals/{proposal_id}")
-def update_proposal(proposal_id: int, req: schemas.ProposalUpdate, db: Session = Depends(get_db)):
-    proposal = db.query(models.ArtRequest).filter(models.ArtRequest.id == proposal_id).first()
+async def update_proposal(proposal_id: int, req: schemas.ProposalUpdate, db: AsyncSession = Depends(get_db)):
+    proposal = await db.get(models.ArtRequest, proposal_id)
     if not proposal:
         raise HTTPException(status_code=404, detail="Proposal not found")
     
@@ -210,20 +582,76 @@ def update_proposal(proposal_id: int, req: schemas.ProposalUpdate, db: Session =
     if req.meta_hash: proposal.meta_hash = req.meta_hash
     if req.image_url: proposal.image_url = req.image_url
     
-    db.commit()
+    await db.commit()
     return {"status": "updated", "id": proposal_id}
 
 @app.delete("/api/proposals/{proposal_id}")
-def delete_proposal(proposal_id: int, db: Session = Depends(get_db)):
-    proposal = db.query(models.ArtRequest).filter(models.ArtRequest.id == proposal_id).first()
+async def delete_proposal(proposal_id: int, db: AsyncSession = Depends(get_db)):
+    proposal = await db.get(models.ArtRequest, proposal_id)
     if not proposal:
         raise HTTPException(status_code=404, detail="Proposal not found")
     
-    db.delete(proposal)
-    db.commit()
+    await db.delete(proposal)
+    await db.commit()
     return {"status": "deleted", "id": proposal_id}
 
 
+# =========================================================
+# 3-1. 온체인 DAO 안건 (체인 로그 인덱스에서 조회, 컨트랙트 전체 조회 없이)
+# =========================================================
+def dao_scope(query, model):
+    return query.where(model.contract_address == dao_contract) if dao_contract else query
+
+@app.get("/api/dao/proposals", response_model=List[schemas.DaoProposalResponse], summary="온체인 안건 목록")
+async def get_dao_proposals(
+    response: Response,
+    status: Optional[str] = Query(None, description="IN_PROGRESS | ACCEPTED | REJECTED"),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="이전 응답의 X-Next-Cursor 헤더 값"),
+    db: AsyncSession = Depends(get_db)
+):
+    P = models.DaoProposal
+    query = dao_scope(select(P), P)
+    if status:
+        query = query.where(P.status == status)
+    if cursor:
+        try:
+            query = query.where(P.proposal_id < int(decode_cursor(cursor)["id"]))
+        except (KeyError, TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    # 최신 안건부터 (contract_address, status, proposal_id) 인덱스 순서
+    rows, has_more = split_page((await db.scalars(query.order_by(P.proposal_id.desc()).limit(limit + 1))).all(), limit)
+    if has_more:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor({"id": rows[-1].proposal_id})
+    return rows
+
+@app.get("/api/dao/proposals/{proposal_id}", response_model=schemas.DaoProposalDetailResponse, summary="온체인 안건 상세")
+async def get_dao_proposal(
+    proposal_id: int,
+    votes: int = Query(50, ge=0, le=500, description="최근 투표 몇 건까지"),
+    db: AsyncSession = Depends(get_db)
+):
+    P, V = models.DaoProposal, models.DaoVote
+    proposal = await db.scalar(dao_scope(select(P), P).where(P.proposal_id == proposal_id))
+    if not proposal:
+        raise HTTPException(status_code=404, detail="Proposal not found")
+    recent = (await db.scalars(
+        select(V).where(V.contract_address == proposal.contract_address, V.proposal_id == proposal_id)
+        .order_by(V.block_number.desc(), V.id.desc()).limit(votes)
+    )).all() if votes else []
+    art_request = await db.get(models.ArtRequest, proposal.art_request_id) if proposal.art_request_id else None
+    detail = schemas.DaoProposalDetailResponse.model_validate(proposal)
+    detail.votes = [schemas.DaoVoteResponse.model_validate(v) for v in recent]
+    detail.art_request = schemas.ProposalResponse.model_validate(art_request) if art_request else None
+    return detail
+
+@app.get("/api/dao/indexer/status")
+async def get_dao_indexer_status():
+    if dao_indexer is None:
+        return {"enabled": False}
+    return {"enabled": True, **await dao_indexer.status()}
+
+
 # =========================================================
 # 4. AI 에이전트 & 스튜디오 (A2A 기능)
 # =========================================================
@@ -232,44 +660,149 @@ def delete_proposal(proposal_id: int, db: Session = Depends(get_db)):
 # ==========================================
 # [수정 3] 채팅/피드백 (A2A) - 비평가 연결
 # ==========================================
+# 대화 맥락: 누적 요약 이후의 대화를 최대 CHAT_HISTORY_TURNS 턴까지 에이전트(/chat)에 보낸다.
+# 에이전트가 토큰 예산을 넘는 오래된 턴을 요약에 접어서 돌려주면, 그 요약과 접힌 위치를
+# 이번 대화 기록에 함께 저장해 다음 요청에서 이어 쓴다 (같은 턴을 두 번 요약하지 않음).
+CHAT_HISTORY_TURNS = int(os.getenv("CHAT_HISTORY_TURNS", "20"))
+CHAT_FALLBACK_REPLY = "답변을 생성하지 못했습니다."
+
+async def load_chat_context(db: AsyncSession, wallet_address: str):
+    """(누적 요약, 요약 이후 최근 대화 기록 목록, 요약이 덮는 마지막 기록 id)"""
+    log = models.A2AChatLog
+    latest = (desc(log.created_at), desc(log.id))
+    state = await db.scalar(
+        select(log).where(log.wallet_address == wallet_address, log.summary_through_id.isnot(None))
+        .order_by(*latest).limit(1))
+    summary, through_id = (state.context_summary or "", state.summary_through_id) if state else ("", 0)
+    rows = (await db.scalars(
+        select(log).where(log.wallet_address == wallet_address, log.id > through_id)
+        .order_by(*latest).limit(CHAT_HISTORY_TURNS))).all()
+    return summary, list(reversed(rows)), through_id
+
+async def save_chat_log(wallet_address: str, message: str, reply: str, summary: Optional[str], through_id: Optional[int]):
+    # 응답을 보낸 뒤 백그라운드에서 기록 (실패해도 채팅 응답에는 영향 없음)
+    try:
+        async with database.AsyncSessionLocal() as db:
+            db.add(models.A2AChatLog(
+                wallet_address=wallet_address, user_message=message, ai_reply=reply, agent_type="Curator",
+                context_summary=summary, summary_through_id=through_id,
+            ))
+            await db.commit()
+    except Exception as e:
+        print(f"🔥 채팅 기록 저장 실패: {str(e)}")
+
 @app.post("/api/a2a/chat", response_model=schemas.A2AChatResponse)
-def chat_with_curator(message: str, wallet_address: str):
+async def chat_with_curator(
+    message: str,
+    wallet_address: str,
+    background_tasks: BackgroundTasks,
+    history: bool = Query(True, description="이전 대화를 맥락으로 사용 (false 면 단발성 질문)"),
+    item_id: Optional[int] = Query(None, description="작품 페이지에서 묻는 질문이면 그 작품 id"),
+    db: AsyncSession = Depends(get_db)
+):
     print(f"📡 [Backend] AI에게 질문: {message}")
-    
+
+    # 0. 같은 범위(작품/전체)에서 비슷한 질문에 답한 적이 있으면 그 답을 그대로 사용
+    scope = chat_scope(item_id)
+    cached = await chat_cache.aget(scope, message)
+    if cached is not None:
+        reply, similarity = cached
+        print(f"🧠 [Backend] 의미 캐시 적중 ({scope}, 유사도 {similarity:.2f})")
+        # 누적 요약 상태는 이전 기록에 그대로 남아 있으므로 이번 기록에는 싣지 않음
+        background_tasks.add_task(save_chat_log, wallet_address, message, reply, None, None)
+        return {"reply": reply}
+
+    art_info = ""
+    if item_id is not None:
+        item = await db.get(models.GalleryItem, item_id)
+        if item is None:
+            raise HTTPException(status_code=404, detail="Item not found")
+        art_info = f"{item.title}\n{item.description or ''}".strip()
+
+    summary, turns, through_id = "", [], None
+    if history and CHAT_HISTORY_TURNS > 0:
+        summary, turns, through_id = await load_chat_context(db, wallet_address)
+    await db.close()  # 에이전트 응답을 기다리는 동안 DB 커넥션을 잡고 있지 않도록
+
     try:
-        # 1. AI 요원(비평가/챗봇)에게 전화 걸기 (POST /review 사용)
-        # agent.py에 채팅 전용(/chat)이 없으므로 비평가(/review)를 대리인으로 씀
-        response = requests.post(
-            f"{AI_AGENT_URL}/review", 
-            json={"art_info": message}
-        )
-        
-        if response.status_code == 200:
-            result = response.json()
-            return {"reply": result.get("review_text", "답변을 생성하지 못했습니다.")}
-        else:
-            return {"reply": "AI 큐레이터가 지금 바쁩니다. (에러)"}
-            
+        # 1. AI 큐레이터(채팅 전용 페르소나)에게 전화 걸기 (POST /chat)
+        result = await ai_agent.post("/chat", {
+            "message": message,
+            "history": [{"user": t.user_message, "ai": t.ai_reply} for t in turns],
+            "summary": summary,
+            "art_info": art_info,
+        })
+    except AgentError:
+        return {"reply": "AI 큐레이터가 지금 바쁩니다. (에러)"}
     except Exception as e:
         return {"reply": "AI 서버와 연결이 끊겼습니다."}
 
+    reply = result.get("reply") or CHAT_FALLBACK_REPLY
+    # 캐시는 지갑 구분 없이 공유되므로 이 유저의 대화 맥락 없이 만든 답만 넣는다 (맥락 유출 방지)
+    # 에이전트 쪽 실패 문구도 캐시하지 않음
+    if reply != CHAT_FALLBACK_REPLY and not turns and not summary:
+        await chat_cache.aset(scope, message, reply)
+    if history and through_id is not None:
+        folded = int(result.get("folded") or 0)
+        if folded:
+            through_id = turns[min(folded, len(turns)) - 1].id
+        summary = result.get("summary", summary) or None
+        through_id = through_id if summary else None
+    background_tasks.add_task(save_chat_log, wallet_address, message, reply, summary if history else None, through_id)
+    return {"reply": reply}
+
+@app.get("/api/a2a/chat/cache/stats")
+def get_chat_cache_stats():
+    return chat_cache.stats()
+
+# 지갑별 대화 기록 (최신순, (wallet_address, created_at) 인덱스를 타는 keyset 페이지)
+@app.get("/api/a2a/chat/history", response_model=List[schemas.A2AChatLogResponse])
+async def get_chat_history(
+    wallet_address: str,
+    response: Response,
+    cursor: Optional[str] = Query(None, description="이전 응답의 X-Next-Cursor 헤더 값"),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_db)
+):
+    log = models.A2AChatLog
+    stmt = select(log).where(log.wallet_address == wallet_address)
+    if cursor:
+        values = decode_cursor(cursor)
+        try:
+            last_created = datetime.fromisoformat(values["created_at"])
+            last_id = int(values["id"])
+        except (KeyError, TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        stmt = stmt.where(or_(log.created_at < last_created, and_(log.created_at == last_created, log.id < last_id)))
+    stmt = stmt.order_by(desc(log.created_at), desc(log.id)).limit(limit + 1)
+    rows, has_more = split_page((await db.scalars(stmt)).all(), limit)
+    if has_more:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor({"created_at": rows[-1].created_at.isoformat(), "id": rows[-1].id})
+    return rows
+
 # [명세서 추가 요청 2] 사용자 맞춤 작품 매칭 (A2A Recommend)
-@app.get("/api/a2a/recommend", summary="사용자 맞춤 작품 매칭")
-def a2a_recommend(wallet_address: str):
+@app.get("/api/a2a/recommend", response_model=List[schemas.A2ARecommendationItem], summary="사용자 맞춤 작품 매칭")
+async def a2a_recommend(
+    wallet_address: str,
+    limit: int = Query(5, ge=1, le=50),
+    db: AsyncSession = Depends(get_db)
+):
     # Agent: Member Info Agent + Exhibition Item Agent
-    # AI가 유저 성향을 분석해 추천 리스트 반환
-    return [
-        {"id": 1, "title": "추천 작품: 사이버펑크 서울", "reason": "회원님의 'Cyberpunk' 선호도 90% 일치"},
-        {"id": 2, "title": "추천 작품: 네온의 밤", "reason": "최근 관람한 작품과 유사"}
-    ]
+    # 관람평/제안 안건/채팅으로 만든 취향 벡터와 가까운 작품 (미리 계산된 결과, 최대 RECOMMEND_TOP_K 개)
+    recs = await recommender.get(db, wallet_address, limit)
+    return [{"id": r["item_id"], "title": r["title"], "reason": r["reason"]} for r in recs]
+
+@app.get("/api/a2a/recommend/stats")
+def get_recommend_stats():
+    return recommender.stats()
 
 # [명세서 추가 요청 3] 전시 기획 제안 (Proposal Creation Agent)
 # 명세서의 POST /api/proposal/create 구현
 @app.post("/api/proposal/create", summary="(선택) 전시 기획 제안 (AI Agent)")
-def propose_exhibition_agent(intent: str):
+async def propose_exhibition_agent(intent: str):
     # Agent: Proposal Creation Agent
     # 사용자의 의도(intent)를 받아 AI가 기획서를 써주는 기능 (studio/draft와 유사)
-    time.sleep(1)
+    await asyncio.sleep(1)
     return {
         "proposal_text": f"AI가 제안하는 기획서:\n주제: {intent}\n\n[기획 의도]\n관람객에게 새로운 경험을...",
         "suggested_title": f"{intent} - 미지의 세계"
@@ -280,76 +813,118 @@ def propose_exhibition_agent(intent: str):
 # [수정 1] 기획서 생성 (Draft) - 진짜 AI 연결
 # ==========================================
 @app.post("/api/studio/draft", response_model=schemas.StudioDraftResponse)
-def create_draft(request: schemas.StudioDraftRequest):
+async def create_draft(request: schemas.StudioDraftRequest):
     print(f"📡 [Backend] AI에게 기획서 요청: {request.intent}")
     
     try:
         # 1. AI 요원(기획자)에게 전화 걸기 (POST /propose)
-        response = requests.post(
-            f"{AI_AGENT_URL}/propose", 
-            json={"intent": request.intent}
-        )
-        
-        # 2. 응답 확인
-        if response.status_code == 200:
-            result = response.json()
-            # agent.py가 주는 키("draft_text")를 그대로 프론트로 전달
-            return {"draft_text": result.get("draft_text", "내용 없음")}
-        else:
-            print(f"🔥 AI 에러: {response.text}")
-            return {"draft_text": "AI가 기획하다가 잠들었습니다. (에러 발생)"}
-            
+        result = await ai_agent.post("/propose", {"intent": request.intent})
+
+        # 2. agent.py가 주는 키("draft_text")를 그대로 프론트로 전달
+        return {"draft_text": result.get("draft_text", "내용 없음")}
+
+    except AgentError as e:
+        print(f"🔥 AI 에러: {str(e)}")
+        return {"draft_text": "AI가 기획하다가 잠들었습니다. (에러 발생)"}
     except Exception as e:
         print(f"🔥 통신 에러: {str(e)}")
         return {"draft_text": "AI 에이전트와 연결할 수 없습니다."}
 
+@app.post("/api/studio/draft/stream")
+def stream_draft(request: schemas.StudioDraftRequest):
+    print(f"📡 [Backend] AI에게 기획서 스트리밍 요청: {request.intent}")
+    return relay_agent_stream("/propose/stream", {"intent": request.intent}, "draft_text", "AI 에이전트와 연결할 수 없습니다.")
+
 
 # ==========================================
 # [수정] 이미지 생성 (Image) - 텍스트를 받아서 그림 URL로 변환
 # ==========================================
+# 같은 (keywords, style, seed) 를 동시에 여러 번 요청하면 생성은 한 번만
+_image_jobs = {}
+
+async def generate_studio_image(keywords: str, style: str, seed: int, key: str):
+    # 1. AI 요원(화가)에게 "그림 묘사 프롬프트" 부탁하기
+    payload = {
+        "topic": keywords,
+        "style": style,
+        "wallet_address": "0xSystem"
+    }
+    result = await ai_agent.post("/generate", payload)
+
+    # AI가 만든 영어 프롬프트 가져오기 (화가 실패 시 에이전트는 "Error" 를 돌려줌 → 만들지도, 묶지도 않는다)
+    final_prompt = result.get("final_prompt")
+    if not final_prompt or final_prompt == "Error":
+        raise AgentError(502, "화가 프롬프트 생성 실패")
+    print(f"🎨 [Backend] 생성된 프롬프트: {final_prompt[:30]}...")
+
+    # 2. 프롬프트로 이미지를 만들어 내용 주소 저장소에 보관
+    width, height = image_size_from_env()
+    data, content_type = await image_generator.generate(final_prompt, seed, width, height)
+    digest = await asyncio.to_thread(image_store.put, data, content_type)
+    await asyncio.to_thread(image_store.bind, key, digest, final_prompt, seed)
+    return {"digest": digest, "prompt": final_prompt, "seed": seed}
+
+def studio_image_urls(request: Request, digest: str):
+    url = str(request.url_for("get_studio_image", digest=digest))
+    thumb = f"{url}?w={image_store.widths[0]}" if image_store.widths else None
+    return url, thumb
+
+async def studio_image_record(keywords: str, style: str, seed: Optional[int]):
+    """(저장된 생성 기록, 캐시 여부). 이미 만든 조합이면 화가/생성기 호출 없이 저장된 이미지."""
+    seed = seed if seed is not None else default_seed(keywords, style)
+    key = generation_key(keywords, style, seed)
+    record = await asyncio.to_thread(image_store.lookup, key)
+    if record is not None:
+        return record, True
+    job = _image_jobs.get(key)
+    if job is None:
+        job = _image_jobs[key] = asyncio.ensure_future(generate_studio_image(keywords, style, seed, key))
+        job.add_done_callback(lambda _: _image_jobs.pop(key, None))
+    return await asyncio.shield(job), False
+
 @app.post("/api/studio/image", response_model=schemas.StudioImageResponse)
-def create_art_image(request: schemas.StudioImageRequest):
+async def create_art_image(request: schemas.StudioImageRequest, http_request: Request):
     print(f"📡 [Backend] AI에게 그림 요청: {request.keywords}")
-    
     try:
-        # 1. AI 요원(화가)에게 "그림 묘사 프롬프트" 부탁하기
-        payload = {
-            "topic": request.keywords,
-            "style": "Digital Art", 
-            "wallet_address": "0xSystem"
-        }
-        
-        response = requests.post(f"{AI_AGENT_URL}/generate", json=payload)
-        
-        if response.status_code == 200:
-            result = response.json()
-            # AI가 만든 영어 프롬프트 가져오기
-            final_prompt = result.get("final_prompt", "Abstract Art")
-            
-            print(f"🎨 [Backend] 생성된 프롬프트: {final_prompt[:30]}...")
-
-            # 2. [핵심] 프롬프트를 가지고 실제 이미지 URL 만들기 (Pollinations AI 사용 - 무료/키 없음)
-            # URL에 특수문자가 들어가면 안되니까 인코딩 처리
-            encoded_prompt = urllib.parse.quote(final_prompt)
-            seed = random.randint(1, 99999)
-            timestamp = int(time.time()) # ✅ 현재 시간 (매번 바뀜)
-
-            
-            # 실제 이미지가 나오는 마법의 링크
-            real_image_url = f"https://image.pollinations.ai/prompt/{encoded_prompt}?seed={seed}&width=1024&height=768&nologo=true&model=flux"
-            
-            return {"image_url": real_image_url}
-        else:
-            print("🔥 AI 에이전트 응답 실패")
-            return {"image_url": "https://via.placeholder.com/600x400?text=AI+Error"}
-            
+        record, cached = await studio_image_record(request.keywords, request.style, request.seed)
+    except AgentError:
+        print("🔥 AI 에이전트 응답 실패")
+        return {"image_url": "https://via.placeholder.com/600x400?text=AI+Error"}
     except Exception as e:
         print(f"🔥 통신 에러: {str(e)}")
         return {"image_url": "https://via.placeholder.com/600x400?text=Connection+Failed"}
 
+    image_url, thumbnail_url = studio_image_urls(http_request, record["digest"])
+    return {"image_url": image_url, "thumbnail_url": thumbnail_url, "seed": record["seed"],
+            "prompt": record["prompt"], "cached": cached}
+
+# 저장된 이미지 (w=256 등 허용된 가로 크기면 축소본). 내용 주소라 ETag 가 곧 digest 이고 바뀌지 않는다.
+@app.get("/api/studio/images/{digest}", name="get_studio_image")
+async def get_studio_image(digest: str, request: Request, w: Optional[int] = Query(None, description="축소본 가로 크기")):
+    if not DIGEST_PATTERN.match(digest):
+        raise HTTPException(status_code=404, detail="Image not found")
+    try:
+        found = await asyncio.to_thread(image_store.variant, digest, w) if w else await asyncio.to_thread(image_store.get, digest)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if found is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+    path, content_type = found[0], found[1]
+    etag = f'"{found[2] if w else digest}"'
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=31536000, immutable"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
+    # FileResponse 가 Range 요청(206 / 416)과 Accept-Ranges 를 처리한다
+    return FileResponse(path, media_type=content_type, headers=headers)
+
+@app.get("/api/studio/image/stats")
+def get_studio_image_stats():
+    return image_store.stats()
+
 # 2. 마케터 (Marketer) 연결
 @app.post("/api/agent/promote", response_model=schemas.AgentPromoteResponse)
-def agent_promote(req: schemas.AgentPromoteRequest):
+async def agent_promote(req: schemas.AgentPromoteRequest):
     print(f"📡 [Backend] 마케터 호출: {req.exhibition_title}")
     try:
         # AI 컨테이너(8002)의 /promote 엔드포인트 호출
@@ -357,18 +932,24 @@ def agent_promote(req: schemas.AgentPromoteRequest):
             "exhibition_title": req.exhibition_title, 
             "target_audience": req.target_audience
         }
-        resp = requests.post(f"{AI_AGENT_URL}/promote", json=payload)
-        
-        if resp.status_code == 200:
-            return resp.json() # {"promo_text": "..."} 반환
-        else:
-            return {"promo_text": "마케팅 문구 생성 실패"}
+        return await ai_agent.post("/promote", payload) # {"promo_text": "..."} 반환
+    except AgentError:
+        return {"promo_text": "마케팅 문구 생성 실패"}
     except Exception as e:
         return {"promo_text": "통신 오류 발생"}
 
+@app.post("/api/agent/promote/stream")
+def stream_agent_promote(req: schemas.AgentPromoteRequest):
+    print(f"📡 [Backend] 마케터 스트리밍 호출: {req.exhibition_title}")
+    payload = {
+        "exhibition_title": req.exhibition_title,
+        "target_audience": req.target_audience
+    }
+    return relay_agent_stream("/promote/stream", payload, "promo_text", "통신 오류 발생")
+
 # 3. 경매사 (Auctioneer) 연결
 @app.post("/api/agent/auction", response_model=schemas.AgentAuctionResponse)
-def agent_auction(req: schemas.AgentAuctionRequest):
+async def agent_auction(req: schemas.AgentAuctionRequest):
     print(f"📡 [Backend] 경매사 호출")
     try:
         # AI 컨테이너(8002)의 /auction 엔드포인트 호출
@@ -376,11 +957,115 @@ def agent_auction(req: schemas.AgentAuctionRequest):
             "art_info": req.art_info,
             "critic_review": req.critic_review
         }
-        resp = requests.post(f"{AI_AGENT_URL}/auction", json=payload)
-        
-        if resp.status_code == 200:
-            return resp.json() # {"auction_report": "..."} 반환
-        else:
-            return {"auction_report": "경매 리포트 생성 실패"}
+        return await ai_agent.post("/auction", payload) # {"auction_report": "..."} 반환
+    except AgentError:
+        return {"auction_report": "경매 리포트 생성 실패"}
     except Exception as e:
-        return {"auction_report": "통신 오류 발생"}
\ No newline at end of file
+        return {"auction_report": "통신 오류 발생"}
+
+@app.post("/api/agent/auction/stream")
+def stream_agent_auction(req: schemas.AgentAuctionRequest):
+    print(f"📡 [Backend] 경매사 스트리밍 호출")
+    payload = {
+        "art_info": req.art_info,
+        "critic_review": req.critic_review
+    }
+    return relay_agent_stream("/auction/stream", payload, "auction_report", "통신 오류 발생")
+
+
+# =========================================================
+# ⏳ 비동기 AI 작업 (오래 걸리는 생성은 작업 id 로 바로 응답 → 폴링 / WebSocket)
+# =========================================================
+# POST /api/jobs {"kind", "payload"} → 202 + job_id. 결과는 GET /api/jobs/{id} 또는
+# WS /api/jobs/{id}/ws (상태가 바뀔 때마다 push, 끝나면 닫힘). 워커는 agent.py 엔드포인트를 호출한다.
+# 실패 문구로 끝난 응답은 실패로 보고 재시도한다 (일반 API 처럼 대체 문구를 결과로 저장하지 않도록).
+async def run_full_course_job(payload: dict):
+    result = await ai_agent.post("/full-course", payload, idempotent=False)
+    if set(result) == {"errors"}:
+        raise RuntimeError(f"풀코스 전 단계 실패: {result['errors']}")
+    return result
+
+async def run_draft_job(payload: dict):
+    result = await ai_agent.post("/propose", payload)
+    if result.get("draft_text") in (None, "", "AI 에러"):
+        raise RuntimeError("기획서 생성 실패")
+    return {"draft_text": result["draft_text"]}
+
+async def run_image_job(payload: dict):
+    record, cached = await studio_image_record(payload["keywords"], payload["style"], payload["seed"])
+    # 작업 결과는 저장해 두는 값이라 호스트 없는 경로로 (프론트가 API 주소를 붙인다)
+    image_url = app.url_path_for("get_studio_image", digest=record["digest"])
+    thumbnail_url = f"{image_url}?w={image_store.widths[0]}" if image_store.widths else None
+    return {"image_url": image_url, "thumbnail_url": thumbnail_url, "seed": record["seed"],
+            "prompt": record["prompt"], "cached": cached}
+
+# 작업 종류 → (실행 함수, 입력 스키마, 기본 우선순위: 클수록 먼저). 짧은 대화형 작업을 앞에
+job_queue.register("studio.draft", run_draft_job, schemas.StudioDraftRequest, priority=10)
+job_queue.register("studio.image", run_image_job, schemas.StudioImageRequest, priority=5)
+job_queue.register("full-course", run_full_course_job, schemas.StudioFullCourseRequest, priority=0)
+
+@app.post("/api/jobs", response_model=schemas.JobAccepted, status_code=202)
+async def create_job(req: schemas.JobCreate, request: Request):
+    try:
+        job = await job_queue.submit(req.kind, req.payload, req.priority, req.wallet_address)
+    except KeyError:
+        raise HTTPException(status_code=400, detail=f"Unsupported job kind: {req.kind} (가능: {', '.join(job_queue.kinds)})")
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False))
+    print(f"📡 [Backend] AI 작업 접수: {job.kind} {job.id[:8]} (우선순위 {job.priority})")
+    status_url = str(request.url_for("get_job", job_id=job.id))
+    ws_url = str(request.url_for("job_events", job_id=job.id)).replace("http", "ws", 1)
+    return {"job_id": job.id, "status": job.status, "status_url": status_url, "ws_url": ws_url}
+
+@app.get("/api/jobs", response_model=List[schemas.JobResponse])
+async def get_my_jobs(wallet_address: str, limit: int = Query(20, ge=1, le=100)):
+    return [job_view(job) for job in await job_queue.recent(wallet_address, limit)]
+
+@app.get("/api/jobs/stats")
+async def get_job_stats():
+    return await job_queue.stats()
+
+@app.get("/api/jobs/{job_id}", response_model=schemas.JobResponse, name="get_job")
+async def get_job(job_id: str):
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_view(job)
+
+@app.delete("/api/jobs/{job_id}", response_model=schemas.JobResponse)
+async def cancel_job(job_id: str):
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if not await job_queue.cancel(job_id):
+        raise HTTPException(status_code=409, detail=f"취소할 수 없는 작업입니다 ({job.status})")
+    return job_view(await job_queue.get(job_id))
+
+@app.websocket("/api/jobs/{job_id}/ws", name="job_events")
+async def job_events(websocket: WebSocket, job_id: str):
+    await websocket.accept()
+    try:
+        # 구독을 먼저 열고 현재 상태를 보내야 그 사이 바뀐 상태를 놓치지 않는다
+        with job_queue.subscribe(job_id) as events:
+            job = await job_queue.get(job_id)
+            if job is None:
+                await websocket.close(code=4404)
+                return
+            view = job_view(job)
+            await websocket.send_json(jsonable_encoder(view))
+            while view["status"] not in TERMINAL_STATUSES:
+                try:
+                    view = await asyncio.wait_for(events.get(), job_queue.poll_interval)
+                except asyncio.TimeoutError:
+                    # 다른 프로세스의 워커가 실행 중이면 알림이 오지 않으므로 DB 로 확인
+                    job = await job_queue.get(job_id)
+                    if job is None:
+                        break
+                    latest = job_view(job)
+                    if (latest["status"], latest["attempts"]) == (view["status"], view["attempts"]):
+                        continue
+                    view = latest
+                await websocket.send_json(jsonable_encoder(view))
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
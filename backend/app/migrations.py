@@ -0,0 +1,196 @@
+import sys
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Index, MetaData, String, Table, inspect, text
+
+from . import database, models
+
+# =========================================================
+# 🧱 스키마 마이그레이션 (워커마다가 아니라 배포 시 한 번만 실행)
+# =========================================================
+#   python -m app.migrations upgrade    # 밀린 마이그레이션 적용
+#   python -m app.migrations status     # 적용/대기 목록
+#
+# 적용된 버전은 schema_migrations 테이블에 기록한다. 각 단계는 이미 반영된
+# 부분(테이블/인덱스)을 건너뛰도록 작성해서, create_all 로 만들어진 기존 DB 에도
+# 그대로 적용할 수 있다. 새 테이블은 Model.__table__.create(conn, checkfirst=True),
+# 새 인덱스는 create_indexes(), 새 (NULL 허용) 컬럼은 add_columns() 로 추가한다.
+
+LOCK_NAME = "art_platform_migrations"
+
+version_table = Table(
+    "schema_migrations",
+    MetaData(),
+    Column("version", String(32), primary_key=True),
+    Column("description", String(255)),
+    Column("applied_at", DateTime),
+)
+
+
+def create_indexes(conn, table_name, indexes, unique=False):
+    """indexes: {인덱스 이름: [컬럼, ...]} 중 아직 없는 것만 만든다."""
+    existing = {ix["name"] for ix in inspect(conn).get_indexes(table_name)}
+    # 모델이 아니라 현재 DB 를 반영한 테이블에 붙여서 만든다 (마이그레이션 시점 고정)
+    table = Table(table_name, MetaData(), autoload_with=conn)
+    for name, columns in indexes.items():
+        if name in existing:
+            continue
+        print(f"🧱 [Migrate] {'유니크 ' if unique else ''}인덱스 생성: {table_name}.{name} ({', '.join(columns)})")
+        Index(name, *[table.c[c] for c in columns], unique=unique).create(conn)
+
+
+def add_columns(conn, table_name, columns):
+    """columns: 모델의 Column 목록 중 아직 없는 것만 ALTER TABLE ... ADD COLUMN (NULL 허용 컬럼만)."""
+    existing = {c["name"] for c in inspect(conn).get_columns(table_name)}
+    for column in columns:
+        if column.name in existing:
+            continue
+        ddl = column.type.compile(dialect=conn.dialect)
+        print(f"🧱 [Migrate] 컬럼 추가: {table_name}.{column.name} ({ddl})")
+        conn.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {column.name} {ddl}"))
+
+
+# --- 마이그레이션 목록 (순서대로, 버전은 한 번 배포하면 바꾸지 않는다) ---
+def _0001_baseline(conn):
+    # 기존에 main.py 에서 import 시 하던 create_all (없는 테이블만 생성)
+    models.Base.metadata.create_all(bind=conn)
+
+
+def _0002_query_indexes(conn):
+    create_indexes(conn, "art_requests", {
+        "ix_art_requests_status_created_id": ["status", "created_at", "id"],
+        "ix_art_requests_created_id": ["created_at", "id"],
+        "ix_art_requests_wallet_created_id": ["wallet_address", "created_at", "id"],
+    })
+    create_indexes(conn, "gallery_feedbacks", {
+        "ix_gallery_feedbacks_item_created_id": ["item_id", "created_at", "id"],
+        "ix_gallery_feedbacks_wallet_address": ["wallet_address"],
+    })
+    create_indexes(conn, "a2a_chat_logs", {
+        "ix_a2a_chat_logs_wallet_created": ["wallet_address", "created_at"],
+    })
+    create_indexes(conn, "user_recommendations", {
+        "ix_user_recommendations_wallet_address": ["wallet_address"],
+    })
+
+
+def _0003_chat_context_summary(conn):
+    chat = models.A2AChatLog.__table__
+    add_columns(conn, "a2a_chat_logs", [chat.c.context_summary, chat.c.summary_through_id])
+
+
+def _0004_recommendation_items(conn):
+    rec = models.UserRecommendation.__table__
+    add_columns(conn, "user_recommendations", [rec.c.item_id, rec.c.score])
+
+
+def _0005_docent_scripts(conn):
+    models.DocentScript.__table__.create(conn, checkfirst=True)
+
+
+def _0006_ai_jobs(conn):
+    models.AIJob.__table__.create(conn, checkfirst=True)
+
+
+def _0007_dao_index(conn):
+    for model in (models.ChainCursor, models.DaoEvent, models.DaoProposal, models.DaoVote):
+        model.__table__.create(conn, checkfirst=True)
+
+
+def _0008_dao_content_hash(conn):
+    proposals = models.DaoProposal.__table__
+    add_columns(conn, "dao_proposals", [proposals.c.content_hash])
+
+
+def _0009_recommendation_unique_item(conn):
+    # 동시 갱신으로 이미 중복된 (지갑, 작품) 행은 가장 최근 것만 남기고 지운다
+    conn.execute(text(
+        "DELETE FROM user_recommendations WHERE item_id IS NOT NULL AND id NOT IN ("
+        " SELECT keep_id FROM (SELECT MAX(id) AS keep_id FROM user_recommendations"
+        " WHERE item_id IS NOT NULL GROUP BY wallet_address, item_id) AS latest)"
+    ))
+    create_indexes(conn, "user_recommendations", {
+        "ux_user_recommendations_wallet_item": ["wallet_address", "item_id"],
+    }, unique=True)
+
+
+MIGRATIONS = [
+    ("0001", "baseline tables", _0001_baseline),
+    ("0002", "indexes for list/lookup queries", _0002_query_indexes),
+    ("0003", "rolling summary columns for chat history", _0003_chat_context_summary),
+    ("0004", "item id and score for precomputed recommendations", _0004_recommendation_items),
+    ("0005", "stored docent scripts per item and audience", _0005_docent_scripts),
+    ("0006", "persistent queue for long-running AI jobs", _0006_ai_jobs),
+    ("0007", "on-chain ArtPlanningDAO event index", _0007_dao_index),
+    ("0008", "content hash for ArtPlanningDAOV2 proposals", _0008_dao_content_hash),
+    ("0009", "unique (wallet, item) for precomputed recommendations", _0009_recommendation_unique_item),
+]
+
+
+def applied_versions(conn):
+    if not inspect(conn).has_table(version_table.name):
+        return set()
+    return {row[0] for row in conn.execute(version_table.select().with_only_columns(version_table.c.version))}
+
+
+def pending(engine=None):
+    engine = engine or database.engine
+    with engine.connect() as conn:
+        done = applied_versions(conn)
+    return [(v, d) for v, d, _ in MIGRATIONS if v not in done]
+
+
+def upgrade(engine=None):
+    engine = engine or database.engine
+    with engine.connect() as conn:
+        # 여러 컨테이너가 동시에 띄워져도 한 곳에서만 실행 (MySQL)
+        locked = conn.dialect.name == "mysql"
+        if locked:
+            conn.execute(text("SELECT GET_LOCK(:name, 60)"), {"name": LOCK_NAME})
+        try:
+            version_table.create(conn, checkfirst=True)
+            conn.commit()
+            done = applied_versions(conn)
+            for version, description, step in MIGRATIONS:
+                if version in done:
+                    continue
+                print(f"🧱 [Migrate] {version} {description}")
+                step(conn)
+                conn.execute(version_table.insert().values(
+                    version=version, description=description, applied_at=datetime.utcnow()))
+                conn.commit()
+        finally:
+            if locked:
+                conn.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": LOCK_NAME})
+    print("✅ [Migrate] 스키마 최신 상태")
+
+
+def check_on_startup(engine=None):
+    """워커 시작 시 DDL 없이 버전만 확인해서, 밀린 마이그레이션이 있으면 경고한다."""
+    try:
+        waiting = pending(engine)
+    except Exception as e:
+        print(f"⚠️ [Migrate] 스키마 버전 확인 실패: {e}")
+        return
+    if waiting:
+        names = ", ".join(v for v, _ in waiting)
+        print(f"⚠️ [Migrate] 적용되지 않은 마이그레이션: {names} (python -m app.migrations upgrade)")
+
+
+def main(argv):
+    command = argv[1] if len(argv) > 1 else "upgrade"
+    if command == "upgrade":
+        upgrade()
+    elif command == "status":
+        waiting = {v for v, _ in pending()}
+        for version, description, _ in MIGRATIONS:
+            mark = "대기" if version in waiting else "적용"
+            print(f"{version} [{mark}] {description}")
+    else:
+        print("usage: python -m app.migrations [upgrade|status]")
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Float, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, Text, DateTime, Float, ForeignKey, Boolean, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .database import Base
@@ -48,6 +48,13 @@ class ArtRequest(Base):
 
     creator = relationship("User", back_populates="proposals")
 
+    # 목록 조회용 keyset 인덱스: 상태별 / 전체 / 내 안건 최신순
+    __table_args__ = (
+        Index("ix_art_requests_status_created_id", "status", "created_at", "id"),
+        Index("ix_art_requests_created_id", "created_at", "id"),
+        Index("ix_art_requests_wallet_created_id", "wallet_address", "created_at", "id"),
+    )
+
 
 # ==========================================
 # 3. 전시 작품 (GalleryItem)
@@ -73,13 +80,18 @@ class GalleryFeedback(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     item_id = Column(Integer, ForeignKey("gallery_items.id"))
-    wallet_address = Column(String(255), ForeignKey("users.wallet_address"))
+    wallet_address = Column(String(255), ForeignKey("users.wallet_address"), index=True)
     content = Column(Text, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     item = relationship("GalleryItem", back_populates="feedbacks")
     author = relationship("User", back_populates="feedbacks")
 
+    # 작품별 관람평 (IN 일괄 로딩 / 작품별 최신 N개)
+    __table_args__ = (
+        Index("ix_gallery_feedbacks_item_created_id", "item_id", "created_at", "id"),
+    )
+
 
 # ==========================================
 # 5. [NEW] A2A 채팅 기록 (A2AChatLog)
@@ -96,11 +108,20 @@ class A2AChatLog(Base):
     
     # 어떤 에이전트인지 (Curator, Docent 등)
     agent_type = Column(String(50), default="Curator") 
+
+    # 이 대화를 만들 때 쓴 누적 요약 (summary_through_id 이하 대화를 접은 것, 없으면 NULL)
+    context_summary = Column(Text, nullable=True)
+    summary_through_id = Column(Integer, nullable=True)
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     user = relationship("User", back_populates="chat_logs")
 
+    # 지갑별 대화 기록 (최신순)
+    __table_args__ = (
+        Index("ix_a2a_chat_logs_wallet_created", "wallet_address", "created_at"),
+    )
+
 
 # ==========================================
 # 6. [NEW] 사용자 맞춤 추천 (UserRecommendation)
@@ -109,12 +130,155 @@ class UserRecommendation(Base):
     __tablename__ = "user_recommendations"
 
     id = Column(Integer, primary_key=True, index=True)
-    wallet_address = Column(String(255), ForeignKey("users.wallet_address"))
+    wallet_address = Column(String(255), ForeignKey("users.wallet_address"), index=True)
     
     # 추천 내용
     recommended_title = Column(String(255)) # 추천된 작품/전시 제목
     reason = Column(Text) # 추천 이유 (AI 분석 결과)
+    item_id = Column(Integer, nullable=True) # 추천된 작품 (GalleryItem.id)
+    score = Column(Float, nullable=True) # 취향 벡터와의 코사인 유사도 (최근 작품 추천이면 NULL)
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
-    user = relationship("User", back_populates="recommendations")
\ No newline at end of file
+    user = relationship("User", back_populates="recommendations")
+
+    __table_args__ = (
+        # 지갑별 추천 목록에 같은 작품이 두 번 들어가지 않도록 (동시에 갱신해도)
+        Index("ux_user_recommendations_wallet_item", "wallet_address", "item_id", unique=True),
+    )
+
+
+# ==========================================
+# 7. 도슨트 해설 대본 (DocentScript)
+# ==========================================
+class DocentScript(Base):
+    __tablename__ = "docent_scripts"
+
+    id = Column(Integer, primary_key=True, index=True)
+    item_id = Column(Integer, ForeignKey("gallery_items.id"), nullable=False)
+    audience_type = Column(String(50), nullable=False, default="일반 관람객")
+    script = Column(Text, nullable=False)
+
+    # 대본을 만들 때의 작품 제목/설명 해시 (작품이 바뀌었는지 비교용)
+    source_hash = Column(String(64), nullable=False)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    # 작품 + 관람객 유형당 대본 하나 (엔드포인트는 이 인덱스 한 번만 조회)
+    __table_args__ = (
+        Index("ux_docent_scripts_item_audience", "item_id", "audience_type", unique=True),
+    )
+
+
+# ==========================================
+# 8. 비동기 AI 작업 (AIJob)
+# ==========================================
+class AIJob(Base):
+    __tablename__ = "ai_jobs"
+
+    id = Column(String(32), primary_key=True)  # uuid4 hex
+    kind = Column(String(50), nullable=False)  # full-course, studio.draft, studio.image ...
+    wallet_address = Column(String(255), nullable=True)
+
+    # QUEUED → RUNNING → SUCCEEDED / FAILED (실패 시 재시도 남았으면 다시 QUEUED), QUEUED → CANCELLED
+    status = Column(String(20), nullable=False, default="QUEUED")
+    priority = Column(Integer, nullable=False, default=0)  # 클수록 먼저
+
+    payload = Column(Text, nullable=False)  # JSON
+    result = Column(Text, nullable=True)  # JSON
+    error = Column(Text, nullable=True)
+
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+
+    # 시각은 모두 앱에서 UTC 로 넣는다 (run_after / heartbeat_at 비교를 DB 시간대와 무관하게)
+    run_after = Column(DateTime, nullable=False)  # 재시도 대기 중이면 이 시각 이후에 실행
+    heartbeat_at = Column(DateTime, nullable=True)  # 실행 중 워커가 주기적으로 갱신 (끊기면 다시 QUEUED)
+    created_at = Column(DateTime, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # 워커: 대기 중인 작업을 우선순위 순으로
+        Index("ix_ai_jobs_status_priority", "status", "priority", "created_at"),
+        # 마이페이지: 내 작업 최신순
+        Index("ix_ai_jobs_wallet_created", "wallet_address", "created_at"),
+    )
+
+
+# ==========================================
+# 9. 온체인 DAO 인덱스 (ArtPlanningDAO 이벤트 → 조회용 테이블)
+# ==========================================
+class ChainCursor(Base):
+    """인덱서가 어느 블록까지 반영했는지 (재시작하면 여기서부터)."""
+    __tablename__ = "chain_cursors"
+
+    name = Column(String(100), primary_key=True)  # "ArtPlanningDAO:<컨트랙트 주소>"
+    block_number = Column(Integer, nullable=False)
+    block_hash = Column(String(66), nullable=True)  # 체인 재구성(reorg) 감지용
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class DaoEvent(Base):
+    """반영한 로그 원본. reorg 로 블록이 바뀌면 그 뒤 로그를 지우고 남은 로그로 다시 계산한다."""
+    __tablename__ = "dao_events"
+
+    id = Column(Integer, primary_key=True, index=True)
+    contract_address = Column(String(42), nullable=False)
+    block_number = Column(Integer, nullable=False)
+    block_hash = Column(String(66), nullable=False)
+    tx_hash = Column(String(66), nullable=False)
+    log_index = Column(Integer, nullable=False)
+    event = Column(String(50), nullable=False)
+    proposal_id = Column(Integer, nullable=False)
+    data = Column(Text, nullable=False)  # 디코딩한 인자 JSON
+
+    __table_args__ = (
+        Index("ux_dao_events_contract_block_log", "contract_address", "block_number", "log_index", unique=True),
+        Index("ix_dao_events_contract_proposal", "contract_address", "proposal_id", "block_number"),
+    )
+
+
+class DaoProposal(Base):
+    __tablename__ = "dao_proposals"
+
+    id = Column(Integer, primary_key=True, index=True)
+    contract_address = Column(String(42), nullable=False)
+    proposal_id = Column(Integer, nullable=False)  # 컨트랙트 안의 id
+    title = Column(String(255), nullable=True)  # V2 컨트랙트는 연결된 DB 안건의 제목
+    content_hash = Column(String(66), nullable=True)  # V2 컨트랙트의 본문 해시 (art_requests.meta_hash 기준)
+    proposer = Column(String(42), nullable=False)
+    status = Column(String(20), nullable=False, default="IN_PROGRESS")
+    vote_count = Column(Integer, nullable=False, default=0)
+
+    # 같은 제안자 + 제목(V2 는 본문 해시)의 DB 안건 (있으면)
+    art_request_id = Column(Integer, ForeignKey("art_requests.id"), nullable=True)
+
+    created_block = Column(Integer, nullable=False)
+    created_tx = Column(String(66), nullable=False)
+    updated_block = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index("ux_dao_proposals_contract_proposal", "contract_address", "proposal_id", unique=True),
+        Index("ix_dao_proposals_contract_status_proposal", "contract_address", "status", "proposal_id"),
+        Index("ix_dao_proposals_art_request", "art_request_id"),
+    )
+
+
+class DaoVote(Base):
+    __tablename__ = "dao_votes"
+
+    id = Column(Integer, primary_key=True, index=True)
+    contract_address = Column(String(42), nullable=False)
+    proposal_id = Column(Integer, nullable=False)
+    voter = Column(String(42), nullable=False)
+    vote_count = Column(Integer, nullable=False)  # 이 투표 직후 득표 수
+    block_number = Column(Integer, nullable=False)
+    tx_hash = Column(String(66), nullable=False)
+
+    __table_args__ = (
+        # 컨트랙트가 한 사람당 한 표만 허용
+        Index("ux_dao_votes_contract_proposal_voter", "contract_address", "proposal_id", "voter", unique=True),
+        Index("ix_dao_votes_contract_voter", "contract_address", "voter"),
+    )
@@ -0,0 +1,33 @@
+import base64
+import json
+
+from fastapi import HTTPException
+
+# =========================================================
+# 📑 커서(keyset) 페이지네이션 헬퍼
+# =========================================================
+# 응답 본문은 기존처럼 리스트로 두고, 다음 페이지 커서는 헤더로 내려준다.
+# 커서는 마지막 행의 정렬 키를 담은 JSON 을 base64 로 감싼 불투명 토큰.
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(values: dict) -> str:
+    raw = json.dumps(values, separators=(",", ":"), default=str).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str) -> dict:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, dict):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def split_page(rows, limit):
+    """limit + 1 개를 조회한 결과를 (이번 페이지, 다음 페이지 존재 여부)로 나눈다."""
+    return rows[:limit], len(rows) > limit
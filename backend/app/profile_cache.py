@@ -0,0 +1,110 @@
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+# =========================================================
+# 👤 유저 프로필 캐시 (지갑 주소 → 요약 dict)
+# =========================================================
+#   PROFILE_CACHE_URL       비우면 워커 메모리 캐시, redis://... 면 워커 간 공유 캐시
+#   PROFILE_CACHE_TTL       유효 시간, 초 (기본 60)
+#   PROFILE_CACHE_MAX       메모리 캐시 최대 항목 수 (기본 10000)
+#
+# 값은 JSON 으로 직렬화 가능한 dict 만 넣는다 (공유 캐시에서도 그대로 쓰도록).
+# 쓰기 경로(가입, 뱃지 변경)는 DB 커밋 뒤 set() 으로 새 값을 바로 덮어쓴다.
+# async 라우트에서 부르므로 get/set/invalidate 는 코루틴 (네트워크 백엔드가 이벤트 루프를 막지 않도록).
+
+
+class ProfileCache(ABC):
+    """캐시 백엔드 공통 인터페이스. 다른 저장소는 이 세 메서드만 구현하면 된다."""
+
+    @abstractmethod
+    async def get(self, wallet_address):
+        ...
+
+    @abstractmethod
+    async def set(self, wallet_address, summary):
+        ...
+
+    @abstractmethod
+    async def invalidate(self, wallet_address):
+        ...
+
+    def stats(self):
+        return {}
+
+    async def close(self):
+        pass
+
+
+class MemoryProfileCache(ProfileCache):
+    def __init__(self, ttl=60.0, max_entries=10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._data = OrderedDict()  # wallet → (만료 시각, summary)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, wallet_address):
+        with self._lock:
+            entry = self._data.get(wallet_address)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._data[wallet_address]
+                self.misses += 1
+                return None
+            self._data.move_to_end(wallet_address)
+            self.hits += 1
+            return dict(entry[1])
+
+    async def set(self, wallet_address, summary):
+        with self._lock:
+            self._data[wallet_address] = (time.monotonic() + self.ttl, dict(summary))
+            self._data.move_to_end(wallet_address)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    async def invalidate(self, wallet_address):
+        with self._lock:
+            self._data.pop(wallet_address, None)
+
+    def stats(self):
+        return {"backend": "memory", "entries": len(self._data), "hits": self.hits, "misses": self.misses}
+
+
+class RedisProfileCache(ProfileCache):
+    """여러 워커가 같은 캐시를 보도록 Redis 에 저장 (redis 패키지가 있을 때만)."""
+
+    def __init__(self, url, ttl=60.0, prefix="profile:"):
+        import redis.asyncio as redis  # 선택 의존성
+
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    async def get(self, wallet_address):
+        raw = await self.client.get(self.prefix + wallet_address)
+        return json.loads(raw) if raw else None
+
+    async def set(self, wallet_address, summary):
+        await self.client.set(self.prefix + wallet_address, json.dumps(summary), ex=max(1, int(self.ttl)))
+
+    async def invalidate(self, wallet_address):
+        await self.client.delete(self.prefix + wallet_address)
+
+    def stats(self):
+        return {"backend": "redis"}
+
+    async def close(self):
+        await self.client.aclose()
+
+
+def profile_cache_from_env():
+    ttl = float(os.getenv("PROFILE_CACHE_TTL", "60"))
+    url = os.getenv("PROFILE_CACHE_URL", "")
+    if url.startswith(("redis://", "rediss://")):
+        return RedisProfileCache(url, ttl=ttl)
+    return MemoryProfileCache(ttl=ttl, max_entries=int(os.getenv("PROFILE_CACHE_MAX", "10000")))
@@ -0,0 +1,400 @@
+import asyncio
+import os
+import sys
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlparse
+
+import numpy as np
+from sqlalchemy import delete, desc, event, func, insert, inspect, select
+from sqlalchemy.orm import Session, object_session
+
+from . import database, models
+from .embeddings import HashingEmbedder
+
+# =========================================================
+# 🧭 맞춤 작품 추천 (임베딩 + 최근접 이웃 검색)
+# =========================================================
+#   CHROMA_URL            비우면 워커 메모리(NumPy) 인덱스, http://chroma:8000 이면 Chroma 컬렉션
+#   CHROMA_COLLECTION     Chroma 컬렉션 이름 (기본 gallery_items)
+#   RECOMMEND_DIM         임베딩 차원 (기본 512)
+#   RECOMMEND_TOP_K       유저당 미리 계산해 user_recommendations 에 저장할 추천 수 (기본 10)
+#   RECOMMEND_TTL         저장된 추천의 유효 시간, 초 (기본 3600). 지나면 다음 조회 때 다시 계산
+#
+# 임베딩은 외부 API 없이 단어 + 글자 bigram 해싱 (app/embeddings.py).
+# 유저 취향 벡터는 관람평을 남긴 작품/관람평 내용/제안한 안건(스타일, 제목, 설명)/채팅 질문의
+# 가중 평균이다. 배치로 미리 계산하려면:
+#
+#   python -m app.recommender reindex          # 갤러리 작품 임베딩을 인덱스에 다시 올림
+#   python -m app.recommender refresh          # 전체 유저 추천을 다시 계산해 저장
+#
+# 실행 중에는 이 프로세스에서 커밋된 작품 추가/수정은 바로(reindex_on_commit), 다른 워커가 추가한
+# 작품은 다음 추천 계산 때 마지막으로 올린 id 이후만 이어서 올린다(ensure_index).
+
+# 취향 신호별 가중치
+SIGNAL_WEIGHTS = {
+    "feedback_item": 1.0,   # 관람평을 남긴 작품 자체
+    "feedback_text": 0.5,   # 관람평 내용
+    "proposal": 0.8,        # 제안한 안건 (스타일/제목/설명)
+    "chat": 0.3,            # 큐레이터에게 한 질문
+}
+SIGNAL_LIMIT = 30  # 신호 종류별 최근 N개만 사용
+
+
+def _now():
+    # DB 에는 naive UTC 로 저장/비교 (MySQL DATETIME 은 타임존을 버림)
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class VectorIndex(ABC):
+    """벡터 인덱스 공통 인터페이스 (id 는 GalleryItem.id)."""
+
+    @abstractmethod
+    def upsert(self, ids, vectors):
+        ...
+
+    @abstractmethod
+    def query(self, vector, k, exclude=()):
+        """코사인 유사도 상위 k 개 [(id, score)] (exclude 에 있는 id 는 제외)."""
+
+    @abstractmethod
+    def count(self):
+        ...
+
+    def stats(self):
+        return {}
+
+
+class NumpyVectorIndex(VectorIndex):
+    """프로세스 안 NumPy 행렬 (테스트/소규모 배포용, 워커마다 따로 가짐)."""
+
+    def __init__(self, dim=512):
+        self.dim = dim
+        self._ids = []
+        self._rows = {}  # id → 행 번호
+        self._matrix = np.zeros((0, dim), dtype=np.float32)
+        self._lock = threading.Lock()
+
+    def upsert(self, ids, vectors):
+        with self._lock:
+            new_ids, new_vectors = [], []
+            for item_id, vector in zip(ids, vectors):
+                row = self._rows.get(item_id)
+                if row is None:
+                    new_ids.append(item_id)
+                    new_vectors.append(vector)
+                else:
+                    self._matrix[row] = vector
+            if new_ids:
+                for item_id in new_ids:
+                    self._rows[item_id] = len(self._ids)
+                    self._ids.append(item_id)
+                self._matrix = np.vstack([self._matrix, np.asarray(new_vectors, dtype=np.float32)])
+
+    def query(self, vector, k, exclude=()):
+        with self._lock:
+            if not self._ids:
+                return []
+            scores = self._matrix @ vector
+            for item_id in exclude:
+                row = self._rows.get(item_id)
+                if row is not None:
+                    scores[row] = -np.inf
+            k = min(k, len(self._ids))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [(self._ids[i], float(scores[i])) for i in top if np.isfinite(scores[i])]
+
+    def count(self):
+        return len(self._ids)
+
+    def stats(self):
+        return {"backend": "numpy", "items": len(self._ids), "dim": self.dim}
+
+
+class ChromaVectorIndex(VectorIndex):
+    """Chroma 서버 컬렉션 (chromadb 패키지가 있을 때만). 임베딩은 직접 계산해서 넣는다."""
+
+    def __init__(self, url, collection="gallery_items"):
+        import chromadb  # 선택 의존성
+
+        parsed = urlparse(url)
+        self.client = chromadb.HttpClient(
+            host=parsed.hostname, port=parsed.port or 8000, ssl=parsed.scheme == "https")
+        self.collection = self.client.get_or_create_collection(
+            collection, metadata={"hnsw:space": "cosine"}, embedding_function=None)
+
+    def upsert(self, ids, vectors):
+        if ids:
+            self.collection.upsert(ids=[str(i) for i in ids], embeddings=[v.tolist() for v in vectors])
+
+    def query(self, vector, k, exclude=()):
+        result = self.collection.query(
+            query_embeddings=[vector.tolist()], n_results=k + len(exclude), include=["distances"])
+        hits = [(int(i), 1.0 - d) for i, d in zip(result["ids"][0], result["distances"][0])]
+        return [(i, score) for i, score in hits if i not in exclude][:k]
+
+    def count(self):
+        return self.collection.count()
+
+    def stats(self):
+        return {"backend": "chroma", "items": self.count()}
+
+
+def vector_index_from_env(dim):
+    url = os.getenv("CHROMA_URL", "")
+    if url:
+        try:
+            return ChromaVectorIndex(url, os.getenv("CHROMA_COLLECTION", "gallery_items"))
+        except Exception as e:
+            print(f"⚠️ [Recommend] Chroma 연결 실패, NumPy 인덱스 사용: {e}")
+    return NumpyVectorIndex(dim)
+
+
+class Recommender:
+    def __init__(self, index, embedder, top_k=10, ttl=3600.0):
+        self.index = index
+        self.embedder = embedder
+        self.top_k = top_k
+        self.ttl = ttl
+        self._synced = False
+        self._synced_id = 0  # 인덱스에 올린 가장 큰 작품 id
+        self._sync_lock = asyncio.Lock()
+        self._refresh_locks = {}  # wallet_address -> [asyncio.Lock, 대기 수] (같은 지갑 갱신은 한 번에 하나씩)
+        self._tasks = set()
+
+    @staticmethod
+    def item_text(title, description):
+        return f"{title or ''}\n{description or ''}"
+
+    # --- 작품 인덱스 ---
+    def index_items(self, items):
+        """[(id, title, description)] 를 임베딩해서 인덱스에 올린다 (블로킹, 스레드에서 호출)."""
+        texts = [self.item_text(title, description) for _, title, description in items]
+        self.index.upsert([item_id for item_id, _, _ in items], self.embedder.embed_many(texts))
+
+    def index_later(self, items):
+        """커밋 훅에서 호출: 이벤트 루프 안이면 스레드로 넘기고 바로 돌아온다."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.index_items(items)  # CLI 등 루프 밖
+            return
+        task = loop.create_task(asyncio.to_thread(self.index_items, items))
+        self._tasks.add(task)
+        task.add_done_callback(self._index_done)
+
+    def _index_done(self, task):
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"🔥 [Recommend] 작품 인덱싱 실패: {task.exception()}")
+
+    async def sync_items(self, db, batch_size=1000, after=0):
+        """DB 의 작품 중 id > after 인 것을 id 순서대로 batch_size 개씩 인덱스에 올린다."""
+        G = models.GalleryItem
+        last_id, total = after, 0
+        while True:
+            rows = (await db.execute(
+                select(G.id, G.title, G.description).where(G.id > last_id).order_by(G.id).limit(batch_size))).all()
+            if not rows:
+                break
+            await asyncio.to_thread(self.index_items, [tuple(row) for row in rows])
+            last_id = rows[-1].id
+            total += len(rows)
+        # 커밋 훅으로 올린 작품은 여기 반영하지 않는다 (그보다 작은 id 를 다른 워커가 넣었을 수 있으니)
+        self._synced_id = max(self._synced_id, last_id)
+        self._synced = True
+        if total or not after:
+            print(f"🧭 [Recommend] 작품 {total}건 인덱싱 ({self.index.stats().get('backend')})")
+        return total
+
+    async def ensure_index(self, db):
+        # 처음이면 전체, 이후에는 다른 워커/프로세스가 추가한 작품만 (max(id) 는 기본 키 조회 한 번)
+        if self._synced and (await db.scalar(select(func.max(models.GalleryItem.id))) or 0) <= self._synced_id:
+            return
+        async with self._sync_lock:
+            if not self._synced:
+                await self.sync_items(db)
+            else:
+                await self.sync_items(db, after=self._synced_id)
+
+    # --- 유저 취향 ---
+    async def user_signals(self, db, wallet_address):
+        """[(설명, 텍스트, 가중치)] 와 이미 관람평을 남긴 작품 id 집합."""
+        F, G, A, C = models.GalleryFeedback, models.GalleryItem, models.ArtRequest, models.A2AChatLog
+        signals, seen = [], set()
+
+        feedbacks = (await db.execute(
+            select(F.item_id, F.content, G.title, G.description).join(G, G.id == F.item_id)
+            .where(F.wallet_address == wallet_address)
+            .order_by(desc(F.created_at), desc(F.id)).limit(SIGNAL_LIMIT))).all()
+        for item_id, content, title, description in feedbacks:
+            if item_id not in seen:
+                seen.add(item_id)
+                signals.append((f"관람평을 남긴 '{title}'", self.item_text(title, description), SIGNAL_WEIGHTS["feedback_item"]))
+            signals.append((f"관람평 '{content[:20]}'", content, SIGNAL_WEIGHTS["feedback_text"]))
+
+        proposals = (await db.execute(
+            select(A.title, A.style, A.description).where(A.wallet_address == wallet_address)
+            .order_by(desc(A.created_at), desc(A.id)).limit(SIGNAL_LIMIT))).all()
+        for title, style, description in proposals:
+            signals.append((f"제안한 안건 '{title}' ({style or 'General'})",
+                            f"{style or ''} {title or ''}\n{description or ''}", SIGNAL_WEIGHTS["proposal"]))
+
+        chats = (await db.scalars(
+            select(C.user_message).where(C.wallet_address == wallet_address)
+            .order_by(desc(C.created_at), desc(C.id)).limit(SIGNAL_LIMIT))).all()
+        for message in chats:
+            signals.append((f"채팅 질문 '{message[:20]}'", message, SIGNAL_WEIGHTS["chat"]))
+        return signals, seen
+
+    def taste_vector(self, signals):
+        """(정규화된 취향 벡터 또는 None, 신호별 벡터 행렬)"""
+        vectors = self.embedder.embed_many([text for _, text, _ in signals])
+        if not len(vectors):
+            return None, vectors
+        weights = np.array([weight for _, _, weight in signals], dtype=np.float32)
+        taste = (vectors * weights[:, None]).sum(axis=0)
+        norm = np.linalg.norm(taste)
+        return (taste / norm if norm else None), vectors
+
+    async def compute(self, db, wallet_address, k=None):
+        """추천 [{item_id, title, reason, score}] (저장하지 않음)."""
+        k = k or self.top_k
+        G = models.GalleryItem
+        await self.ensure_index(db)
+        signals, seen = await self.user_signals(db, wallet_address)
+        taste, signal_vectors = self.taste_vector(signals)
+
+        if taste is None:
+            # 활동이 없는 유저: 최근 작품
+            items = (await db.scalars(select(G).order_by(desc(G.id)).limit(k))).all()
+            return [{"item_id": item.id, "title": item.title, "score": None,
+                     "reason": "새로 전시된 작품입니다. 관람평을 남기면 취향에 맞춰 추천해 드려요."} for item in items]
+
+        hits = await asyncio.to_thread(self.index.query, taste, k, seen)
+        if not hits:
+            return []
+        items = {item.id: item for item in (await db.scalars(select(G).where(G.id.in_([i for i, _ in hits])))).all()}
+        results = []
+        for item_id, score in hits:
+            item = items.get(item_id)
+            if item is None:
+                continue  # 인덱스에는 있지만 삭제된 작품
+            # 추천 이유: 이 작품과 가장 가까운 유저 활동
+            closest = int(np.argmax(signal_vectors @ self.embedder.embed(self.item_text(item.title, item.description))))
+            results.append({"item_id": item.id, "title": item.title, "score": score,
+                            "reason": f"{signals[closest][0]}와(과) 비슷한 작품입니다. (유사도 {max(score, 0):.0%})"})
+        return results
+
+    # --- 미리 계산한 추천 (user_recommendations) ---
+    async def refresh(self, db, wallet_address):
+        # 같은 프로세스 안에서는 지갑별로 줄 세우고, 다른 워커와 겹치면 유니크 인덱스가 중복을 막는다
+        # (늦게 커밋하는 쪽은 IntegrityError 로 롤백되고 계산 결과만 돌려준다)
+        entry = self._refresh_locks.setdefault(wallet_address, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                return await self._refresh(db, wallet_address)
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._refresh_locks[wallet_address]
+
+    async def _refresh(self, db, wallet_address):
+        results = await self.compute(db, wallet_address)
+        R = models.UserRecommendation
+        now = _now()
+        try:
+            await db.execute(delete(R).where(R.wallet_address == wallet_address))
+            if results:
+                await db.execute(insert(R), [
+                    {"wallet_address": wallet_address, "item_id": r["item_id"], "recommended_title": r["title"],
+                     "reason": r["reason"], "score": r["score"], "created_at": now} for r in results])
+            await db.commit()
+        except Exception as e:
+            # 가입하지 않은 지갑(외래 키) 등: 저장은 못 해도 계산 결과는 돌려준다
+            await db.rollback()
+            print(f"🔥 [Recommend] 추천 저장 실패 ({wallet_address}): {e}")
+        return results
+
+    async def get(self, db, wallet_address, limit):
+        R = models.UserRecommendation
+        rows = (await db.scalars(select(R).where(R.wallet_address == wallet_address))).all()
+        fresh = rows and all(r.created_at and r.created_at >= _now() - timedelta(seconds=self.ttl) for r in rows)
+        if not fresh:
+            return (await self.refresh(db, wallet_address))[:limit]
+        rows = sorted(rows, key=lambda r: (r.score is None, -(r.score or 0), r.id))
+        return [{"item_id": r.item_id, "title": r.recommended_title, "reason": r.reason, "score": r.score}
+                for r in rows[:limit]]
+
+    def stats(self):
+        return {**self.index.stats(), "synced": self._synced, "synced_id": self._synced_id, "top_k": self.top_k}
+
+
+def reindex_on_commit(recommender):
+    """GalleryItem 이 ORM 으로 추가되거나 제목/설명이 바뀌면 커밋 후 그 작품만 인덱스에 올린다."""
+
+    def _mark(mapper, connection, target):
+        state = inspect(target)
+        if state.attrs.title.history.has_changes() or state.attrs.description.history.has_changes():
+            items = object_session(target).info.setdefault("recommend_items", {})
+            items[target.id] = (target.id, target.title, target.description)
+
+    event.listen(models.GalleryItem, "after_insert", _mark)
+    event.listen(models.GalleryItem, "after_update", _mark)
+
+    @event.listens_for(Session, "after_commit")
+    def _index(session):
+        items = session.info.pop("recommend_items", None)
+        if items:
+            recommender.index_later(list(items.values()))
+
+    @event.listens_for(Session, "after_soft_rollback")
+    def _discard(session, previous_transaction):
+        session.info.pop("recommend_items", None)
+
+
+def recommender_from_env():
+    dim = int(os.getenv("RECOMMEND_DIM", "512"))
+    return Recommender(
+        vector_index_from_env(dim),
+        HashingEmbedder(dim),
+        top_k=int(os.getenv("RECOMMEND_TOP_K", "10")),
+        ttl=float(os.getenv("RECOMMEND_TTL", "3600")),
+    )
+
+
+async def _refresh_all(recommender, concurrency=8):
+    async with database.AsyncSessionLocal() as db:
+        await recommender.sync_items(db)
+        wallets = (await db.scalars(select(models.User.wallet_address))).all()
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(wallet):
+        async with sem, database.AsyncSessionLocal() as db:
+            await recommender.refresh(db, wallet)
+
+    await asyncio.gather(*(one(w) for w in wallets))
+    print(f"✅ [Recommend] 유저 {len(wallets)}명 추천 저장")
+
+
+async def _main(command):
+    recommender = recommender_from_env()
+    try:
+        if command == "reindex":
+            async with database.AsyncSessionLocal() as db:
+                await recommender.sync_items(db)
+        else:
+            await _refresh_all(recommender)
+    finally:
+        await database.async_engine.dispose()
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "refresh"
+    if command not in ("reindex", "refresh"):
+        print("usage: python -m app.recommender [reindex|refresh]")
+        sys.exit(2)
+    asyncio.run(_main(command))
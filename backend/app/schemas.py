@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
 from datetime import datetime
 
@@ -18,6 +18,17 @@ class UserResponse(BaseModel):
     class Config:
         from_attributes = True
 
+# 마이페이지 통합 조회 (/api/user/summary)
+class UserSummaryResponse(BaseModel):
+    wallet_address: str
+    nickname: str | None = None
+    membership_grade: str | None = None
+    token_balance: float | None = None
+    pending_rewards: float | None = None
+    is_delegated: bool | None = None
+    delegated_to: str | None = None
+    badge: str | None = None
+
 # === 추천 전시 (마이페이지용) ===
 class RecommendationResponse(BaseModel):
     title: str
@@ -31,6 +42,15 @@ class A2AChatRequest(BaseModel):
 class A2AChatResponse(BaseModel):
     reply: str
 
+class A2AChatLogResponse(BaseModel):
+    id: int
+    user_message: str
+    ai_reply: str
+    agent_type: str | None = None
+    created_at: datetime | None = None
+    class Config:
+        from_attributes = True
+
 class A2ARecommendationItem(BaseModel):
     id: int
     title: str
@@ -70,6 +90,33 @@ class ProposalResponse(BaseModel):
     class Config:
         from_attributes = True
 
+# === 온체인 DAO 안건 (인덱서) ===
+class DaoProposalResponse(BaseModel):
+    proposal_id: int
+    title: str | None
+    content_hash: str | None = None
+    proposer: str
+    status: str
+    vote_count: int
+    art_request_id: int | None = None
+    created_block: int
+    created_tx: str
+    updated_block: int
+    class Config:
+        from_attributes = True
+
+class DaoVoteResponse(BaseModel):
+    voter: str
+    vote_count: int
+    block_number: int
+    tx_hash: str
+    class Config:
+        from_attributes = True
+
+class DaoProposalDetailResponse(DaoProposalResponse):
+    votes: List[DaoVoteResponse] = []
+    art_request: ProposalResponse | None = None
+
 # === AI 스튜디오 ===
 class StudioDraftRequest(BaseModel):
     intent: str
@@ -77,8 +124,45 @@ class StudioDraftResponse(BaseModel):
     draft_text: str
 class StudioImageRequest(BaseModel):
     keywords: str
+    style: str = "Digital Art"
+    # 없으면 (keywords, style) 로 정해지는 고정 seed → 같은 요청은 같은 그림
+    seed: Optional[int] = None
 class StudioImageResponse(BaseModel):
     image_url: str
+    thumbnail_url: str | None = None
+    seed: int | None = None
+    prompt: str | None = None
+    cached: bool = False
+class StudioFullCourseRequest(BaseModel):
+    topic: str
+    style: str = "Digital Art"
+
+# === 비동기 AI 작업 ===
+class JobCreate(BaseModel):
+    kind: str  # full-course | studio.draft | studio.image
+    payload: dict = Field(default_factory=dict)
+    # 없으면 작업 종류별 기본값 (클수록 먼저)
+    priority: Optional[int] = None
+    wallet_address: Optional[str] = None
+
+class JobResponse(BaseModel):
+    job_id: str
+    kind: str
+    status: str
+    priority: int
+    attempts: int
+    max_attempts: int
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+class JobAccepted(BaseModel):
+    job_id: str
+    status: str
+    status_url: str
+    ws_url: str
 
 # === 갤러리 & 피드백 ===
 class FeedbackResponse(BaseModel):
@@ -89,6 +173,14 @@ class FeedbackResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class FeedbackCreate(BaseModel):
+    item_id: int
+    content: str
+    wallet_address: str
+
+class FeedbackBulkRequest(BaseModel):
+    items: List[FeedbackCreate] = Field(default_factory=list, max_length=1000)
+
 class GalleryItemResponse(BaseModel):
     id: int
     title: str
@@ -96,6 +188,8 @@ class GalleryItemResponse(BaseModel):
     image_url: str
     description: str
     feedbacks: List[FeedbackResponse] = []
+    # feedbacks=count/latest 로 조회했을 때만 채워짐
+    feedback_count: int | None = None
     class Config:
         from_attributes = True
         
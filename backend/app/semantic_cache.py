@@ -0,0 +1,175 @@
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from .embeddings import KOREAN_PARTICLES, QUESTION_STOPWORDS, embedder_from_env
+
+# =========================================================
+# 🧠 큐레이터 채팅 의미 캐시 (비슷한 질문이면 저장된 답변 재사용)
+# =========================================================
+#   SEMANTIC_CACHE_MAX         범위(scope)별 최대 질문 수, 0 이면 끔 (기본 500)
+#   SEMANTIC_CACHE_SCOPES      최대 범위 수 (기본 1000, 넘치면 가장 오래 안 쓴 범위부터 제거)
+#   SEMANTIC_CACHE_THRESHOLD   재사용할 최소 코사인 유사도 (기본 0.9)
+#   SEMANTIC_CACHE_TTL         답변 유효 시간, 초 (기본 86400)
+#   SEMANTIC_CACHE_EMBEDDER    hashing (기본) | sentence-transformers:<로컬 모델>
+#
+# 범위는 작품 단위 ("item:12") 또는 전체 ("global"): 같은 "색감 어때요?" 라도 작품이 다르면
+# 다른 답이다. 범위 안에서는 TTL 이 지난 항목, 그다음 가장 오래 안 쓴 항목부터 제거한다.
+# 질문 임베딩은 조사/상투어를 뺀 해싱이라 "이 작품 어때요?" 처럼 내용어가 없는 질문은
+# 영벡터가 되어 캐시를 타지 않는다 (앞 대화에 기대는 짧은 후속 질문이 엉뚱하게 재사용되지 않도록).
+
+# 최고 유사도 분포 버킷 (상한)
+SIMILARITY_BUCKETS = (0.5, 0.7, 0.8, 0.85, 0.9, 0.95, 1.0)
+
+
+class _Scope:
+    def __init__(self, dim):
+        self.vectors = np.zeros((0, dim), dtype=np.float32)
+        self.entries = []  # [question, answer, 만료 시각, 마지막 사용 시각]
+
+    def remove(self, rows):
+        rows = set(rows)
+        keep = [i for i in range(len(self.entries)) if i not in rows]
+        self.vectors = self.vectors[keep]
+        self.entries = [self.entries[i] for i in keep]
+
+
+class SemanticCache:
+    def __init__(self, embedder, threshold=0.9, ttl=86400.0, max_entries=500, max_scopes=1000):
+        self.embedder = embedder
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_scopes = max_scopes
+        self._scopes = OrderedDict()  # scope → _Scope
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.hits = 0
+        self.stores = 0
+        self.evictions = 0
+        self.skipped = 0  # 내용어가 없어 캐시를 건너뛴 질문
+        self._histogram = [0] * len(SIMILARITY_BUCKETS)
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0
+
+    def _observe(self, similarity):
+        for i, upper in enumerate(SIMILARITY_BUCKETS):
+            if similarity <= upper:
+                self._histogram[i] += 1
+                return
+
+    def get(self, scope, question):
+        """(답변, 유사도) 또는 None."""
+        if not self.enabled:
+            return None
+        vector = self.embedder.embed(question)
+        now = time.time()
+        with self._lock:
+            self.lookups += 1
+            if not vector.any():
+                self.skipped += 1
+                return None
+            entry = self._scopes.get(scope)
+            if entry is None or not entry.entries:
+                self._observe(0.0)
+                return None
+            self._scopes.move_to_end(scope)
+            expired = [i for i, e in enumerate(entry.entries) if e[2] <= now]
+            if expired:
+                entry.remove(expired)
+                self.evictions += len(expired)
+                if not entry.entries:
+                    self._observe(0.0)
+                    return None
+            scores = entry.vectors @ vector
+            best = int(np.argmax(scores))
+            similarity = float(scores[best])
+            self._observe(similarity)
+            if similarity < self.threshold:
+                return None
+            self.hits += 1
+            entry.entries[best][3] = now
+            return entry.entries[best][1], similarity
+
+    def set(self, scope, question, answer):
+        if not self.enabled:
+            return
+        vector = self.embedder.embed(question)
+        if not vector.any():
+            return
+        now = time.time()
+        with self._lock:
+            entry = self._scopes.get(scope)
+            if entry is None:
+                entry = self._scopes[scope] = _Scope(len(vector))
+                while len(self._scopes) > self.max_scopes:
+                    _, dropped = self._scopes.popitem(last=False)
+                    self.evictions += len(dropped.entries)
+            self._scopes.move_to_end(scope)
+            if len(entry.entries) >= self.max_entries:
+                # TTL 지난 것 먼저, 없으면 가장 오래 안 쓴 것
+                expired = [i for i, e in enumerate(entry.entries) if e[2] <= now]
+                victims = expired or [min(range(len(entry.entries)), key=lambda i: entry.entries[i][3])]
+                entry.remove(victims)
+                self.evictions += len(victims)
+            entry.vectors = np.vstack([entry.vectors, vector[None, :]])
+            entry.entries.append([question, answer, now + self.ttl, now])
+            self.stores += 1
+
+    # 임베딩 + 유사도 계산(numpy)은 CPU 작업이라 async 라우트에서는 스레드로 돌린다
+    async def aget(self, scope, question):
+        if not self.enabled:
+            return None
+        return await asyncio.to_thread(self.get, scope, question)
+
+    async def aset(self, scope, question, answer):
+        if not self.enabled:
+            return
+        await asyncio.to_thread(self.set, scope, question, answer)
+
+    def invalidate(self, scope=None):
+        with self._lock:
+            if scope is None:
+                self._scopes.clear()
+            else:
+                self._scopes.pop(scope, None)
+
+    def stats(self):
+        with self._lock:
+            compared = self.lookups - self.skipped
+            return {
+                "enabled": self.enabled,
+                "embedder": self.embedder.describe(),
+                "threshold": self.threshold,
+                "scopes": len(self._scopes),
+                "entries": sum(len(s.entries) for s in self._scopes.values()),
+                "lookups": self.lookups,
+                "compared": compared,
+                "hits": self.hits,
+                "hit_rate": round(self.hits / self.lookups, 4) if self.lookups else 0.0,
+                "skipped": self.skipped,
+                "stores": self.stores,
+                "evictions": self.evictions,
+                # 조회마다 가장 가까운 질문과의 유사도 분포 (임계값 조정용)
+                "similarity": {f"<={upper}": count for upper, count in zip(SIMILARITY_BUCKETS, self._histogram)},
+            }
+
+
+def chat_scope(item_id=None):
+    return f"item:{item_id}" if item_id is not None else "global"
+
+
+def semantic_cache_from_env():
+    return SemanticCache(
+        embedder_from_env("SEMANTIC_CACHE", stopwords=QUESTION_STOPWORDS, particles=KOREAN_PARTICLES),
+        threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.9")),
+        ttl=float(os.getenv("SEMANTIC_CACHE_TTL", "86400")),
+        max_entries=int(os.getenv("SEMANTIC_CACHE_MAX", "500")),
+        max_scopes=int(os.getenv("SEMANTIC_CACHE_SCOPES", "1000")),
+    )
@@ -0,0 +1,145 @@
+"""DB 라우트 동시성 벤치마크: 동기 세션 + 스레드풀(기존) vs 비동기 엔진(현재)
+
+    cd backend
+    python bench_db_concurrency.py
+    python bench_db_concurrency.py --clients 100 --requests 2000 --db-latency-ms 5 --slow-clients 60
+
+SQLite 파일 DB 에 안건을 채우고, 네트워크 DB 처럼 쿼리마다 --db-latency-ms 만큼
+DB 쪽 스레드에서 지연을 준다 (SELECT 에 한 번만 평가되는 sleep_ms() 서브쿼리 컬럼을 덧붙임).
+--slow-clients 는 기존 /api/proposal/create 처럼 스레드풀에서 1초를 붙잡는
+요청을 함께 보내서, DB 대기와 다른 대기가 같은 40개 스레드를 두고 경쟁하는 상황을 만든다.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "bench_db.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{DB_PATH}")
+os.environ.setdefault("DB_POOL_SIZE", "20")
+os.environ.setdefault("DB_MAX_OVERFLOW", "20")
+os.environ.setdefault("DB_POOL_TIMEOUT", "5")
+
+import httpx
+from fastapi import Depends, FastAPI, Query
+from sqlalchemy import event, insert
+from sqlalchemy.orm import Session
+
+from app import database, migrations, models, schemas
+from app.main import app as async_app
+
+
+def add_db_latency(engine, latency_ms):
+    """쿼리마다 DB 커넥션 스레드에서 latency_ms 만큼 잠들게 한다 (이벤트 루프/워커 스레드가 아니라)."""
+
+    @event.listens_for(engine, "connect")
+    def _register(dbapi_connection, _record):
+        dbapi_connection.create_function("sleep_ms", 1, lambda ms: time.sleep(ms / 1000))
+
+    @event.listens_for(engine, "before_cursor_execute", retval=True)
+    def _delay(conn, cursor, statement, parameters, context, executemany):
+        if latency_ms and statement.startswith("SELECT") and "\nFROM" in statement:
+            head, tail = statement.split("\nFROM", 1)
+            statement = f"{head}, (SELECT sleep_ms({latency_ms})) AS _bench_latency\nFROM{tail}"
+        return statement, parameters
+
+
+# --- 기존 구현 (동기 def 라우트 → 스레드풀) ---
+legacy_app = FastAPI()
+
+def legacy_get_db():
+    db = database.SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+@legacy_app.get("/api/proposals", response_model=list[schemas.ProposalResponse])
+def legacy_get_proposals(status: Optional[str] = Query(None), page: int = 1, limit: int = 10,
+                         db: Session = Depends(legacy_get_db)):
+    query = db.query(models.ArtRequest)
+    if status:
+        query = query.filter(models.ArtRequest.status == status)
+    query = query.order_by(models.ArtRequest.created_at.desc())
+    return query.offset((page - 1) * limit).limit(limit).all()
+
+@legacy_app.post("/api/proposal/create")
+def legacy_propose(intent: str):
+    time.sleep(1)
+    return {"proposal_text": intent}
+
+
+def seed(rows):
+    migrations.upgrade(database.engine)
+    t0 = datetime(2025, 1, 1)
+    with database.engine.begin() as conn:
+        conn.execute(insert(models.ArtRequest), [
+            {"wallet_address": f"0x{i % 300:040x}", "title": f"안건 {i}", "status": ("OPEN", "CLOSED")[i % 2],
+             "created_at": t0 + timedelta(minutes=i)} for i in range(rows)])
+
+
+async def run(app, args):
+    latencies = []
+    errors = 0
+    sem = asyncio.Semaphore(args.clients)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        async def proposals(i):
+            nonlocal errors
+            async with sem:
+                started = time.perf_counter()
+                try:
+                    resp = await client.get("/api/proposals", params={"status": "OPEN", "page": 1 + i % 5})
+                    errors += resp.status_code != 200
+                except Exception:
+                    # 풀 타임아웃 등 (ASGITransport 는 서버 예외를 그대로 올려보냄)
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+
+        async def slow():
+            await client.post("/api/proposal/create", params={"intent": "bench"})
+
+        started = time.perf_counter()
+        slow_tasks = [asyncio.create_task(slow()) for _ in range(args.slow_clients)]
+        await asyncio.gather(*(proposals(i) for i in range(args.requests)))
+        elapsed = time.perf_counter() - started
+        await asyncio.gather(*slow_tasks)
+
+    latencies.sort()
+    pct = lambda p: latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50": pct(0.50), "p95": pct(0.95), "p99": pct(0.99),
+        "mean": statistics.mean(latencies) * 1000, "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--clients", type=int, default=100, help="동시 요청 수")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--db-latency-ms", type=int, default=5)
+    parser.add_argument("--slow-clients", type=int, default=60, help="스레드풀에서 1초 대기하는 요청 수")
+    args = parser.parse_args()
+
+    seed(args.rows)
+    database.engine.dispose()  # sleep_ms 함수가 등록된 새 커넥션부터 쓰도록
+    add_db_latency(database.engine, args.db_latency_ms)
+    add_db_latency(database.async_engine.sync_engine, args.db_latency_ms)
+    print(f"\n동시 {args.clients} / 요청 {args.requests} / DB 지연 {args.db_latency_ms}ms / "
+          f"느린 요청 {args.slow_clients} / 풀 {os.environ['DB_POOL_SIZE']}+{os.environ['DB_MAX_OVERFLOW']}")
+    for label, app in (("before: sync + threadpool", legacy_app), ("after : async engine", async_app)):
+        r = asyncio.run(run(app, args))
+        print(f"{label:<28} {r['rps']:>8.1f} req/s  p50 {r['p50']:>7.1f}ms  p95 {r['p95']:>7.1f}ms  "
+              f"p99 {r['p99']:>7.1f}ms  errors {r['errors']}")
+    asyncio.run(database.async_engine.dispose())
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""/api/gallery/items 쿼리 수 / 응답 시간 벤치마크 (SQLite 파일 DB, 네트워크 없음)
+
+    cd backend
+    python bench_gallery.py                      # 10k 작품 / 1M 관람평
+    python bench_gallery.py --items 1000 --feedbacks 100000
+
+before: 기존 구현 (전체 조회 + 작품마다 관람평 지연 로딩 = N+1)
+after : load_gallery_page (IN 쿼리 일괄 로딩 + 커서 페이지, 관람평 full/latest/count)
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_gallery.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{DB_PATH}")
+
+from sqlalchemy import event, insert
+
+from app import models, schemas, database, migrations
+from app.main import load_gallery_page
+from app.pagination import encode_cursor
+
+
+class QueryCounter:
+    def __init__(self, *engines):
+        self.count = 0
+        for engine in engines:
+            event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args, **kwargs):
+        self.count += 1
+
+
+def seed(n_items, n_feedbacks, batch=20000):
+    engine = database.engine
+    with engine.begin() as conn:
+        have = conn.execute(models.GalleryItem.__table__.select().limit(1)).first()
+    if have:
+        print(f"📦 기존 벤치 DB 사용: {DB_PATH}")
+        return
+    print(f"📦 데이터 생성: 작품 {n_items:,} / 관람평 {n_feedbacks:,}")
+    rng = random.Random(42)
+    with engine.begin() as conn:
+        conn.execute(insert(models.User), [{"wallet_address": f"0x{i:040x}"} for i in range(1000)])
+        conn.execute(insert(models.GalleryItem), [
+            {"id": i + 1, "title": f"작품 {i}", "artist_address": "0xartist",
+             "image_url": f"https://img/{i}.png", "description": "네온 도시의 밤"}
+            for i in range(n_items)
+        ])
+        for start in range(0, n_feedbacks, batch):
+            conn.execute(insert(models.GalleryFeedback), [
+                {"item_id": rng.randint(1, n_items), "wallet_address": f"0x{rng.randrange(1000):040x}",
+                 "content": "좋은 작품입니다"}
+                for _ in range(start, min(start + batch, n_feedbacks))
+            ])
+
+
+def report(label, counter, started, rows):
+    payload = [schemas.GalleryItemResponse.model_validate(r).model_dump() for r in rows]
+    elapsed = time.perf_counter() - started
+    feedbacks = sum(len(p["feedbacks"]) for p in payload)
+    print(f"{label:<34} 쿼리 {counter.count:>6}회  {elapsed * 1000:>9.1f} ms  작품 {len(payload):>6}  관람평 {feedbacks:>8}")
+
+
+def measure_legacy(label, counter):
+    # 기존 구현: 동기 세션 + 직렬화 중 관람평 지연 로딩
+    db = database.SessionLocal()
+    try:
+        counter.count = 0
+        started = time.perf_counter()
+        report(label, counter, started, db.query(models.GalleryItem).all())
+    finally:
+        db.close()
+
+
+async def measure(label, fn, counter):
+    async with database.AsyncSessionLocal() as db:
+        counter.count = 0
+        started = time.perf_counter()
+        report(label, counter, started, await fn(db))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=10_000)
+    parser.add_argument("--feedbacks", type=int, default=1_000_000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--reset", action="store_true", help="벤치 DB 를 지우고 다시 생성")
+    args = parser.parse_args()
+
+    if args.reset and os.path.exists(DB_PATH):
+        os.remove(DB_PATH)
+    migrations.upgrade(database.engine)
+    seed(args.items, args.feedbacks)
+    counter = QueryCounter(database.engine, database.async_engine.sync_engine)
+
+    print()
+    measure_legacy("before: 전체 + N+1 지연 로딩", counter)
+    asyncio.run(measure_pages(args, counter))
+
+
+async def measure_pages(args, counter):
+    await measure("after : 전체 페이지 순회 (full)", lambda db: load_all_pages(db, "full"), counter)
+    for mode in ("full", "latest", "count"):
+        await measure(f"after : 첫 페이지 {args.limit}개 ({mode})",
+                      lambda db, mode=mode: first_page(db, None, args.limit, mode), counter)
+    await measure("after : 마지막 근처 페이지 (latest)", lambda db: first_page(
+        db, last_page_cursor(args.items, args.limit), args.limit, "latest"), counter)
+    await database.async_engine.dispose()
+
+
+async def first_page(db, cursor, limit, mode):
+    return (await load_gallery_page(db, cursor, limit, mode, 3))[0]
+
+
+async def load_all_pages(db, mode, limit=200):
+    rows, cursor = [], None
+    while True:
+        page, cursor = await load_gallery_page(db, cursor, limit, mode, 3)
+        rows.extend(page)
+        if not cursor:
+            return rows
+
+
+def last_page_cursor(n_items, limit):
+    return encode_cursor({"id": max(0, n_items - limit)})
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+"""ArtPlanningDAO 인덱서 점검 — 로컬 Hardhat 노드에 배포해서 실제 로그로 확인
+
+    cd blockchain && npx hardhat node              # 다른 터미널 (자동 채굴, 잠금 해제된 계정)
+    cd backend && python check_chain_indexer.py    # CHAIN_RPC_URL 기본 http://127.0.0.1:8545
+
+blockchain/artifacts 의 컴파일 결과로 컨트랙트를 새로 배포하고, 안건 생성/투표 뒤
+확정 깊이 / 배치 조회 / DB 안건 연결 / 깊은 reorg (evm_snapshot → evm_revert) / 목록·상세 API 를
+확인한다. 실패하면 exit 1.
+"""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'chain.db')}")
+RPC_URL = os.getenv("CHAIN_RPC_URL", "http://127.0.0.1:8545")
+ARTIFACT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "blockchain", "artifacts",
+                        "contracts", "ArtPlanningDAO.sol", "ArtPlanningDAO.json")
+
+import httpx
+from eth_abi import encode
+from eth_utils import keccak
+from sqlalchemy import insert, select
+
+from app import database, migrations, models
+from app.chain_indexer import ChainRpc, DaoIndexer
+
+CONFIRMATIONS = 2
+
+
+def calldata(signature, types, args):
+    return "0x" + (keccak(text=signature)[:4] + encode(types, args)).hex()
+
+
+class Chain:
+    def __init__(self, rpc):
+        self.rpc = rpc
+
+    async def send(self, sender, data, to=None):
+        tx = {"from": sender, "data": data, "gas": hex(3_000_000)}
+        if to:
+            tx["to"] = to
+        tx_hash = await self.rpc.call("eth_sendTransaction", tx)
+        receipt = await self.rpc.call("eth_getTransactionReceipt", tx_hash)
+        if receipt is None or int(receipt["status"], 16) != 1:
+            raise RuntimeError(f"트랜잭션 실패: {tx_hash}")
+        return receipt
+
+    async def mine(self, blocks=1):
+        for _ in range(blocks):
+            await self.rpc.call("evm_mine")
+
+
+async def run():
+    failed = []
+
+    def check(name, ok, detail=""):
+        print(f"{'✅' if ok else '❌'} {name} {detail}")
+        if not ok:
+            failed.append(name)
+
+    rpc = ChainRpc(RPC_URL)
+    chain = Chain(rpc)
+    accounts = await rpc.call("eth_accounts")
+    with open(ARTIFACT) as f:
+        bytecode = json.load(f)["bytecode"]
+    dao = (await chain.send(accounts[0], bytecode))["contractAddress"]
+    start = await rpc.block_number()
+    print(f"📜 ArtPlanningDAO 배포: {dao} (블록 {start})")
+
+    os.environ["DAO_CONTRACT_ADDRESS"] = dao
+    from app import main  # DAO_CONTRACT_ADDRESS 를 읽도록 배포 뒤에 import
+
+    # 제안자 지갑 + 같은 제목의 DB 안건 → 인덱싱할 때 연결되어야 함
+    async with database.AsyncSessionLocal() as db:
+        await db.execute(insert(models.User), [{"wallet_address": accounts[1]}])
+        await db.execute(insert(models.ArtRequest), [{"wallet_address": accounts[1], "title": "달빛 항구"}])
+        await db.commit()
+
+    create = lambda title: calldata("createProposal(string,string,string)", ["string"] * 3,
+                                    [title, f"{title} 설명", "ipfs://image"])
+    vote = lambda pid: calldata("vote(uint256)", ["uint256"], [pid])
+    await chain.send(accounts[1], create("달빛 항구"), dao)
+    await chain.send(accounts[2], create("여름 정원"), dao)
+    for voter in accounts[3:8]:
+        await chain.send(voter, vote(0), dao)  # 5표 → ACCEPTED
+    await chain.send(accounts[3], vote(1), dao)
+    await chain.send(accounts[4], vote(1), dao)
+
+    # 배치를 작게 잡아 여러 번 나눠 조회하는지도 함께 확인
+    indexer = DaoIndexer(rpc, dao, start_block=start, confirmations=CONFIRMATIONS, batch=3)
+    await indexer.sync_once()
+    async with database.AsyncSessionLocal() as db:
+        second = await db.scalar(select(models.DaoProposal).where(models.DaoProposal.proposal_id == 1))
+    check("확정 깊이 전 블록은 미반영", second is not None and second.vote_count == 0, f"(득표 {second.vote_count if second else None})")
+
+    await chain.mine(CONFIRMATIONS)
+    applied = await indexer.sync_once()
+    check("확정 후 반영", applied == 2, f"(이벤트 {applied})")
+    check("다시 실행하면 반영할 것 없음", await indexer.sync_once() == 0)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://check") as client:
+        listed = (await client.get("/api/dao/proposals")).json()
+        check("목록", [(p["proposal_id"], p["status"], p["vote_count"]) for p in listed]
+              == [(1, "IN_PROGRESS", 2), (0, "ACCEPTED", 5)], f"{[(p['proposal_id'], p['status'], p['vote_count']) for p in listed]}")
+        page = await client.get("/api/dao/proposals", params={"limit": 1})
+        rest = await client.get("/api/dao/proposals", params={"limit": 1, "cursor": page.headers.get("x-next-cursor")})
+        check("커서 페이지", page.json()[0]["proposal_id"] == 1 and rest.json()[0]["proposal_id"] == 0
+              and "x-next-cursor" not in rest.headers)
+        detail = (await client.get("/api/dao/proposals/0")).json()
+        check("상세: 투표 + DB 안건 연결", len(detail["votes"]) == 5 and detail["art_request"] is not None
+              and detail["art_request"]["title"] == "달빛 항구", f"(art_request_id {detail['art_request_id']})")
+        check("ACCEPTED 필터", [p["proposal_id"] for p in (await client.get(
+            "/api/dao/proposals", params={"status": "ACCEPTED"})).json()] == [0])
+        check("없는 안건 → 404", (await client.get("/api/dao/proposals/99")).status_code == 404)
+
+    # 확정 깊이보다 깊은 reorg: 스냅샷 뒤 블록을 인덱싱한 다음 되돌리고 다른 블록을 쌓는다
+    snapshot = await rpc.call("evm_snapshot")
+    await chain.send(accounts[5], vote(1), dao)
+    await chain.send(accounts[6], create("사라질 안건"), dao)
+    await chain.mine(CONFIRMATIONS)
+    await indexer.sync_once()
+    async with database.AsyncSessionLocal() as db:
+        ghost = await db.scalar(select(models.DaoProposal).where(models.DaoProposal.proposal_id == 2))
+    check("reorg 전: 사라질 안건 반영됨", ghost is not None)
+
+    await rpc.call("evm_revert", snapshot)
+    await chain.send(accounts[7], vote(1), dao)
+    await chain.mine(CONFIRMATIONS + 2)  # 새 체인이 더 길어지도록
+    await indexer.sync_once()
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://check") as client:
+        listed = (await client.get("/api/dao/proposals")).json()
+        voters = [v["voter"] for v in (await client.get("/api/dao/proposals/1")).json()["votes"]]
+    check("reorg 후: 사라진 안건 제거", [p["proposal_id"] for p in listed] == [1, 0], f"{[p['proposal_id'] for p in listed]}")
+    check("reorg 후: 투표 다시 계산", accounts[7].lower() in voters and accounts[5].lower() not in voters
+          and listed[0]["vote_count"] == 3, f"(득표 {listed[0]['vote_count']})")
+    status = await indexer.status()
+    check("커서 = head - 확정 깊이", status["lag"] == 0, f"{status}")
+
+    await rpc.close()
+    print(f"\n{'모두 통과' if not failed else f'{len(failed)}건 실패'}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    migrations.upgrade(database.engine)
+    sys.exit(asyncio.run(run()))
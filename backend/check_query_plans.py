@@ -0,0 +1,187 @@
+"""주요 조회 쿼리의 실행 계획(EXPLAIN) 점검 — 인덱스를 안 타고 전체 스캔하면 실패(exit 1)
+
+    cd backend
+    python check_query_plans.py                       # 임시 SQLite DB
+    DATABASE_URL=mysql+pymysql://... python check_query_plans.py
+
+마이그레이션을 적용한 뒤, 테이블이 비어 있으면 합성 데이터를 넣고(통계용)
+SQLite 는 EXPLAIN QUERY PLAN, MySQL 은 EXPLAIN 결과를 검사한다.
+"""
+import os
+import random
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'plans.db')}"
+
+from sqlalchemy import func, insert, or_, and_, select, text
+
+from app import database, migrations, models
+
+A = models.ArtRequest
+F = models.GalleryFeedback
+G = models.GalleryItem
+C = models.A2AChatLog
+R = models.UserRecommendation
+D = models.DocentScript
+J = models.AIJob
+P = models.DaoProposal
+V = models.DaoVote
+DAO = f"0x{0xda0:040x}"
+WALLET = f"0x{7:040x}"
+T0 = datetime(2025, 1, 1)
+
+
+def latest_feedbacks_stmt():
+    rank = func.row_number().over(partition_by=F.item_id, order_by=(F.created_at.desc(), F.id.desc())).label("rank")
+    ranked = select(F.id.label("id"), rank).where(F.item_id.in_([1, 2, 3])).subquery()
+    return select(F).join(ranked, ranked.c.id == F.id).where(ranked.c.rank <= 3)
+
+
+# (이름, 쿼리, 대상 테이블, 기대 인덱스 또는 None(아무 인덱스), 정렬용 임시 테이블 허용 여부)
+CHECKS = [
+    ("user by wallet", select(models.User).where(models.User.wallet_address == WALLET), "users", None, False),
+    ("proposals by status (latest)",
+     select(A).where(A.status == "OPEN").order_by(A.created_at.desc(), A.id.desc()).limit(11),
+     "art_requests", "ix_art_requests_status_created_id", False),
+    ("proposals by status (keyset)",
+     select(A).where(A.status == "OPEN", or_(A.created_at < T0, and_(A.created_at == T0, A.id < 100)))
+     .order_by(A.created_at.desc(), A.id.desc()).limit(11),
+     "art_requests", "ix_art_requests_status_created_id", False),
+    ("proposals all (latest)", select(A).order_by(A.created_at.desc(), A.id.desc()).limit(11),
+     "art_requests", "ix_art_requests_created_id", False),
+    ("my proposals", select(A).where(A.wallet_address == WALLET).order_by(A.created_at.desc(), A.id.desc()).limit(51),
+     "art_requests", "ix_art_requests_wallet_created_id", False),
+    ("gallery page", select(G).where(G.id > 100).order_by(G.id).limit(51), "gallery_items", "PRIMARY", False),
+    ("feedbacks IN items", select(F).where(F.item_id.in_([1, 2, 3])),
+     "gallery_feedbacks", "ix_gallery_feedbacks_item_created_id", True),
+    ("feedback counts", select(F.item_id, func.count(F.id)).where(F.item_id.in_([1, 2, 3])).group_by(F.item_id),
+     "gallery_feedbacks", "ix_gallery_feedbacks_item_created_id", True),
+    ("latest feedbacks", latest_feedbacks_stmt(), "gallery_feedbacks", "ix_gallery_feedbacks_item_created_id", True),
+    ("feedbacks by wallet", select(F).where(F.wallet_address == WALLET),
+     "gallery_feedbacks", "ix_gallery_feedbacks_wallet_address", False),
+    ("chat history", select(C).where(C.wallet_address == WALLET).order_by(C.created_at.desc(), C.id.desc()).limit(21),
+     "a2a_chat_logs", "ix_a2a_chat_logs_wallet_created", False),
+    ("chat summary state",
+     select(C).where(C.wallet_address == WALLET, C.summary_through_id.isnot(None))
+     .order_by(C.created_at.desc(), C.id.desc()).limit(1),
+     "a2a_chat_logs", "ix_a2a_chat_logs_wallet_created", False),
+    ("chat turns after summary",
+     select(C).where(C.wallet_address == WALLET, C.id > 100).order_by(C.created_at.desc(), C.id.desc()).limit(20),
+     "a2a_chat_logs", "ix_a2a_chat_logs_wallet_created", False),
+    ("recommendations", select(R).where(R.wallet_address == WALLET),
+     "user_recommendations", "ix_user_recommendations_wallet_address", False),
+    ("docent script", select(D.script).where(D.item_id == 7, D.audience_type == "일반 관람객"),
+     "docent_scripts", "ux_docent_scripts_item_audience", False),
+    # 대기 작업 중 우선순위 순 (같은 우선순위 안의 created_at 오름차순은 소량 정렬 허용)
+    ("job claim", select(J.id).where(J.status == "QUEUED", J.run_after <= T0 + timedelta(days=1))
+     .order_by(J.priority.desc(), J.created_at).limit(4), "ai_jobs", "ix_ai_jobs_status_priority", True),
+    ("my jobs", select(J).where(J.wallet_address == WALLET).order_by(J.created_at.desc()).limit(20),
+     "ai_jobs", "ix_ai_jobs_wallet_created", False),
+    ("dao proposals (latest)", select(P).where(P.contract_address == DAO).order_by(P.proposal_id.desc()).limit(21),
+     "dao_proposals", "ux_dao_proposals_contract_proposal", False),
+    ("dao proposals by status", select(P).where(P.contract_address == DAO, P.status == "ACCEPTED", P.proposal_id < 500)
+     .order_by(P.proposal_id.desc()).limit(21), "dao_proposals", "ix_dao_proposals_contract_status_proposal", False),
+    ("dao proposal votes", select(V).where(V.contract_address == DAO, V.proposal_id == 7)
+     .order_by(V.block_number.desc(), V.id.desc()).limit(50), "dao_votes", "ux_dao_votes_contract_proposal_voter", True),
+]
+
+
+def seed(conn, rows=3000):
+    if conn.execute(select(func.count()).select_from(A)).scalar():
+        return
+    print(f"📦 합성 데이터 {rows}건씩 생성")
+    rng = random.Random(1)
+    wallets = [f"0x{i:040x}" for i in range(200)]
+    conn.execute(insert(models.User), [{"wallet_address": w} for w in wallets])
+    conn.execute(insert(A), [
+        {"wallet_address": rng.choice(wallets), "title": f"p{i}", "status": rng.choice(["OPEN", "CLOSED", "PASSED"]),
+         "created_at": T0 + timedelta(minutes=i)} for i in range(rows)])
+    conn.execute(insert(G), [{"title": f"g{i}", "artist_address": "0x", "image_url": "", "description": ""}
+                             for i in range(rows)])
+    conn.execute(insert(F), [{"item_id": rng.randint(1, rows), "wallet_address": rng.choice(wallets), "content": "c",
+                              "created_at": T0 + timedelta(seconds=i)} for i in range(rows * 5)])
+    conn.execute(insert(C), [{"wallet_address": rng.choice(wallets), "user_message": "q", "ai_reply": "a",
+                              "created_at": T0 + timedelta(seconds=i)} for i in range(rows)])
+    conn.execute(insert(R), [{"wallet_address": rng.choice(wallets), "recommended_title": "t", "reason": "r"}
+                             for i in range(rows)])
+    conn.execute(insert(D), [{"item_id": i + 1, "audience_type": audience, "script": "s", "source_hash": ""}
+                             for i in range(rows) for audience in ("일반 관람객", "어린이")])
+    conn.execute(insert(J), [{"id": f"{i:032x}", "kind": "full-course", "wallet_address": rng.choice(wallets),
+                              "status": "QUEUED" if i % 20 == 0 else "SUCCEEDED", "priority": rng.choice([0, 5, 10]),
+                              "payload": "{}", "run_after": T0 + timedelta(seconds=i),
+                              "created_at": T0 + timedelta(seconds=i)} for i in range(rows)])
+    conn.execute(insert(P), [{"contract_address": DAO, "proposal_id": i, "title": f"p{i}", "proposer": rng.choice(wallets),
+                              "status": rng.choice(["IN_PROGRESS", "ACCEPTED", "REJECTED"]), "vote_count": 0,
+                              "created_block": i, "created_tx": "0x", "updated_block": i} for i in range(rows)])
+    conn.execute(insert(V), [{"contract_address": DAO, "proposal_id": i % rows, "voter": wallets[i // rows], "vote_count": 1,
+                              "block_number": i, "tx_hash": "0x"} for i in range(rows * 5)])
+
+
+def explain(conn, stmt):
+    compiled = stmt.compile(dialect=conn.dialect, compile_kwargs={"render_postcompile": True})
+    if conn.dialect.name == "sqlite":
+        params = tuple(compiled.params[k] for k in compiled.positiontup)
+        return [row[-1] for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + str(compiled), params)]
+    result = conn.exec_driver_sql("EXPLAIN " + str(compiled), compiled.params)
+    return [dict(row._mapping) for row in result]
+
+
+def judge_sqlite(plan, table, index, allow_sort):
+    problems = []
+    for detail in plan:
+        if detail.startswith(("SCAN", "SEARCH")) and detail.split()[1] == table and "INDEX" not in detail \
+                and "PRIMARY KEY" not in detail:
+            problems.append(f"전체 스캔: {detail}")
+    mentions = " ".join(d for d in plan if table in d)
+    if index == "PRIMARY":
+        if "PRIMARY KEY" not in mentions and f"sqlite_autoindex_{table}" not in mentions:
+            problems.append("기본 키를 사용하지 않음")
+    elif index and index not in mentions:
+        problems.append(f"{index} 를 사용하지 않음")
+    if not allow_sort and any("TEMP B-TREE FOR ORDER BY" in d for d in plan):
+        problems.append("정렬용 임시 테이블 사용")
+    return problems
+
+
+def judge_mysql(plan, table, index, allow_sort):
+    problems = []
+    rows = [r for r in plan if r.get("table") == table]
+    if not rows:
+        return [f"{table} 이 계획에 없음"]
+    for row in rows:
+        if row.get("type") == "ALL":
+            problems.append(f"전체 스캔: {row}")
+        if index and row.get("key") != index:
+            problems.append(f"{index} 대신 {row.get('key')} 사용")
+        if not allow_sort and "filesort" in (row.get("Extra") or ""):
+            problems.append("filesort 사용")
+    return problems
+
+
+def main():
+    migrations.upgrade(database.engine)
+    failed = 0
+    with database.engine.connect() as conn:
+        seed(conn)
+        conn.execute(text("ANALYZE") if conn.dialect.name == "sqlite" else text(
+            "ANALYZE TABLE users, art_requests, gallery_items, gallery_feedbacks, a2a_chat_logs, user_recommendations"))
+        conn.commit()
+        judge = judge_sqlite if conn.dialect.name == "sqlite" else judge_mysql
+        for name, stmt, table, index, allow_sort in CHECKS:
+            plan = explain(conn, stmt)
+            problems = judge(plan, table, index, allow_sort)
+            print(f"{'✅' if not problems else '❌'} {name}")
+            for line in plan:
+                print(f"     {line}")
+            for problem in problems:
+                print(f"   ⚠️ {problem}")
+            failed += bool(problems)
+    print(f"\n{len(CHECKS) - failed}/{len(CHECKS)} 통과")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+"""스튜디오 이미지 캐시 점검 — 네트워크 없이 (로컬 생성기 + 가짜 화가 에이전트)
+
+    cd backend
+    python check_studio_images.py
+
+같은 (keywords, style, seed) 는 화가/생성기를 다시 부르지 않는지, 저장된 이미지가
+ETag(304) / Range(206, 416) / 축소본 / 용량 제한 삭제를 지키는지 확인한다. 실패하면 exit 1.
+"""
+import asyncio
+import io
+import os
+import sys
+import tempfile
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'studio.db')}")
+os.environ["STUDIO_IMAGE_GENERATOR"] = "local"
+os.environ["STUDIO_IMAGE_DIR"] = tempfile.mkdtemp()
+os.environ["STUDIO_IMAGE_SIZE"] = "512x384"
+
+import httpx
+from fastapi import FastAPI
+from PIL import Image
+
+from app import main
+
+# 가짜 화가: 호출 횟수만 센다
+painter = FastAPI()
+painter_calls = []
+
+@painter.post("/generate")
+def fake_generate(payload: dict):
+    painter_calls.append(payload["topic"])
+    if payload["topic"] == "화가 실패":
+        return {"final_prompt": "Error"}  # agent.py 의 painter 실패 응답
+    return {"final_prompt": f"{payload['topic']} in {payload['style']}, cinematic lighting"}
+
+
+async def run():
+    failed = []
+
+    def check(name, ok, detail=""):
+        print(f"{'✅' if ok else '❌'} {name} {detail}")
+        if not ok:
+            failed.append(name)
+
+    async with main.lifespan(main.app):
+        main.ai_agent._client = httpx.AsyncClient(transport=httpx.ASGITransport(app=painter), base_url="http://agent")
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://bench") as client:
+            first = await asyncio.gather(*[client.post("/api/studio/image", json={"keywords": "네온 도시"}) for _ in range(5)])
+            urls = {r.json()["image_url"] for r in first}
+            check("동시 요청 5건 → 생성 1번", len(urls) == 1 and len(painter_calls) == 1, f"(화가 호출 {len(painter_calls)})")
+
+            again = (await client.post("/api/studio/image", json={"keywords": "  네온  도시 "})).json()
+            check("같은 키워드 재요청 → 캐시", again["cached"] and len(painter_calls) == 1)
+
+            other = (await client.post("/api/studio/image", json={"keywords": "네온 도시", "seed": 7})).json()
+            check("seed 가 다르면 새로 생성", not other["cached"] and other["image_url"] != again["image_url"])
+
+            url = again["image_url"].replace("http://bench", "")
+            full = await client.get(url)
+            etag = full.headers.get("etag")
+            check("원본", full.status_code == 200 and full.headers["content-type"] == "image/png")
+            check("ETag → 304", (await client.get(url, headers={"If-None-Match": etag})).status_code == 304)
+            part = await client.get(url, headers={"Range": "bytes=10-19"})
+            check("Range → 206", part.status_code == 206 and part.content == full.content[10:20],
+                  part.headers.get("content-range", ""))
+            check("범위 밖 Range → 416", (await client.get(url, headers={"Range": "bytes=99999999-"})).status_code == 416)
+
+            thumb = await client.get(again["thumbnail_url"].replace("http://bench", ""))
+            size = Image.open(io.BytesIO(thumb.content)).size if thumb.status_code == 200 else None
+            check("썸네일", size == (256, 192), f"{size}")
+            check("허용하지 않는 크기 → 400", (await client.get(f"{url}?w=333")).status_code == 400)
+
+            # 용량 제한: 이미지 두 장 정도로 줄이고 새 이미지를 넣으면 오래 안 본 것부터 삭제
+            main.image_store.max_bytes = len(full.content) * 2
+            await client.post("/api/studio/image", json={"keywords": "수묵 산수"})
+            stats = (await client.get("/api/studio/image/stats")).json()
+            check("용량 제한 삭제", stats["bytes"] <= main.image_store.max_bytes and stats["evictions"] > 0, f"{stats}")
+            # 화가가 실패하면 실패 프롬프트로 그리지 않고, 생성 기록도 남기지 않는다
+            failed_gen = (await client.post("/api/studio/image", json={"keywords": "화가 실패"})).json()
+            key = main.generation_key("화가 실패", "Digital Art", main.default_seed("화가 실패", "Digital Art"))
+            check("화가 실패 → 생성 기록 없음", "placeholder" in failed_gen["image_url"]
+                  and main.image_store.lookup(key) is None, f"{failed_gen}")
+            retry = (await client.post("/api/studio/image", json={"keywords": "화가 실패"})).json()
+            check("화가 실패는 캐시되지 않음 (다시 호출)", "placeholder" in retry["image_url"]
+                  and painter_calls.count("화가 실패") == 2)
+
+            gone = await client.get(url)
+            check("삭제된 이미지 → 404 후 재생성", gone.status_code == 404 and
+                  not (await client.post("/api/studio/image", json={"keywords": "네온 도시"})).json()["cached"])
+
+    print(f"\n{'모두 통과' if not failed else f'{len(failed)}건 실패'}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    main.migrations.upgrade(main.database.engine)
+    sys.exit(asyncio.run(run()))
@@ -0,0 +1,100 @@
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.20; // 팀 설정(0.8.20)에 맞춤
+
+// ArtPlanningDAO 가스 절감판
+// - 제목/설명/이미지는 백엔드(art_requests)에 두고, 체인에는 본문 해시(bytes32)만 저장
+//   contentHash = art_requests.meta_hash 가 0x + 64자리 hex 면 그 값, 아니면 keccak256(meta_hash) (ethers.id)
+// - 안건 하나 = 스토리지 2슬롯 (contentHash / proposer + voteCount + status)
+// - 전체 배열 대신 getProposals(offset, limit) 페이지 조회 + getVoteCounts(ids) 득표 일괄 조회
+contract ArtPlanningDAOV2 {
+    enum ProposalStatus { IN_PROGRESS, ACCEPTED, REJECTED }
+
+    uint256 public constant ACCEPT_VOTES = 5;
+    uint256 public constant MAX_PAGE = 100;
+
+    struct Proposal {
+        bytes32 contentHash;
+        address proposer;
+        uint64 voteCount;
+        ProposalStatus status;
+    }
+
+    Proposal[] private proposals;
+    mapping(uint256 => mapping(address => bool)) public hasVoted;
+
+    // 인덱서(backend/app/chain_indexer.py)가 같은 시그니처로 디코딩한다
+    event ProposalCreated(uint256 id, bytes32 contentHash, address proposer);
+    event Voted(uint256 id, address voter, uint256 currentVotes);
+    event StatusChanged(uint256 id, ProposalStatus newStatus);
+
+    error EmptyContentHash();
+    error InvalidProposal(uint256 id);
+    error AlreadyVoted(uint256 id, address voter);
+    error VotingEnded(uint256 id);
+
+    function createProposal(bytes32 _contentHash) external returns (uint256 newId) {
+        if (_contentHash == bytes32(0)) revert EmptyContentHash();
+        newId = proposals.length;
+        proposals.push(Proposal({
+            contentHash: _contentHash,
+            proposer: msg.sender,
+            voteCount: 0,
+            status: ProposalStatus.IN_PROGRESS
+        }));
+        emit ProposalCreated(newId, _contentHash, msg.sender);
+    }
+
+    function vote(uint256 _id) external {
+        if (_id >= proposals.length) revert InvalidProposal(_id);
+        if (hasVoted[_id][msg.sender]) revert AlreadyVoted(_id, msg.sender);
+        Proposal storage p = proposals[_id];
+        if (p.status != ProposalStatus.IN_PROGRESS) revert VotingEnded(_id);
+
+        hasVoted[_id][msg.sender] = true;
+        uint64 votes;
+        unchecked { votes = p.voteCount + 1; } // 계정 수보다 클 수 없음
+        p.voteCount = votes;
+
+        emit Voted(_id, msg.sender, votes);
+
+        if (votes >= ACCEPT_VOTES) {
+            p.status = ProposalStatus.ACCEPTED;
+            emit StatusChanged(_id, ProposalStatus.ACCEPTED);
+        }
+    }
+
+    function proposalCount() external view returns (uint256) {
+        return proposals.length;
+    }
+
+    function getProposal(uint256 _id) external view returns (Proposal memory) {
+        if (_id >= proposals.length) revert InvalidProposal(_id);
+        return proposals[_id];
+    }
+
+    // [offset, offset + limit) 구간 (limit 은 MAX_PAGE 까지). 범위를 벗어나면 빈 배열, id = offset + 인덱스
+    function getProposals(uint256 _offset, uint256 _limit) external view returns (Proposal[] memory page) {
+        uint256 total = proposals.length;
+        if (_offset >= total) return new Proposal[](0);
+        if (_limit > MAX_PAGE) _limit = MAX_PAGE;
+        uint256 end = total - _offset < _limit ? total : _offset + _limit;
+        page = new Proposal[](end - _offset);
+        for (uint256 i = 0; i < page.length; ) {
+            page[i] = proposals[_offset + i];
+            unchecked { ++i; }
+        }
+    }
+
+    // 목록 화면 득표만 갱신할 때: 안건 한 개당 (득표 수 << 8 | 상태) 한 워드
+    function getVoteCounts(uint256[] calldata _ids) external view returns (uint256[] memory packed) {
+        uint256 total = proposals.length;
+        packed = new uint256[](_ids.length);
+        for (uint256 i = 0; i < _ids.length; ) {
+            uint256 id = _ids[i];
+            if (id >= total) revert InvalidProposal(id);
+            Proposal storage p = proposals[id];
+            packed[i] = (uint256(p.voteCount) << 8) | uint256(uint8(p.status));
+            unchecked { ++i; }
+        }
+    }
+}
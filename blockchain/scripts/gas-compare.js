@@ -0,0 +1,143 @@
+// ArtPlanningDAO(현재) vs ArtPlanningDAOV2(해시 저장 + 페이지 조회) 가스 비교 + V2 동작 점검
+//
+//   cd blockchain && npm run gas        # = npx hardhat run scripts/gas-compare.js (내장 hardhat 네트워크)
+//
+// 배포 / 안건 생성 / 투표 / 가결 투표 가스와, 안건이 쌓였을 때 전체 조회 vs 페이지 조회의
+// eth_call 가스·응답 크기를 표로 출력한다. V2 가 (배포 외) 더 비싸거나 동작 확인이 틀리면 exit 1.
+const { ethers } = require("hardhat");
+
+const PROPOSALS = 60; // 조회 비교용으로 쌓을 안건 수
+const PAGE = 20;
+
+// 프론트 폼과 비슷한 크기의 안건 본문
+const sample = (i) => ({
+  title: `달빛 항구 전시 기획안 #${i}`,
+  description: "항구 도시의 밤 풍경을 주제로 한 미디어 아트 전시. ".repeat(6),
+  imageUrl: `ipfs://bafybeigdyrzt5sfp7udm7hu76uh7y26nf3efuylqabf3oclgtqy55fbzdi/${i}.png`,
+  metaHash: `ipfs://bafkreihdwdcefgh4dqkjv67uzcmw7ojee6xedzdetojuzjevtenxquvyku/${i}.json`,
+});
+
+const failed = [];
+function check(name, ok, detail = "") {
+  console.log(`${ok ? "✅" : "❌"} ${name} ${detail}`);
+  if (!ok) failed.push(name);
+}
+
+async function gasOf(txPromise) {
+  const receipt = await (await txPromise).wait();
+  return receipt.gasUsed;
+}
+
+async function reverts(promise, errorName) {
+  try {
+    await promise;
+  } catch (e) {
+    return e.revert?.name === errorName || String(e.message).includes(errorName);
+  }
+  return false;
+}
+
+// eth_call 한 번의 가스 추정치와 응답 바이트 수
+async function viewCost(contract, method, args) {
+  const data = contract.interface.encodeFunctionData(method, args);
+  const to = await contract.getAddress();
+  const [gas, raw] = await Promise.all([
+    ethers.provider.estimateGas({ to, data }),
+    ethers.provider.call({ to, data }),
+  ]);
+  return { gas, bytes: (raw.length - 2) / 2 };
+}
+
+async function deploy(name) {
+  const contract = await ethers.deployContract(name);
+  const gas = (await contract.deploymentTransaction().wait()).gasUsed;
+  return [contract, gas];
+}
+
+async function main() {
+  const [proposer, ...voters] = await ethers.getSigners();
+  const [legacy, legacyDeploy] = await deploy("ArtPlanningDAO");
+  const [lean, leanDeploy] = await deploy("ArtPlanningDAOV2");
+  const acceptVotes = Number(await lean.ACCEPT_VOTES());
+
+  const rows = {};
+  const row = (name, before, after) => {
+    rows[name] = {
+      ArtPlanningDAO: before.toString(),
+      ArtPlanningDAOV2: after.toString(),
+      "절감(%)": before > 0n ? Number(((before - after) * 10000n) / before) / 100 : 0,
+    };
+    return after <= before;
+  };
+
+  // --- 쓰기 ---
+  row("배포 (참고)", legacyDeploy, leanDeploy); // 조회 함수가 늘어 바이트코드 크기는 비교 대상에서 뺌
+  const s = sample(0);
+  let ok = row("createProposal",
+    await gasOf(legacy.connect(proposer).createProposal(s.title, s.description, s.imageUrl)),
+    await gasOf(lean.connect(proposer).createProposal(ethers.id(s.metaHash))));
+  ok = row("vote (첫 표)",
+    await gasOf(legacy.connect(voters[0]).vote(0)),
+    await gasOf(lean.connect(voters[0]).vote(0))) && ok;
+  for (let i = 1; i < acceptVotes - 1; i++) {
+    await (await legacy.connect(voters[i]).vote(0)).wait();
+    await (await lean.connect(voters[i]).vote(0)).wait();
+  }
+  ok = row("vote (가결)",
+    await gasOf(legacy.connect(voters[acceptVotes - 1]).vote(0)),
+    await gasOf(lean.connect(voters[acceptVotes - 1]).vote(0))) && ok;
+
+  // --- 조회: 안건이 쌓였을 때 ---
+  for (let i = 1; i < PROPOSALS; i++) {
+    const p = sample(i);
+    await (await legacy.createProposal(p.title, p.description, p.imageUrl)).wait();
+    await (await lean.createProposal(ethers.id(p.metaHash))).wait();
+  }
+  const ids = Array.from({ length: PAGE }, (_, i) => i);
+  const all = await viewCost(legacy, "getAllProposals", []);
+  const page = await viewCost(lean, "getProposals", [0, PAGE]);
+  const counts = await viewCost(lean, "getVoteCounts", [ids]);
+  const single = await viewCost(legacy, "getProposal", [0]);
+  ok = row(`목록 eth_call 가스 (전체 ${PROPOSALS} vs 페이지 ${PAGE})`, all.gas, page.gas) && ok;
+  ok = row("목록 응답 바이트", BigInt(all.bytes), BigInt(page.bytes)) && ok;
+  ok = row(`득표 ${PAGE}건 갱신 가스 (getProposal×${PAGE} vs getVoteCounts)`, single.gas * BigInt(PAGE), counts.gas) && ok;
+  ok = row(`득표 ${PAGE}건 응답 바이트`, BigInt(single.bytes * PAGE), BigInt(counts.bytes)) && ok;
+
+  console.log(`\n⛽ 가스 비교 (안건 ${PROPOSALS}건, 페이지 ${PAGE})`);
+  console.table(rows);
+  check("V2 가 배포 외 모든 항목에서 같거나 적게 씀", ok);
+
+  // --- V2 동작 ---
+  check("proposalCount", (await lean.proposalCount()) === BigInt(PROPOSALS));
+  const first = await lean.getProposals(0, PAGE);
+  check("첫 페이지", first.length === PAGE && first[0].contentHash === ethers.id(sample(0).metaHash)
+    && first[0].proposer === proposer.address && first[0].voteCount === BigInt(acceptVotes)
+    && first[0].status === 1n);
+  const last = await lean.getProposals(PROPOSALS - 5, PAGE);
+  check("마지막 페이지는 남은 만큼만", last.length === 5
+    && last[4].contentHash === ethers.id(sample(PROPOSALS - 1).metaHash));
+  check("범위 밖 offset → 빈 배열", (await lean.getProposals(PROPOSALS, PAGE)).length === 0);
+  check("limit 은 MAX_PAGE 까지 (uint256 최댓값도)", (await lean.getProposals(1, ethers.MaxUint256)).length
+    === Math.min(PROPOSALS - 1, Number(await lean.MAX_PAGE())));
+
+  await (await lean.connect(voters[0]).vote(3)).wait();
+  const packed = await lean.getVoteCounts([0, 3, 4]);
+  const unpack = (word) => [Number(word >> 8n), Number(word & 0xffn)];
+  check("getVoteCounts (득표 << 8 | 상태)",
+    JSON.stringify(packed.map(unpack)) === JSON.stringify([[acceptVotes, 1], [1, 0], [0, 0]]),
+    JSON.stringify(packed.map(unpack)));
+
+  check("빈 해시 거절", await reverts(lean.createProposal(ethers.ZeroHash), "EmptyContentHash"));
+  check("중복 투표 거절", await reverts(lean.connect(voters[0]).vote(3), "AlreadyVoted"));
+  check("가결된 안건 투표 거절", await reverts(lean.connect(voters[acceptVotes]).vote(0), "VotingEnded"));
+  check("없는 안건 투표 거절", await reverts(lean.vote(PROPOSALS), "InvalidProposal"));
+  check("없는 안건 득표 조회 거절", await reverts(lean.getVoteCounts([0, PROPOSALS]), "InvalidProposal"));
+
+  console.log(`\n${failed.length ? `${failed.length}건 실패` : "모두 통과"}`);
+  process.exitCode = failed.length ? 1 : 0;
+}
+
+main().catch((error) => {
+  console.error(error);
+  process.exitCode = 1;
+});
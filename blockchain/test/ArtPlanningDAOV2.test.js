@@ -0,0 +1,170 @@
+// ArtPlanningDAOV2 동작 테스트
+//
+//   cd blockchain && npm test        # = npx hardhat test (내장 hardhat 네트워크)
+//
+// 페이지 조회(getProposals), 득표 일괄 조회(getVoteCounts) 패킹, 커스텀 에러 revert 를 확인한다.
+// 가스 비교표는 scripts/gas-compare.js (npm run gas) 참고.
+const { expect } = require("chai");
+const { ethers } = require("hardhat");
+const { loadFixture } = require("@nomicfoundation/hardhat-toolbox/network-helpers");
+
+const PROPOSALS = 12;
+const metaHash = (i) => ethers.id(`ipfs://bafkreihdwdcefgh4dqkjv67uzcmw7ojee6xedzdetojuzjevtenxquvyku/${i}.json`);
+const unpack = (word) => [Number(word >> 8n), Number(word & 0xffn)];
+
+const IN_PROGRESS = 0n;
+const ACCEPTED = 1n;
+
+describe("ArtPlanningDAOV2", function () {
+  // 안건 PROPOSALS 건, 0번은 가결될 때까지 투표
+  async function deployWithProposals() {
+    const [proposer, ...voters] = await ethers.getSigners();
+    const dao = await ethers.deployContract("ArtPlanningDAOV2");
+    for (let i = 0; i < PROPOSALS; i++) {
+      await (await dao.connect(proposer).createProposal(metaHash(i))).wait();
+    }
+    const acceptVotes = Number(await dao.ACCEPT_VOTES());
+    for (let i = 0; i < acceptVotes; i++) {
+      await (await dao.connect(voters[i]).vote(0)).wait();
+    }
+    return { dao, proposer, voters, acceptVotes };
+  }
+
+  describe("createProposal", function () {
+    it("해시와 제안자를 저장하고 id 순서대로 이벤트를 낸다", async function () {
+      const [proposer] = await ethers.getSigners();
+      const dao = await ethers.deployContract("ArtPlanningDAOV2");
+      await expect(dao.createProposal(metaHash(0)))
+        .to.emit(dao, "ProposalCreated").withArgs(0, metaHash(0), proposer.address);
+      await expect(dao.createProposal(metaHash(1)))
+        .to.emit(dao, "ProposalCreated").withArgs(1, metaHash(1), proposer.address);
+      expect(await dao.proposalCount()).to.equal(2n);
+
+      const p = await dao.getProposal(1);
+      expect(p.contentHash).to.equal(metaHash(1));
+      expect(p.proposer).to.equal(proposer.address);
+      expect(p.voteCount).to.equal(0n);
+      expect(p.status).to.equal(IN_PROGRESS);
+    });
+
+    it("빈 해시는 EmptyContentHash", async function () {
+      const dao = await ethers.deployContract("ArtPlanningDAOV2");
+      await expect(dao.createProposal(ethers.ZeroHash)).to.be.revertedWithCustomError(dao, "EmptyContentHash");
+    });
+  });
+
+  describe("vote", function () {
+    it("ACCEPT_VOTES 번째 표에서 가결된다", async function () {
+      const { dao, acceptVotes } = await loadFixture(deployWithProposals);
+      const p = await dao.getProposal(0);
+      expect(p.voteCount).to.equal(BigInt(acceptVotes));
+      expect(p.status).to.equal(ACCEPTED);
+    });
+
+    it("가결 표는 Voted 와 StatusChanged 를 함께 낸다", async function () {
+      const { dao, voters, acceptVotes } = await loadFixture(deployWithProposals);
+      for (let i = 0; i < acceptVotes - 1; i++) {
+        await (await dao.connect(voters[i]).vote(1)).wait();
+      }
+      const last = voters[acceptVotes - 1];
+      await expect(dao.connect(last).vote(1))
+        .to.emit(dao, "Voted").withArgs(1, last.address, acceptVotes)
+        .and.to.emit(dao, "StatusChanged").withArgs(1, ACCEPTED);
+    });
+
+    it("중복 투표는 AlreadyVoted", async function () {
+      const { dao, voters } = await loadFixture(deployWithProposals);
+      await (await dao.connect(voters[0]).vote(3)).wait();
+      await expect(dao.connect(voters[0]).vote(3))
+        .to.be.revertedWithCustomError(dao, "AlreadyVoted").withArgs(3, voters[0].address);
+    });
+
+    it("가결된 안건에 투표하면 VotingEnded", async function () {
+      const { dao, voters, acceptVotes } = await loadFixture(deployWithProposals);
+      await expect(dao.connect(voters[acceptVotes]).vote(0))
+        .to.be.revertedWithCustomError(dao, "VotingEnded").withArgs(0);
+    });
+
+    it("없는 안건은 InvalidProposal", async function () {
+      const { dao } = await loadFixture(deployWithProposals);
+      await expect(dao.vote(PROPOSALS)).to.be.revertedWithCustomError(dao, "InvalidProposal").withArgs(PROPOSALS);
+      await expect(dao.getProposal(PROPOSALS)).to.be.revertedWithCustomError(dao, "InvalidProposal").withArgs(PROPOSALS);
+    });
+  });
+
+  describe("getProposals", function () {
+    it("[offset, offset + limit) 구간을 id 순서대로 돌려준다", async function () {
+      const { dao, proposer } = await loadFixture(deployWithProposals);
+      const page = await dao.getProposals(2, 4);
+      expect(page.length).to.equal(4);
+      page.forEach((p, i) => {
+        expect(p.contentHash).to.equal(metaHash(2 + i));
+        expect(p.proposer).to.equal(proposer.address);
+      });
+    });
+
+    it("페이지를 이어 붙이면 전체 목록과 같다", async function () {
+      const { dao } = await loadFixture(deployWithProposals);
+      const hashes = [];
+      for (let offset = 0; ; offset += 5) {
+        const page = await dao.getProposals(offset, 5);
+        if (page.length === 0) break;
+        hashes.push(...page.map((p) => p.contentHash));
+      }
+      expect(hashes).to.deep.equal(Array.from({ length: PROPOSALS }, (_, i) => metaHash(i)));
+    });
+
+    it("마지막 페이지는 남은 만큼만, 범위 밖 offset 은 빈 배열", async function () {
+      const { dao } = await loadFixture(deployWithProposals);
+      const last = await dao.getProposals(PROPOSALS - 3, 10);
+      expect(last.length).to.equal(3);
+      expect(last[2].contentHash).to.equal(metaHash(PROPOSALS - 1));
+      expect((await dao.getProposals(PROPOSALS, 10)).length).to.equal(0);
+      expect((await dao.getProposals(ethers.MaxUint256, 10)).length).to.equal(0);
+      expect((await dao.getProposals(0, 0)).length).to.equal(0);
+    });
+
+    it("limit 은 MAX_PAGE 로 잘린다 (uint256 최댓값도 넘치지 않음)", async function () {
+      const dao = await ethers.deployContract("ArtPlanningDAOV2");
+      const maxPage = Number(await dao.MAX_PAGE());
+      for (let i = 0; i < maxPage + 2; i++) {
+        await (await dao.createProposal(metaHash(i))).wait();
+      }
+      expect((await dao.getProposals(0, ethers.MaxUint256)).length).to.equal(maxPage);
+      expect((await dao.getProposals(1, maxPage + 1)).length).to.equal(maxPage);
+      expect((await dao.getProposals(maxPage, ethers.MaxUint256)).length).to.equal(2);
+    });
+  });
+
+  describe("getVoteCounts", function () {
+    it("안건마다 (득표 << 8 | 상태) 한 워드", async function () {
+      const { dao, voters, acceptVotes } = await loadFixture(deployWithProposals);
+      await (await dao.connect(voters[0]).vote(3)).wait();
+      await (await dao.connect(voters[1]).vote(3)).wait();
+
+      const packed = await dao.getVoteCounts([0, 3, 4]);
+      expect(packed.map(unpack)).to.deep.equal([[acceptVotes, Number(ACCEPTED)], [2, 0], [0, 0]]);
+    });
+
+    it("getProposal 과 같은 값을 준다", async function () {
+      const { dao } = await loadFixture(deployWithProposals);
+      const ids = Array.from({ length: PROPOSALS }, (_, i) => i);
+      const packed = await dao.getVoteCounts(ids);
+      for (const id of ids) {
+        const p = await dao.getProposal(id);
+        expect(unpack(packed[id])).to.deep.equal([Number(p.voteCount), Number(p.status)]);
+      }
+    });
+
+    it("빈 배열은 빈 결과", async function () {
+      const { dao } = await loadFixture(deployWithProposals);
+      expect((await dao.getVoteCounts([])).length).to.equal(0);
+    });
+
+    it("없는 id 가 섞이면 InvalidProposal", async function () {
+      const { dao } = await loadFixture(deployWithProposals);
+      await expect(dao.getVoteCounts([0, PROPOSALS]))
+        .to.be.revertedWithCustomError(dao, "InvalidProposal").withArgs(PROPOSALS);
+    });
+  });
+});
@@ -10,6 +10,19 @@ const ADMIN_WALLETS = [
     "0xa06e02093A85F32b2707f4f7ec646f6D606D0F4C", // 예시: 본인 지갑 주소
 ];
 
+// 목록 API 는 한 번에 limit 건만 주고 다음 페이지 커서를 X-Next-Cursor 헤더로 알려준다.
+// 헤더가 없을 때까지 이어서 받아 전체 목록을 만든다.
+const fetchAllPages = async (url, params = {}) => {
+  const rows = [];
+  let cursor = null;
+  do {
+    const res = await axios.get(url, { params: cursor ? { ...params, cursor } : params });
+    rows.push(...res.data);
+    cursor = res.headers["x-next-cursor"];
+  } while (cursor);
+  return rows;
+};
+
 function App() {
   // ==========================================
   // 1. 상태 관리 (State)
@@ -111,24 +124,23 @@ function App() {
   const fetchMyPageData = async () => {
     if (!walletAddress) return;
     try {
-      const [resBal, resMem, resRew, resDel, resAct, resRef, resMyProp, resRec] = await Promise.all([
-        axios.get(`${API_URL}/api/wallet/balance`, { params: { wallet_address: walletAddress } }),
-        axios.get(`${API_URL}/api/user/membership`, { params: { wallet_address: walletAddress } }),
-        axios.get(`${API_URL}/api/wallet/rewards`, { params: { wallet_address: walletAddress } }),
-        axios.get(`${API_URL}/api/dao/delegation`, { params: { wallet_address: walletAddress } }),
+      const [resSum, resAct, resRef, myProposals, resRec] = await Promise.all([
+        axios.get(`${API_URL}/api/user/summary`, { params: { wallet_address: walletAddress } }),
         axios.get(`${API_URL}/api/user/activity`, { params: { wallet_address: walletAddress } }),
         axios.get(`${API_URL}/api/user/referral`, { params: { wallet_address: walletAddress } }),
-        axios.get(`${API_URL}/api/user/proposals`, { params: { wallet_address: walletAddress } }),
+        fetchAllPages(`${API_URL}/api/user/proposals`, { wallet_address: walletAddress, limit: 200 }),
         axios.get(`${API_URL}/api/user/recommend`, { params: { wallet_address: walletAddress } }).catch(() => ({ data: null }))
       ]);
+      const summary = resSum.data;
       setMyInfo({
-        balance: resBal.data.balance,
-        membership: resMem.data.grade,
-        rewards: resRew.data.pending_amount,
-        delegation: resDel.data,
+        balance: summary.token_balance,
+        membership: summary.membership_grade,
+        rewards: summary.pending_rewards,
+        delegation: { delegated_to: summary.delegated_to, amount: 0 },
+        badge: summary.badge,
         activity: resAct.data,
         referral: resRef.data,
-        myProposals: resMyProp.data,
+        myProposals,
         recommendation: resRec ? resRec.data : null
       });
     } catch (err) { console.error("내 정보 로드 실패", err); }
@@ -143,8 +155,8 @@ function App() {
   };
 
   const fetchGallery = async () => {
-    const res = await axios.get(`${API_URL}/api/gallery/items`);
-    setGalleryItems(res.data);
+    const items = await fetchAllPages(`${API_URL}/api/gallery/items`, { limit: 200 });
+    setGalleryItems(items);
   };
 
   // --- 각종 핸들러 ---